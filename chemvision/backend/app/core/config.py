@@ -1,9 +1,20 @@
 """Application configuration."""
 
+import os
+import tempfile
+from typing import Literal
+
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+def _default_shared_cache_path() -> str:
+    """Shared cache file in the per-user runtime directory (tmpfs), else the temp directory."""
+    return os.path.join(
+        os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir(), "chemvision-cache"
+    )
+
+
 class Settings(BaseSettings):
     """Application settings."""
 
@@ -17,6 +28,13 @@ class Settings(BaseSettings):
     environment: str = Field(default="development", description="Environment name")
     log_level: str = Field(default="INFO", description="Logging level")
 
+    # Engines load their heavy dependencies on first use unless listed here.
+    # Example: WARMUP_ENGINES='["naming", "ocsr"]'
+    warmup_engines: list[Literal["naming", "ocsr", "similarity"]] = Field(
+        default=[],
+        description="Engines loaded during startup instead of on first request (JSON array)",
+    )
+
     # CORS - use JSON array format in environment variable
     # Example: CORS_ORIGINS='["http://localhost:3000", "http://example.com"]'
     cors_origins: list[str] = Field(
@@ -29,6 +47,159 @@ class Settings(BaseSettings):
         default=10 * 1024 * 1024,  # 10 MB
         description="Maximum upload size in bytes",
     )
+    request_timeout_ms: int | None = Field(
+        default=30_000,
+        description="Deadline of API requests; clients may shorten it with X-Request-Timeout-Ms",
+    )
+    # Example: ROUTE_TIMEOUTS_MS='{"/api/page-to-structures": 600000}'
+    route_timeouts_ms: dict[str, int | None] = Field(
+        default={
+            "/api/image-to-structure/by-reference/batch": 300_000,
+            "/api/page-to-structures": 120_000,
+            "/api/depiction/batch": 120_000,
+        },
+        description="Per-path deadlines replacing request_timeout_ms (null = no limit)",
+    )
+
+    # HTTP caching of GET conversions
+    http_cache_max_age: int = Field(
+        default=86400,
+        description="Cache-Control max-age (seconds) for cacheable GET conversions",
+    )
+
+    # Conversion cache
+    cache_backend: Literal["none", "memory", "shared"] = Field(
+        default="memory",
+        description="Conversion cache backend (shared = mmap table shared by all workers)",
+    )
+    cache_max_entries: int = Field(
+        default=10_000,
+        description="Maximum number of entries in the per-process memory cache",
+    )
+    cache_shared_path: str = Field(
+        default_factory=_default_shared_cache_path,
+        description=(
+            "Backing file of the shared cache; workers using the same path share it "
+            "(default: chemvision-cache in XDG_RUNTIME_DIR or the temp directory)"
+        ),
+    )
+    cache_shared_size_mb: int = Field(
+        default=64,
+        description="Size of the shared cache table in megabytes",
+    )
+    result_store_path: str | None = Field(
+        default=None,
+        description="SQLite file persisting conversion results across restarts (second cache tier)",
+    )
+    result_store_batch_size: int = Field(
+        default=256,
+        description="Maximum number of results committed per background write",
+    )
+    result_store_flush_ms: int = Field(
+        default=50,
+        description="Maximum time a queued result waits before being committed",
+    )
+    result_store_max_queued: int = Field(
+        default=10_000,
+        description="Maximum number of results waiting to be written; further writes are dropped",
+    )
+
+    # Image validation
+    image_max_pixels: int = Field(
+        default=50_000_000,
+        description="Maximum width x height of uploaded images, checked from the header",
+    )
+    image_max_dimension: int = Field(
+        default=20_000,
+        description="Maximum width or height (pixels) of uploaded images",
+    )
+
+    # Image submission by reference (shared volume)
+    image_reference_root: str | None = Field(
+        default=None,
+        description="Directory whose images may be submitted by path instead of uploaded",
+    )
+    image_reference_max_files: int = Field(
+        default=1000,
+        description="Maximum number of images in a directory submitted as one batch",
+    )
+
+    # OCSR
+    ocsr_max_workers: int = Field(
+        default=4,
+        description="Threads used to recognize page regions in parallel",
+    )
+    page_min_region_size: int = Field(
+        default=32,
+        description="Minimum width and height (pixels) of a structure region on a page",
+    )
+    page_max_aspect_ratio: float = Field(
+        default=5.0,
+        description="Maximum long/short side ratio of a structure region (rejects text and arrows)",
+    )
+    page_max_ink_density: float = Field(
+        default=0.35,
+        description="Maximum fraction of dark pixels in a structure region (rejects filled areas)",
+    )
+    page_decode_max_side: int = Field(
+        default=4096,
+        description="Larger JPEG pages are decoded at reduced DCT scale (1/2, 1/4, 1/8)",
+    )
+
+    # Name lookup
+    fuzzy_max_distance: int = Field(
+        default=2,
+        description=(
+            "Maximum edit distance of fuzzy matches of names with 10+ characters "
+            "(shorter names allow at most 1; 0 disables fuzzy lookup)"
+        ),
+    )
+
+    # Engine routing
+    engine_max_workers: int = Field(
+        default=8,
+        description="Threads running hedged engines (external tools, ML models)",
+    )
+
+    # Live name preview (WebSocket)
+    live_debounce_ms: int = Field(
+        default=150,
+        description="Quiet period after a name update before it is converted (milliseconds)",
+    )
+
+    # Structure depiction
+    depiction_cache_size_mb: int = Field(
+        default=64,
+        description="Memory budget of the cache of rendered structure images (MB)",
+    )
+
+    # Similarity search
+    fingerprint_bits: int = Field(
+        default=1024,
+        description="Fingerprint length in bits (multiple of 64)",
+    )
+    fingerprint_radius: int = Field(
+        default=2,
+        description="Circular fingerprint radius",
+    )
+    similarity_index_path: str | None = Field(
+        default=None,
+        description="Directory the similarity index is loaded from at startup and saved to on shutdown",
+    )
+
+    # Debug profiling
+    profiling_enabled: bool = Field(
+        default=False,
+        description="Expose the sampling profiler under /debug and honour the X-Profile header",
+    )
+    profiling_token: str | None = Field(
+        default=None,
+        description="If set, profiling requires a matching X-Debug-Token header",
+    )
+    profiling_max_seconds: float = Field(
+        default=60.0,
+        description="Maximum duration of an on-demand profile",
+    )
 
 
 settings = Settings()
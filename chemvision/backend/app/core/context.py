@@ -0,0 +1,12 @@
+"""Request context helpers."""
+
+import uuid
+
+import structlog
+
+
+def get_correlation_id() -> str:
+    """Get current correlation ID from context."""
+    ctx_vars = structlog.contextvars.get_contextvars()
+    correlation_id = ctx_vars.get("correlation_id")
+    return str(correlation_id) if correlation_id is not None else str(uuid.uuid4())
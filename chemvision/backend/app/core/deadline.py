@@ -0,0 +1,256 @@
+"""Request deadlines and cancellation.
+
+Each API request gets a deadline from the ``X-Request-Timeout-Ms`` header, capped
+by ``request_timeout_ms`` (or the path's entry in ``route_timeouts_ms``, which
+gives long batch and page endpoints more time). The deadline lives in a context variable, so it
+follows the request into ``run_in_threadpool`` calls and into executor tasks
+submitted with ``contextvars.copy_context().run``. Services call
+``check_deadline()`` between expensive steps and stop with
+``DeadlineExceededError`` once the deadline has passed or the request has been
+cancelled.
+
+``DeadlineMiddleware`` cancels a request when its deadline passes (answering
+504 DEADLINE_EXCEEDED), when the client disconnects, or when reading the request
+fails, and marks the deadline cancelled with that reason so that work already
+running in threads stops at its next check.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+import structlog
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.context import get_correlation_id
+
+logger = structlog.get_logger()
+
+TIMEOUT_HEADER = "X-Request-Timeout-Ms"
+
+
+class DeadlineExceededError(Exception):
+    """Raised when work continues past its request's deadline or cancellation."""
+
+
+class Deadline:
+    """Point in time after which a request's work is abandoned."""
+
+    def __init__(self, timeout: float | None) -> None:
+        self.expires_at = None if timeout is None else time.monotonic() + timeout
+        self._cancelled = threading.Event()
+        self.reason: str | None = None
+
+    def remaining(self) -> float | None:
+        """Seconds left (never negative), or None without a time limit."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self._cancelled.is_set() or self.remaining() == 0.0
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        """
+        Abandon the work immediately.
+
+        Args:
+            reason: Why the work was abandoned, e.g. "deadline" or "disconnect"
+        """
+        if self.reason is None:
+            self.reason = reason
+        self._cancelled.set()
+
+    def check(self) -> None:
+        """Raise DeadlineExceededError if the deadline has passed or was cancelled."""
+        if self._cancelled.is_set() and self.reason != "deadline":
+            raise DeadlineExceededError(f"Request cancelled ({self.reason})")
+        if self.expired:
+            raise DeadlineExceededError("Request deadline exceeded")
+
+
+_current: ContextVar[Deadline | None] = ContextVar("deadline", default=None)
+
+
+def current_deadline() -> Deadline | None:
+    """Return the deadline of the current request, if any."""
+    return _current.get()
+
+
+def check_deadline() -> None:
+    """Raise DeadlineExceededError if the current request's deadline has passed."""
+    deadline = _current.get()
+    if deadline is not None:
+        deadline.check()
+
+
+@contextmanager
+def deadline_scope(deadline: Deadline | None) -> Iterator[Deadline | None]:
+    """Make ``deadline`` the current deadline within the block."""
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def request_timeout(headers: dict[str, str], path: str = "") -> float | None:
+    """
+    Return the timeout of a request in seconds.
+
+    Args:
+        headers: Lowercased request headers
+        path: Request path, looked up in ``route_timeouts_ms``
+
+    Raises:
+        ValueError: If the timeout header is not a positive integer
+    """
+    if path in settings.route_timeouts_ms:
+        timeout_ms = settings.route_timeouts_ms[path]
+    else:
+        timeout_ms = settings.request_timeout_ms
+    header = headers.get(TIMEOUT_HEADER.lower())
+    if header is not None:
+        requested = int(header)
+        if requested <= 0:
+            raise ValueError(f"{TIMEOUT_HEADER} must be positive")
+        timeout_ms = requested if timeout_ms is None else min(requested, timeout_ms)
+    return None if timeout_ms is None else timeout_ms / 1000
+
+
+def deadline_exceeded_body() -> dict[str, Any]:
+    """Return the standard error body of a request that ran out of time."""
+    return {
+        "error_code": "DEADLINE_EXCEEDED",
+        "message": "The request did not complete within its deadline",
+        "details": None,
+        "correlation_id": get_correlation_id(),
+    }
+
+
+async def _send_json(send: Send, status_code: int, body: dict[str, Any]) -> None:
+    payload = json.dumps(body).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(payload)).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": payload})
+
+
+class DeadlineMiddleware:
+    """
+    ASGI middleware enforcing request deadlines and cancelling on disconnect.
+
+    Only requests under ``prefixes`` are covered, so long-running debug endpoints
+    are not cut short by the API timeout.
+    """
+
+    def __init__(self, app: ASGIApp, prefixes: tuple[str, ...] = ("/api/",)) -> None:
+        self.app = app
+        self.prefixes = prefixes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        headers = {
+            key.decode("latin-1"): value.decode("latin-1") for key, value in scope["headers"]
+        }
+        try:
+            timeout = request_timeout(headers, scope["path"])
+        except ValueError:
+            await _send_json(
+                send,
+                400,
+                {
+                    "error_code": "INVALID_TIMEOUT",
+                    "message": f"{TIMEOUT_HEADER} must be a positive integer",
+                    "details": None,
+                    "correlation_id": get_correlation_id(),
+                },
+            )
+            return
+
+        deadline = Deadline(timeout)
+        messages: asyncio.Queue[Message] = asyncio.Queue(maxsize=1)
+        disconnected = asyncio.Event()
+        response_started = False
+
+        async def read_messages() -> None:
+            # Reads ahead by at most one message, which keeps upload backpressure
+            # while still noticing a disconnect during a long conversion.
+            while (message := await receive())["type"] != "http.disconnect":
+                await messages.put(message)
+            disconnected.set()
+
+        async def receive_forwarded() -> Message:
+            # Buffered body first, then the disconnect for every later call, as
+            # the server would answer it.
+            if messages.empty() and disconnected.is_set():
+                return {"type": "http.disconnect"}
+            getter = asyncio.ensure_future(messages.get())
+            waiter = asyncio.ensure_future(disconnected.wait())
+            try:
+                await asyncio.wait({getter, waiter}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                waiter.cancel()
+                if not getter.done():
+                    getter.cancel()
+            if getter.cancelled():
+                return {"type": "http.disconnect"}
+            return getter.result()
+
+        async def send_tracked(message: Message) -> None:
+            nonlocal response_started
+            response_started = True
+            await send(message)
+
+        with deadline_scope(deadline):
+            handler: asyncio.Future[None] = asyncio.ensure_future(
+                self.app(scope, receive_forwarded, send_tracked)
+            )
+        reader = asyncio.create_task(read_messages())
+        reason = "deadline"
+        try:
+            await asyncio.wait(
+                {handler, reader},
+                timeout=deadline.remaining(),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if reader.done():
+                reason = "disconnect" if reader.exception() is None else "receive_error"
+        finally:
+            reader.cancel()
+            if not handler.done():
+                # Stop threads at their next check.
+                deadline.cancel(reason)
+                handler.cancel()
+            result, read_error = await asyncio.gather(handler, reader, return_exceptions=True)
+
+        if not isinstance(result, asyncio.CancelledError):
+            if isinstance(result, BaseException):
+                raise result
+            return
+
+        logger.warning("request_cancelled", path=scope["path"], reason=reason)
+        if isinstance(read_error, Exception):
+            # Not a timeout: let the error handlers report the failed read.
+            raise read_error
+        if not response_started:
+            # Also sent after a disconnect (and dropped by the server), so that
+            # outer middleware always sees a response.
+            await _send_json(send, 504, deadline_exceeded_body())
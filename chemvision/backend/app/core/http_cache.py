@@ -0,0 +1,41 @@
+"""HTTP caching helpers (ETag, Cache-Control, conditional requests)."""
+
+import hashlib
+
+from fastapi import Request, Response
+
+from app.core.config import settings
+
+# Responses vary on negotiation headers so that shared caches keep separate
+# entries for each representation.
+VARY = "Accept, Accept-Encoding"
+
+
+def make_etag(*parts: str) -> str:
+    """Return a strong ETag derived from the given parts."""
+    digest = hashlib.sha256("\0".join(parts).encode()).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Return True if the request's If-None-Match header matches the ETag."""
+    header = request.headers.get("If-None-Match")
+    if header is None:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    # If-None-Match uses weak comparison (RFC 9110 13.1.2).
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def cache_headers(etag: str) -> dict[str, str]:
+    """Return the headers marking a response as cacheable and revalidatable."""
+    return {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.http_cache_max_age}",
+        "Vary": VARY,
+    }
+
+
+def not_modified(etag: str) -> Response:
+    """Return an empty 304 response carrying the cache headers."""
+    return Response(status_code=304, headers=cache_headers(etag))
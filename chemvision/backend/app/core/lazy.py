@@ -0,0 +1,44 @@
+"""Deferred imports of heavy dependencies.
+
+Conversion engines depend on large libraries (NumPy, Pillow and, later, ML
+runtimes). Importing them at module level would make every worker pay for them
+at boot, before it can serve health checks. ``lazy_import`` returns a module
+placeholder that performs the real import on first attribute access, so engines
+load on first use or during the lifespan warmup (see ``app.services.warmup``).
+"""
+
+import importlib
+import threading
+from types import ModuleType
+from typing import Any
+
+
+class _LazyModule(ModuleType):
+    """Module placeholder that imports the real module on first attribute access."""
+
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+        self._lazy_lock = threading.Lock()
+        self._lazy_module: ModuleType | None = None
+
+    def _load(self) -> ModuleType:
+        with self._lazy_lock:
+            if self._lazy_module is None:
+                module = importlib.import_module(self.__name__)
+                # Copy the namespace so later lookups no longer go through __getattr__.
+                self.__dict__.update(module.__dict__)
+                self._lazy_module = module
+            return self._lazy_module
+
+    def __getattr__(self, attribute: str) -> Any:
+        return getattr(self._load(), attribute)
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Return a module that is imported on first attribute access.
+
+    Args:
+        name: Absolute module name (e.g. ``"numpy"`` or ``"PIL.Image"``)
+    """
+    return _LazyModule(name)
@@ -0,0 +1,175 @@
+"""Low-overhead statistical sampling profiler.
+
+A background thread periodically snapshots the Python stacks of all other threads
+(``sys._current_frames``) and counts identical stacks. The result is rendered in
+the collapsed-stack format (``frame;frame;frame count`` per line) understood by
+flamegraph.pl, speedscope and inferno. Nothing is instrumented, so the profiled
+code runs at full speed between samples.
+
+Per-request profiles only sample the threads working on the request: the event
+loop thread that handles it and the worker threads running its
+``run_in_threadpool`` calls (use this module's ``run_in_threadpool`` for that).
+Other async requests served by the same event loop at the same time can still
+appear in the loop thread's samples.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from collections.abc import Callable, Iterable
+from contextvars import ContextVar
+from types import FrameType
+from typing import ParamSpec, TypeVar
+
+from fastapi.concurrency import run_in_threadpool as _run_in_threadpool
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+# Leaf frames of threads that are blocked waiting for work; skipped unless idle
+# samples are requested, so profiles show where CPU time goes.
+_IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("base_events.py", "_run_once"),
+}
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _is_idle(frame: FrameType) -> bool:
+    return (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in _IDLE_LEAVES
+
+
+class SamplingProfiler:
+    """Samples thread stacks at a fixed interval until stopped.
+
+    All threads are sampled unless ``threads`` is given; then only those threads
+    and threads added later with :meth:`add_thread` are.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.005,
+        include_idle: bool = False,
+        threads: Iterable[int] | None = None,
+    ) -> None:
+        self.interval = interval
+        self.include_idle = include_idle
+        self.samples = 0
+        self._stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        # Sampled thread ids with a reference count (a thread can be added while nested).
+        self._threads: Counter[int] | None = None if threads is None else Counter(threads)
+        self._threads_lock = threading.Lock()
+
+    def add_thread(self, thread_id: int) -> None:
+        """Start sampling a thread (no-op when all threads are sampled)."""
+        with self._threads_lock:
+            if self._threads is not None:
+                self._threads[thread_id] += 1
+
+    def discard_thread(self, thread_id: int) -> None:
+        """Stop sampling a thread added with :meth:`add_thread`."""
+        with self._threads_lock:
+            if self._threads is not None:
+                self._threads[thread_id] -= 1
+                if self._threads[thread_id] <= 0:
+                    del self._threads[thread_id]
+
+    def start(self) -> "SamplingProfiler":
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> str:
+        """Stop sampling and return the collapsed stacks."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.collapsed()
+
+    def collapsed(self) -> str:
+        """Return the samples collected so far in collapsed-stack format."""
+        return "".join(f"{stack} {count}\n" for stack, count in self._stacks.most_common())
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            with self._threads_lock:
+                sampled = None if self._threads is None else set(self._threads)
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or (sampled is not None and thread_id not in sampled):
+                    continue
+                if not self.include_idle and _is_idle(frame):
+                    continue
+                labels = []
+                current: FrameType | None = frame
+                while current is not None:
+                    labels.append(_frame_label(current))
+                    current = current.f_back
+                labels.append(names.get(thread_id, f"thread-{thread_id}"))
+                self._stacks[";".join(reversed(labels))] += 1
+            self.samples += 1
+
+
+def profile_for(seconds: float, interval: float = 0.005) -> str:
+    """Profile the whole process for a duration and return the collapsed stacks."""
+    profiler = SamplingProfiler(interval=interval).start()
+    time.sleep(seconds)
+    return profiler.stop()
+
+
+# Profiler of the request being handled, if it was sent with ``X-Profile: 1``.
+current_profiler: ContextVar[SamplingProfiler | None] = ContextVar("current_profiler", default=None)
+
+
+async def run_in_threadpool(func: Callable[P, T], *args: P.args, **kwargs: P.kwargs) -> T:
+    """
+    ``fastapi.concurrency.run_in_threadpool`` that includes the worker thread in
+    the profile of the current request while it runs ``func``.
+    """
+    profiler = current_profiler.get()
+    if profiler is None:
+        return await _run_in_threadpool(func, *args, **kwargs)
+
+    def run() -> T:
+        thread_id = threading.get_ident()
+        profiler.add_thread(thread_id)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.discard_thread(thread_id)
+
+    return await _run_in_threadpool(run)
+
+
+class ProfileStore:
+    """Bounded store of per-request profiles, keyed by profile id."""
+
+    def __init__(self, max_profiles: int = 32) -> None:
+        self.max_profiles = max_profiles
+        self._profiles: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, profile_id: str, collapsed: str) -> None:
+        with self._lock:
+            self._profiles[profile_id] = collapsed
+            self._profiles.move_to_end(profile_id)
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> str | None:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+
+request_profiles = ProfileStore()
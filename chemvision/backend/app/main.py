@@ -1,5 +1,6 @@
 """FastAPI application entrypoint."""
 
+import threading
 import uuid
 from collections.abc import AsyncIterator, Awaitable, Callable
 from contextlib import asynccontextmanager
@@ -9,9 +10,13 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, Response
 
+from app.core import profiling
 from app.core.config import settings
+from app.core.deadline import DeadlineExceededError, DeadlineMiddleware, deadline_exceeded_body
 from app.models.schemas import ErrorResponse, HealthResponse
-from app.routers import convert
+from app.routers import convert, debug, depiction, similarity
+from app.services import fingerprint, warmup
+from app.services.cache import close_cache
 
 # Configure structured logging
 structlog.configure(
@@ -34,7 +39,14 @@ logger = structlog.get_logger()
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     """Application lifespan handler."""
     logger.info("application_startup", version="0.1.0", environment=settings.environment)
+    warmup.warm_up(settings.warmup_engines)
     yield
+    index = fingerprint.loaded_index()
+    if settings.similarity_index_path and index is not None:
+        # Every worker saves its own index: merge, so none loses the others' molecules.
+        index.save(settings.similarity_index_path, merge=True)
+        logger.info("similarity_index_saved", path=settings.similarity_index_path, size=len(index))
+    close_cache()
     logger.info("application_shutdown")
 
 
@@ -45,6 +57,9 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Deadlines and disconnect cancellation (innermost, so errors pass through CORS)
+app.add_middleware(DeadlineMiddleware)
+
 # CORS configuration
 app.add_middleware(
     CORSMiddleware,
@@ -55,6 +70,32 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def profile_request(
+    request: Request, call_next: Callable[[Request], Awaitable[Response]]
+) -> Response:
+    """Capture a sampling profile of requests sent with ``X-Profile: 1``.
+
+    The profile is stored under a server-generated id, returned in the
+    ``X-Profile-ID`` header, and can be fetched from ``/debug/profiles/{id}``. Only
+    the threads working on this request are sampled (see ``app.core.profiling``).
+    """
+    if request.headers.get("X-Profile") != "1" or not debug.profiling_allowed(request):
+        return await call_next(request)
+
+    profile_id = uuid.uuid4().hex
+    profiler = profiling.SamplingProfiler(interval=0.001, threads=[threading.get_ident()]).start()
+    token = profiling.current_profiler.set(profiler)
+    try:
+        response = await call_next(request)
+    finally:
+        profiling.current_profiler.reset(token)
+        profiling.request_profiles.put(profile_id, profiler.stop())
+    logger.info("request_profiled", profile_id=profile_id)
+    response.headers["X-Profile-ID"] = profile_id
+    return response
+
+
 @app.middleware("http")
 async def add_correlation_id(
     request: Request, call_next: Callable[[Request], Awaitable[Response]]
@@ -75,6 +116,13 @@ async def health_check() -> HealthResponse:
     return HealthResponse(status="ok")
 
 
+@app.exception_handler(DeadlineExceededError)
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceededError) -> JSONResponse:
+    """Answer requests whose work stopped at a deadline check with 504."""
+    logger.warning("deadline_exceeded", path=request.url.path)
+    return JSONResponse(status_code=504, content=deadline_exceeded_body())
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception) -> JSONResponse:
     """Global exception handler."""
@@ -101,3 +149,6 @@ async def global_exception_handler(request: Request, exc: Exception) -> JSONResp
 
 # Register routers
 app.include_router(convert.router, prefix="/api", tags=["conversions"])
+app.include_router(similarity.router, prefix="/api", tags=["similarity"])
+app.include_router(depiction.router, prefix="/api", tags=["depiction"])
+app.include_router(debug.router, prefix="/debug", tags=["debug"], include_in_schema=False)
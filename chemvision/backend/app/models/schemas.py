@@ -1,6 +1,6 @@
 """Pydantic models for request/response validation."""
 
-from typing import Literal
+from typing import Annotated, Literal
 
 from pydantic import BaseModel, Field
 
@@ -62,3 +62,157 @@ class NameResponse(BaseModel):
     source: Literal["demo", "ml", "tool"] = Field(
         description="Source of the conversion (demo/ml/tool)"
     )
+
+
+# Live name preview
+class LiveNameUpdate(BaseModel):
+    """Name update sent by a live preview client over the WebSocket."""
+
+    seq: int = Field(ge=0, description="Client sequence number; a higher number supersedes")
+    name: str = Field(
+        description="IUPAC chemical name as currently typed",
+        min_length=1,
+        max_length=500,
+        examples=["isopentane"],
+    )
+
+
+class LiveStructureResult(BaseModel):
+    """Conversion result for the latest name update of a live preview client."""
+
+    seq: int | None = Field(description="Sequence number of the update this result answers")
+    smiles: str | None = Field(default=None, description="SMILES notation, if converted")
+    source: Literal["demo", "ml", "tool"] | None = Field(
+        default=None, description="Source of the conversion (demo/ml/tool)"
+    )
+    error: ErrorResponse | None = Field(default=None, description="Error, if not converted")
+
+
+# Page segmentation
+class BoundingBox(BaseModel):
+    """Pixel bounding box of a region within an image."""
+
+    x: int = Field(ge=0, description="Left edge in pixels")
+    y: int = Field(ge=0, description="Top edge in pixels")
+    width: int = Field(gt=0, description="Width in pixels")
+    height: int = Field(gt=0, description="Height in pixels")
+
+
+class RegionStructure(BaseModel):
+    """A structure depiction found on a page and its recognition result."""
+
+    bbox: BoundingBox = Field(description="Location of the depiction on the page")
+    smiles: str | None = Field(description="SMILES notation, or null if not recognized")
+    source: Literal["demo", "ml", "tool"] = Field(
+        description="Source of the conversion (demo/ml/tool)"
+    )
+
+
+class PageResponse(BaseModel):
+    """Response containing all structures recognized on a page."""
+
+    width: int = Field(description="Page width in pixels")
+    height: int = Field(description="Page height in pixels")
+    regions: list[RegionStructure] = Field(description="Detected regions in reading order")
+
+
+# Image references (shared volume)
+class ImageReferenceRequest(BaseModel):
+    """Request to recognize an image file on the shared image volume."""
+
+    path: str = Field(
+        description="Path of a PNG/JPEG file, relative to the image reference root",
+        min_length=1,
+        max_length=4096,
+        examples=["patents/US1234567/fig-1.png"],
+    )
+
+
+class ImageDirectoryRequest(BaseModel):
+    """Request to recognize every image in a directory on the shared image volume."""
+
+    directory: str = Field(
+        default="",
+        description="Directory relative to the image reference root (empty for the root)",
+        max_length=4096,
+        examples=["patents/US1234567"],
+    )
+
+
+class ImageResult(BaseModel):
+    """Recognition result for one image of a directory batch."""
+
+    path: str = Field(description="Path of the image, relative to the image reference root")
+    smiles: str | None = Field(default=None, description="SMILES notation, if recognized")
+    source: Literal["demo", "ml", "tool"] | None = Field(
+        default=None, description="Source of the conversion (demo/ml/tool)"
+    )
+    error: ErrorResponse | None = Field(default=None, description="Error, if not recognized")
+
+
+class BatchStructureResponse(BaseModel):
+    """Response containing the recognition result of every image in a directory."""
+
+    directory: str = Field(description="Directory that was processed")
+    results: list[ImageResult] = Field(description="Per-image results, sorted by path")
+
+
+# Structure depiction
+class DepictionBatchRequest(BaseModel):
+    """Request to render the structures of many molecules (e.g. a result table)."""
+
+    smiles: list[Annotated[str, Field(min_length=1, max_length=1000)]] = Field(
+        description="SMILES notation of each molecule (at most 1000 characters each)",
+        min_length=1,
+        max_length=1000,
+        examples=[["CC(C)CC", "c1ccccc1O"]],
+    )
+    format: Literal["svg", "png"] = Field(default="svg", description="Image format")
+    width: int = Field(default=300, ge=16, le=2048, description="Image width in pixels")
+    height: int = Field(default=200, ge=16, le=2048, description="Image height in pixels")
+
+
+class DepictionResult(BaseModel):
+    """Rendered structure of one molecule of a batch."""
+
+    smiles: str = Field(description="SMILES notation, as requested")
+    image: str | None = Field(
+        default=None, description="Image as a data URI, usable directly as an <img> source"
+    )
+    error: ErrorResponse | None = Field(default=None, description="Error, if not rendered")
+
+
+class DepictionBatchResponse(BaseModel):
+    """Response containing one rendered structure per requested molecule."""
+
+    results: list[DepictionResult] = Field(description="Results in request order")
+
+
+# Similarity search
+class SimilaritySearchRequest(BaseModel):
+    """Request to find indexed molecules similar to a query structure."""
+
+    smiles: str = Field(
+        description="Query SMILES notation",
+        min_length=1,
+        max_length=1000,
+        examples=["CC(C)CC"],
+    )
+    k: int = Field(default=10, ge=1, le=1000, description="Maximum number of hits")
+    threshold: float = Field(
+        default=0.0, ge=0.0, le=1.0, description="Minimum Tanimoto similarity of a hit"
+    )
+
+
+class SimilarityHit(BaseModel):
+    """A molecule found by similarity search."""
+
+    smiles: str = Field(description="SMILES notation of the indexed molecule")
+    similarity: float = Field(description="Tanimoto similarity to the query (0-1)")
+
+
+class SimilaritySearchResponse(BaseModel):
+    """Response containing similarity search hits."""
+
+    hits: list[SimilarityHit] = Field(description="Hits, most similar first")
+    indexed: int = Field(description="Number of molecules in the index")
@@ -1,33 +1,105 @@
 """Conversion endpoints for molecular structure and naming."""
 
+import asyncio
 import uuid
+from collections.abc import Callable
 
 import structlog
-from fastapi import APIRouter, File, HTTPException, UploadFile, status
-
+from fastapi import (
+    APIRouter,
+    File,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+    WebSocket,
+    WebSocketDisconnect,
+    status,
+)
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, ValidationError
+
+from app.core.config import settings
+from app.core.context import get_correlation_id
+from app.core.deadline import (
+    Deadline,
+    DeadlineExceededError,
+    check_deadline,
+    deadline_exceeded_body,
+    deadline_scope,
+    request_timeout,
+)
+from app.core.http_cache import cache_headers, etag_matches, make_etag, not_modified
+from app.core.profiling import run_in_threadpool
 from app.models.schemas import (
+    BatchStructureResponse,
+    BoundingBox,
     ErrorResponse,
+    ImageDirectoryRequest,
+    ImageReferenceRequest,
+    ImageResult,
+    LiveNameUpdate,
+    LiveStructureResult,
     NameResponse,
     NameToStructureRequest,
+    PageResponse,
+    RegionStructure,
     StructureResponse,
     StructureToNameRequest,
 )
-from app.services import naming, ocsr
+from app.services import fingerprint, imaging, naming, ocsr, references, segmentation
+from app.services.engines import Conversion
 
 logger = structlog.get_logger()
 router = APIRouter()
 
 
-def _get_correlation_id() -> str:
-    """Get current correlation ID from context."""
-    ctx_vars = structlog.contextvars.get_contextvars()
-    correlation_id = ctx_vars.get("correlation_id")
-    return str(correlation_id) if correlation_id is not None else str(uuid.uuid4())
+def _validate_image_type(image: UploadFile) -> None:
+    """Reject uploads that are not PNG or JPEG images."""
+    if image.content_type not in ["image/png", "image/jpeg", "image/jpg"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "error_code": "INVALID_IMAGE_TYPE",
+                "message": "Only PNG and JPEG images are supported",
+                "correlation_id": get_correlation_id(),
+            },
+        )
+
+
+def _validate_image_header(image_bytes: imaging.ImageData) -> imaging.ImageInfo:
+    """Check image dimensions from the PNG/JPEG header before any decoding."""
+    try:
+        return imaging.validate_image(
+            image_bytes,
+            max_pixels=settings.image_max_pixels,
+            max_dimension=settings.image_max_dimension,
+        )
+    except imaging.ImageTooLargeError as e:
+        raise HTTPException(
+            # Literal: the status constant was renamed across Starlette versions.
+            status_code=413,
+            detail={
+                "error_code": "IMAGE_TOO_LARGE",
+                "message": str(e),
+                "correlation_id": get_correlation_id(),
+            },
+        ) from e
+    except imaging.ImageDecodeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "error_code": "INVALID_IMAGE",
+                "message": str(e),
+                "correlation_id": get_correlation_id(),
+            },
+        ) from e
 
 
 def _not_implemented_error(operation: str) -> HTTPException:
     """Create a standardized 501 Not Implemented error."""
-    correlation_id = _get_correlation_id()
+    correlation_id = get_correlation_id()
 
     logger.warning("not_implemented", operation=operation, correlation_id=correlation_id)
 
@@ -43,6 +115,80 @@ def _not_implemented_error(operation: str) -> HTTPException:
     )
 
 
+def _convert_name(name: str, persist: bool = True) -> StructureResponse:
+    """
+    Convert a name to a structure, mapping failures to standard HTTP errors.
+
+    With ``persist=False`` (live previews) the result is neither added to the
+    similarity index nor written to the result store.
+    """
+    try:
+        result = naming.convert_name(name, persist=persist)
+
+        if result is None:
+            raise _not_implemented_error("Name to structure conversion")
+
+        logger.info(
+            "name_to_structure_success", name=name, smiles=result.value, engine=result.engine
+        )
+        if persist:
+            fingerprint.index_conversion(result.value)
+
+        return StructureResponse(smiles=result.value, source=result.source)
+
+    except (HTTPException, DeadlineExceededError):
+        raise
+    except Exception as e:
+        logger.error("name_to_structure_error", name=name, error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={
+                "error_code": "CONVERSION_ERROR",
+                "message": f"Failed to convert name to structure: {str(e)}",
+                "correlation_id": get_correlation_id(),
+            },
+        ) from e
+
+
+def _convert_smiles(smiles: str) -> NameResponse:
+    """Convert a structure to a name, mapping failures to standard HTTP errors."""
+    try:
+        result = naming.convert_smiles(smiles)
+
+        if result is None:
+            raise _not_implemented_error("Structure to name conversion")
+
+        logger.info(
+            "structure_to_name_success", smiles=smiles, name=result.value, engine=result.engine
+        )
+        fingerprint.index_conversion(smiles)
+
+        return NameResponse(name=result.value, source=result.source)
+
+    except (HTTPException, DeadlineExceededError):
+        raise
+    except Exception as e:
+        logger.error("structure_to_name_error", smiles=smiles, error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={
+                "error_code": "CONVERSION_ERROR",
+                "message": f"Failed to convert structure to name: {str(e)}",
+                "correlation_id": get_correlation_id(),
+            },
+        ) from e
+
+
+async def _cacheable(etag: str, convert: Callable[[], BaseModel]) -> Response:
+    """Run a deterministic conversion and attach HTTP caching headers to its result."""
+    try:
+        result = await run_in_threadpool(convert)
+    except HTTPException as e:
+        e.headers = {"Cache-Control": "no-store"}
+        raise
+    return JSONResponse(content=result.model_dump(), headers=cache_headers(etag))
+
+
 @router.post(
     "/name-to-structure",
     response_model=StructureResponse,
@@ -59,28 +205,135 @@ async def name_to_structure(request: NameToStructureRequest) -> StructureRespons
     """
     logger.info("name_to_structure_request", name=request.name)
 
+    return await run_in_threadpool(_convert_name, request.name)
+
+
+@router.get(
+    "/name-to-structure",
+    response_model=StructureResponse,
+    responses={
+        304: {"description": "Not modified (matching If-None-Match)"},
+        501: {"model": ErrorResponse, "description": "Not implemented"},
+    },
+)
+async def name_to_structure_cacheable(
+    request: Request,
+    name: str = Query(
+        min_length=1,
+        max_length=500,
+        description="IUPAC chemical name",
+        examples=["isopentane"],
+    ),
+) -> Response:
+    """
+    Convert an IUPAC chemical name to SMILES notation (HTTP-cacheable).
+
+    Responses carry a strong ETag derived from the normalized name and the engine
+    version, so browsers and proxies can cache them and revalidate with
+    If-None-Match without the conversion running again.
+    """
+    etag = make_etag("name-to-structure", naming.normalize_name(name), naming.ENGINE_VERSION)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    logger.info("name_to_structure_request", name=name)
+
+    return await _cacheable(etag, lambda: _convert_name(name))
+
+
+async def _send_live(websocket: WebSocket, lock: asyncio.Lock, result: LiveStructureResult) -> None:
+    """Send one live preview message; the lock keeps concurrent sends from interleaving."""
+    async with lock:
+        await websocket.send_text(result.model_dump_json())
+
+
+async def _preview_name(
+    websocket: WebSocket, lock: asyncio.Lock, update: LiveNameUpdate, deadline: Deadline
+) -> None:
+    """Debounce, convert and answer one live name update (cancelled when superseded)."""
+    await asyncio.sleep(settings.live_debounce_ms / 1000)
     try:
-        smiles = naming.name_to_smiles(request.name)
+        with deadline_scope(deadline):
+            structure = await run_in_threadpool(_convert_name, update.name, persist=False)
+        result = LiveStructureResult(
+            seq=update.seq, smiles=structure.smiles, source=structure.source
+        )
+    except HTTPException as e:
+        result = LiveStructureResult(seq=update.seq, error=ErrorResponse.model_validate(e.detail))
+    except DeadlineExceededError:
+        error = ErrorResponse.model_validate(deadline_exceeded_body())
+        result = LiveStructureResult(seq=update.seq, error=error)
+    # Shielded so that a newer update cannot cancel a message halfway through sending.
+    await asyncio.shield(_send_live(websocket, lock, result))
 
-        if smiles is None:
-            raise _not_implemented_error("Name to structure conversion")
 
-        logger.info("name_to_structure_success", name=request.name, smiles=smiles)
+@router.websocket("/ws/name-to-structure")
+async def name_to_structure_live(websocket: WebSocket) -> None:
+    """
+    Convert names as they are typed (live preview) over one WebSocket connection.
+
+    The client sends ``{"seq": <int>, "name": <str>}`` for every edit, with
+    increasing sequence numbers. An update is converted once no newer update has
+    arrived for ``LIVE_DEBOUNCE_MS``; a newer update cancels the pending
+    conversion of older ones, and updates with a sequence number not above the
+    latest one are ignored. Results are sent as ``{"seq", "smiles", "source",
+    "error"}``, where ``seq`` identifies the update answered and ``error`` uses the
+    standard error format (e.g. NOT_IMPLEMENTED for unknown names).
+
+    Each update is converted under its own deadline (``REQUEST_TIMEOUT_MS``),
+    which is cancelled when the update is superseded. Previews are not added to
+    the similarity index or the result store.
+    """
+    correlation_id = websocket.headers.get("X-Correlation-ID", str(uuid.uuid4()))
+    structlog.contextvars.clear_contextvars()
+    structlog.contextvars.bind_contextvars(correlation_id=correlation_id)
 
-        return StructureResponse(smiles=smiles, source="demo")
+    await websocket.accept()
+    logger.info("live_preview_connected")
 
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error("name_to_structure_error", name=request.name, error=str(e))
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail={
-                "error_code": "CONVERSION_ERROR",
-                "message": f"Failed to convert name to structure: {str(e)}",
-                "correlation_id": _get_correlation_id(),
-            },
-        ) from e
+    lock = asyncio.Lock()
+    pending: tuple[asyncio.Task[None], Deadline] | None = None
+    latest_seq = -1
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", status.WS_1000_NORMAL_CLOSURE))
+            if message.get("text") is None:
+                logger.warning("live_preview_binary_frame", last_seq=latest_seq)
+                await websocket.close(
+                    code=status.WS_1003_UNSUPPORTED_DATA, reason="Only text frames are accepted"
+                )
+                break
+            try:
+                update = LiveNameUpdate.model_validate_json(message["text"])
+            except ValidationError as e:
+                error = ErrorResponse(
+                    error_code="INVALID_MESSAGE",
+                    message=f"Invalid name update: {e.errors()[0]['msg']}",
+                    correlation_id=correlation_id,
+                )
+                await _send_live(websocket, lock, LiveStructureResult(seq=None, error=error))
+                continue
+
+            if update.seq <= latest_seq:
+                continue
+            latest_seq = update.seq
+            if pending is not None:
+                # Cancelling the task does not stop a conversion already running in
+                # the threadpool; cancelling its deadline does, at its next check.
+                pending[0].cancel()
+                pending[1].cancel("superseded")
+            deadline = Deadline(request_timeout({}, websocket.url.path))
+            task = asyncio.create_task(_preview_name(websocket, lock, update, deadline))
+            pending = (task, deadline)
+    except WebSocketDisconnect:
+        logger.info("live_preview_disconnected", last_seq=latest_seq)
+    finally:
+        if pending is not None:
+            pending[0].cancel()
+            pending[1].cancel("disconnect")
+            await asyncio.gather(pending[0], return_exceptions=True)
 
 
 @router.post(
@@ -99,34 +352,47 @@ async def structure_to_name(request: StructureToNameRequest) -> NameResponse:
     """
     logger.info("structure_to_name_request", smiles=request.smiles)
 
-    try:
-        name = naming.smiles_to_name(request.smiles)
+    return await run_in_threadpool(_convert_smiles, request.smiles)
 
-        if name is None:
-            raise _not_implemented_error("Structure to name conversion")
 
-        logger.info("structure_to_name_success", smiles=request.smiles, name=name)
+@router.get(
+    "/structure-to-name",
+    response_model=NameResponse,
+    responses={
+        304: {"description": "Not modified (matching If-None-Match)"},
+        501: {"model": ErrorResponse, "description": "Not implemented"},
+    },
+)
+async def structure_to_name_cacheable(
+    request: Request,
+    smiles: str = Query(
+        min_length=1,
+        max_length=1000,
+        description="SMILES notation",
+        examples=["CC(C)CC"],
+    ),
+) -> Response:
+    """
+    Convert SMILES notation to an IUPAC chemical name (HTTP-cacheable).
 
-        return NameResponse(name=name, source="ml")
+    See the GET name-to-structure endpoint for the caching semantics.
+    """
+    etag = make_etag("structure-to-name", naming.normalize_smiles(smiles), naming.ENGINE_VERSION)
+    if etag_matches(request, etag):
+        return not_modified(etag)
 
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error("structure_to_name_error", smiles=request.smiles, error=str(e))
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail={
-                "error_code": "CONVERSION_ERROR",
-                "message": f"Failed to convert structure to name: {str(e)}",
-                "correlation_id": _get_correlation_id(),
-            },
-        ) from e
+    logger.info("structure_to_name_request", smiles=smiles)
+
+    return await _cacheable(etag, lambda: _convert_smiles(smiles))
 
 
 @router.post(
     "/image-to-structure",
     response_model=StructureResponse,
     responses={
+        400: {"model": ErrorResponse, "description": "Invalid image"},
+        413: {"model": ErrorResponse, "description": "Image too large"},
+        504: {"model": ErrorResponse, "description": "Deadline exceeded"},
         501: {"model": ErrorResponse, "description": "Not implemented"},
     },
 )
@@ -141,38 +407,281 @@ async def image_to_structure(image: UploadFile = File(...)) -> StructureResponse
         "image_to_structure_request", filename=image.filename, content_type=image.content_type
     )
 
-    # Validate content type
-    if image.content_type not in ["image/png", "image/jpeg", "image/jpg"]:
+    _validate_image_type(image)
+
+    try:
+        image_bytes = await image.read()
+        _validate_image_header(image_bytes)
+
+        result = await run_in_threadpool(ocsr.convert_image, image_bytes)
+
+        if result is None:
+            raise _not_implemented_error("Image to structure conversion (OCSR)")
+
+        logger.info("image_to_structure_success", filename=image.filename, smiles=result.value)
+        await run_in_threadpool(fingerprint.index_conversion, result.value)
+
+        return StructureResponse(smiles=result.value, source=result.source)
+
+    except (HTTPException, DeadlineExceededError):
+        raise
+    except Exception as e:
+        logger.error("image_to_structure_error", filename=image.filename, error=str(e))
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail={
-                "error_code": "INVALID_IMAGE_TYPE",
-                "message": "Only PNG and JPEG images are supported",
-                "correlation_id": _get_correlation_id(),
+                "error_code": "CONVERSION_ERROR",
+                "message": f"Failed to convert image to structure: {str(e)}",
+                "correlation_id": get_correlation_id(),
+            },
+        ) from e
+
+
+def _require_image_references() -> None:
+    """Reject by-reference submissions unless an image reference root is configured."""
+    if settings.image_reference_root is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail={
+                "error_code": "IMAGE_REFERENCES_DISABLED",
+                "message": "Image submission by reference is not enabled on this server",
+                "correlation_id": get_correlation_id(),
             },
         )
 
+
+def _reference_error(e: Exception) -> HTTPException:
+    """Map a failure to access a referenced image to a standard HTTP error."""
+    if isinstance(e, references.ReferenceNotFoundError):
+        status_code, error_code = status.HTTP_404_NOT_FOUND, "IMAGE_NOT_FOUND"
+    elif isinstance(e, references.TooManyImagesError):
+        status_code, error_code = status.HTTP_400_BAD_REQUEST, "TOO_MANY_IMAGES"
+    elif isinstance(e, imaging.ImageTooLargeError):
+        status_code, error_code = 413, "IMAGE_TOO_LARGE"
+    else:
+        status_code, error_code = status.HTTP_400_BAD_REQUEST, "INVALID_IMAGE_PATH"
+    return HTTPException(
+        status_code=status_code,
+        detail={
+            "error_code": error_code,
+            "message": str(e),
+            "correlation_id": get_correlation_id(),
+        },
+    )
+
+
+def _recognize_reference(path: str) -> Conversion:
+    """Memory-map a referenced image, validate its header and recognize it."""
     try:
-        image_bytes = await image.read()
+        with references.map_image(path) as image_data:
+            _validate_image_header(image_data)
+            result = ocsr.convert_image(image_data)
+    except (references.ImageReferenceError, imaging.ImageTooLargeError) as e:
+        raise _reference_error(e) from e
 
-        smiles = ocsr.image_to_smiles(image_bytes)
+    if result is None:
+        raise _not_implemented_error("Image to structure conversion (OCSR)")
 
-        if smiles is None:
-            raise _not_implemented_error("Image to structure conversion (OCSR)")
+    fingerprint.index_conversion(result.value)
+    return result
+
+
+@router.post(
+    "/image-to-structure/by-reference",
+    response_model=StructureResponse,
+    responses={
+        400: {"model": ErrorResponse, "description": "Invalid path or image"},
+        403: {"model": ErrorResponse, "description": "Image references not enabled"},
+        404: {"model": ErrorResponse, "description": "Image not found"},
+        413: {"model": ErrorResponse, "description": "Image too large"},
+        504: {"model": ErrorResponse, "description": "Deadline exceeded"},
+        501: {"model": ErrorResponse, "description": "Not implemented"},
+    },
+)
+async def image_reference_to_structure(request: ImageReferenceRequest) -> StructureResponse:
+    """
+    Extract SMILES notation from an image file on the shared image volume (OCSR).
+
+    The path is relative to ``IMAGE_REFERENCE_ROOT`` and may not leave it (no
+    ``..``, absolute paths or symbolic links). The file is memory-mapped and
+    decoded in place instead of being uploaded and copied.
+    """
+    logger.info("image_reference_request", path=request.path)
 
-        logger.info("image_to_structure_success", filename=image.filename, smiles=smiles)
+    _require_image_references()
 
-        return StructureResponse(smiles=smiles, source="ml")
+    try:
+        result = await run_in_threadpool(_recognize_reference, request.path)
+
+        logger.info("image_reference_success", path=request.path, smiles=result.value)
 
-    except HTTPException:
+        return StructureResponse(smiles=result.value, source=result.source)
+
+    except (HTTPException, DeadlineExceededError):
         raise
     except Exception as e:
-        logger.error("image_to_structure_error", filename=image.filename, error=str(e))
+        logger.error("image_reference_error", path=request.path, error=str(e))
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail={
                 "error_code": "CONVERSION_ERROR",
                 "message": f"Failed to convert image to structure: {str(e)}",
-                "correlation_id": _get_correlation_id(),
+                "correlation_id": get_correlation_id(),
+            },
+        ) from e
+
+
+async def _recognize_batch_item(path: str, slots: asyncio.Semaphore) -> ImageResult:
+    """Recognize one image of a directory batch, reporting failures in the result."""
+    try:
+        async with slots:
+            result = await run_in_threadpool(_recognize_reference, path)
+        return ImageResult(path=path, smiles=result.value, source=result.source)
+    except HTTPException as e:
+        return ImageResult(path=path, error=ErrorResponse.model_validate(e.detail))
+    except DeadlineExceededError:
+        raise
+    except Exception as e:
+        logger.error("image_reference_error", path=path, error=str(e))
+        error = ErrorResponse(
+            error_code="CONVERSION_ERROR",
+            message=f"Failed to convert image to structure: {str(e)}",
+            correlation_id=get_correlation_id(),
+        )
+        return ImageResult(path=path, error=error)
+
+
+@router.post(
+    "/image-to-structure/by-reference/batch",
+    response_model=BatchStructureResponse,
+    responses={
+        400: {"model": ErrorResponse, "description": "Invalid directory or too many images"},
+        403: {"model": ErrorResponse, "description": "Image references not enabled"},
+        404: {"model": ErrorResponse, "description": "Directory not found"},
+        504: {"model": ErrorResponse, "description": "Deadline exceeded"},
+    },
+)
+async def image_directory_to_structures(request: ImageDirectoryRequest) -> BatchStructureResponse:
+    """
+    Recognize every PNG/JPEG image in a directory on the shared image volume.
+
+    Images directly inside the directory are recognized concurrently, each from
+    its own memory mapping, with at most ``ocsr_max_workers`` in flight.
+    Failures of individual images (e.g. NOT_IMPLEMENTED, IMAGE_TOO_LARGE) are
+    reported in their result and do not fail the batch.
+    """
+    logger.info("image_directory_request", directory=request.directory)
+
+    _require_image_references()
+
+    try:
+        paths = await run_in_threadpool(references.list_images, request.directory)
+    except references.ImageReferenceError as e:
+        raise _reference_error(e) from e
+
+    # Bounded like the OCSR executor, so one batch cannot occupy every threadpool
+    # thread or keep hundreds of images mapped at once.
+    slots = asyncio.Semaphore(settings.ocsr_max_workers)
+    results = await asyncio.gather(*(_recognize_batch_item(path, slots) for path in paths))
+
+    logger.info(
+        "image_directory_success",
+        directory=request.directory,
+        images=len(results),
+        recognized=sum(result.smiles is not None for result in results),
+    )
+
+    return BatchStructureResponse(directory=request.directory, results=list(results))
+
+
+def _recognize_page(image_bytes: bytes, info: imaging.ImageInfo) -> PageResponse:
+    """Segment a page into structure regions and recognize them in parallel."""
+    gray = imaging.decode_grayscale(image_bytes, max_side=settings.page_decode_max_side)
+    check_deadline()
+    # Large JPEGs are decoded at reduced scale; regions are mapped back to page pixels.
+    scale = info.width / gray.shape[1]
+    regions = segmentation.segment_page(
+        gray,
+        min_size=max(1, round(settings.page_min_region_size / scale)),
+        max_aspect_ratio=settings.page_max_aspect_ratio,
+        max_ink_density=settings.page_max_ink_density,
+    )
+    check_deadline()
+    results = ocsr.recognize_batch([segmentation.crop(gray, region) for region in regions])
+    for result in results:
+        if result is not None:
+            fingerprint.index_conversion(result.value)
+
+    return PageResponse(
+        width=info.width,
+        height=info.height,
+        regions=[
+            RegionStructure(
+                bbox=BoundingBox(
+                    x=round(r.x * scale),
+                    y=round(r.y * scale),
+                    width=round(r.width * scale),
+                    height=round(r.height * scale),
+                ),
+                smiles=None if result is None else result.value,
+                source="ml" if result is None else result.source,
+            )
+            for r, result in zip(regions, results, strict=True)
+        ],
+    )
+
+
+@router.post(
+    "/page-to-structures",
+    response_model=PageResponse,
+    responses={
+        400: {"model": ErrorResponse, "description": "Invalid image"},
+        413: {"model": ErrorResponse, "description": "Image too large"},
+        504: {"model": ErrorResponse, "description": "Deadline exceeded"},
+    },
+)
+async def page_to_structures(image: UploadFile = File(...)) -> PageResponse:
+    """
+    Find every structure depiction on a page image and recognize each one (OCSR).
+
+    Regions are located with connected-component analysis and recognized
+    concurrently; regions that could not be recognized have a null SMILES.
+    """
+    logger.info(
+        "page_to_structures_request", filename=image.filename, content_type=image.content_type
+    )
+
+    _validate_image_type(image)
+
+    try:
+        image_bytes = await image.read()
+        info = _validate_image_header(image_bytes)
+        page = await run_in_threadpool(_recognize_page, image_bytes, info)
+
+        logger.info(
+            "page_to_structures_success", filename=image.filename, regions=len(page.regions)
+        )
+
+        return page
+
+    except (HTTPException, DeadlineExceededError):
+        raise
+    except imaging.ImageDecodeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "error_code": "INVALID_IMAGE",
+                "message": str(e),
+                "correlation_id": get_correlation_id(),
+            },
+        ) from e
+    except Exception as e:
+        logger.error("page_to_structures_error", filename=image.filename, error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={
+                "error_code": "CONVERSION_ERROR",
+                "message": f"Failed to convert page to structures: {str(e)}",
+                "correlation_id": get_correlation_id(),
             },
         ) from e
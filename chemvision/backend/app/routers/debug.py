@@ -0,0 +1,77 @@
+"""Debug endpoints for profiling a running worker.
+
+Disabled unless ``PROFILING_ENABLED`` is set; when disabled the routes answer 404
+so their existence is not advertised.
+"""
+
+import secrets
+
+import structlog
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
+
+from app.core import profiling
+from app.core.config import settings
+from app.core.context import get_correlation_id
+
+logger = structlog.get_logger()
+
+
+def profiling_allowed(request: Request) -> bool:
+    """Return True if profiling is enabled and the request carries a valid token."""
+    if not settings.profiling_enabled:
+        return False
+    if settings.profiling_token is None:
+        return True
+    token = request.headers.get("X-Debug-Token", "")
+    return secrets.compare_digest(token.encode(), settings.profiling_token.encode())
+
+
+def require_profiling(request: Request) -> None:
+    """Dependency rejecting debug requests unless profiling is allowed."""
+    if not profiling_allowed(request):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={
+                "error_code": "NOT_FOUND",
+                "message": "Not found",
+                "correlation_id": get_correlation_id(),
+            },
+        )
+
+
+router = APIRouter(dependencies=[Depends(require_profiling)])
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def profile(
+    seconds: float = Query(default=10.0, gt=0, description="Sampling duration"),
+    interval_ms: float = Query(default=5.0, ge=1, le=1000, description="Sampling interval"),
+) -> PlainTextResponse:
+    """
+    Sample every thread of this worker for a number of seconds.
+
+    Returns collapsed stacks (one ``frame;frame;frame count`` line per distinct
+    stack) that can be fed to flamegraph.pl or loaded into speedscope.
+    """
+    seconds = min(seconds, settings.profiling_max_seconds)
+    logger.info("profile_start", seconds=seconds, interval_ms=interval_ms)
+    collapsed = await run_in_threadpool(profiling.profile_for, seconds, interval_ms / 1000)
+    return PlainTextResponse(collapsed)
+
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+async def request_profile(profile_id: str) -> PlainTextResponse:
+    """Return the profile captured for a request sent with ``X-Profile: 1``."""
+    collapsed = profiling.request_profiles.get(profile_id)
+    if collapsed is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={
+                "error_code": "PROFILE_NOT_FOUND",
+                "message": f"No profile with id {profile_id}",
+                "correlation_id": get_correlation_id(),
+            },
+        )
+    return PlainTextResponse(collapsed)
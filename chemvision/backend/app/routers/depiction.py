@@ -0,0 +1,129 @@
+"""Structure depiction (2D drawing) endpoints."""
+
+import base64
+from typing import Literal
+
+import structlog
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+
+from app.core.context import get_correlation_id
+from app.core.deadline import check_deadline
+from app.core.http_cache import cache_headers, etag_matches, make_etag, not_modified
+from app.core.profiling import run_in_threadpool
+from app.models.schemas import (
+    DepictionBatchRequest,
+    DepictionBatchResponse,
+    DepictionResult,
+    ErrorResponse,
+)
+from app.services import depiction
+from app.services.molgraph import SmilesError, structure_key
+
+logger = structlog.get_logger()
+router = APIRouter()
+
+
+def _invalid_smiles(error: SmilesError) -> ErrorResponse:
+    return ErrorResponse(
+        error_code="INVALID_SMILES",
+        message=str(error),
+        correlation_id=get_correlation_id(),
+    )
+
+
+@router.get(
+    "/depiction",
+    response_class=Response,
+    responses={
+        200: {
+            "content": {"image/svg+xml": {}, "image/png": {}},
+            "description": "Structure image",
+        },
+        304: {"description": "Not modified (matching If-None-Match)"},
+        400: {"model": ErrorResponse, "description": "Invalid SMILES"},
+    },
+)
+async def depict_structure(
+    request: Request,
+    smiles: str = Query(
+        min_length=1,
+        max_length=1000,
+        description="SMILES notation",
+        examples=["CC(C)CC"],
+    ),
+    image_format: Literal["svg", "png"] = Query(
+        default="svg", alias="format", description="Image format"
+    ),
+    width: int = Query(default=300, ge=16, le=2048, description="Image width in pixels"),
+    height: int = Query(default=200, ge=16, le=2048, description="Image height in pixels"),
+) -> Response:
+    """
+    Draw the 2D structure of a molecule as SVG or PNG (HTTP-cacheable).
+
+    The ETag is derived from the canonical structure rather than the SMILES
+    string, so every spelling of a molecule revalidates against the same cached
+    image. Rendered images are also cached on the server.
+    """
+    try:
+        key = structure_key(smiles)
+    except SmilesError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=_invalid_smiles(e).model_dump(),
+            headers={"Cache-Control": "no-store"},
+        ) from e
+
+    etag = make_etag(
+        "depiction", key, image_format, str(width), str(height), depiction.RENDERER_VERSION
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    image = await run_in_threadpool(depiction.depict, smiles, image_format, width, height)
+
+    return Response(content=image.data, media_type=image.media_type, headers=cache_headers(etag))
+
+
+def _render_batch(request: DepictionBatchRequest) -> list[DepictionResult]:
+    """Render each molecule of a batch, reporting invalid SMILES in its result."""
+    results = []
+    for smiles in request.smiles:
+        check_deadline()
+        try:
+            image = depiction.depict(smiles, request.format, request.width, request.height)
+        except SmilesError as e:
+            results.append(DepictionResult(smiles=smiles, error=_invalid_smiles(e)))
+            continue
+        encoded = base64.b64encode(image.data).decode("ascii")
+        results.append(
+            DepictionResult(smiles=smiles, image=f"data:{image.media_type};base64,{encoded}")
+        )
+    return results
+
+
+@router.post(
+    "/depiction/batch",
+    response_model=DepictionBatchResponse,
+    responses={
+        504: {"model": ErrorResponse, "description": "Deadline exceeded"},
+    },
+)
+async def depict_batch(request: DepictionBatchRequest) -> DepictionBatchResponse:
+    """
+    Draw the 2D structures of many molecules at once (e.g. for a result table).
+
+    Images are returned as data URIs in request order; molecules that cannot be
+    parsed get an INVALID_SMILES error instead. Repeated structures are rendered
+    once and served from the server-side cache.
+    """
+    logger.info("depiction_batch_request", molecules=len(request.smiles), format=request.format)
+
+    results = await run_in_threadpool(_render_batch, request)
+
+    logger.info(
+        "depiction_batch_success",
+        molecules=len(results),
+        failed=sum(result.error is not None for result in results),
+    )
+
+    return DepictionBatchResponse(results=results)
@@ -0,0 +1,56 @@
+"""Similarity search over previously converted molecules."""
+
+import structlog
+from fastapi import APIRouter, HTTPException, status
+
+from app.core.context import get_correlation_id
+from app.core.profiling import run_in_threadpool
+from app.models.schemas import (
+    ErrorResponse,
+    SimilarityHit,
+    SimilaritySearchRequest,
+    SimilaritySearchResponse,
+)
+from app.services import fingerprint
+from app.services.molgraph import SmilesError
+
+logger = structlog.get_logger()
+router = APIRouter()
+
+
+@router.post(
+    "/similarity-search",
+    response_model=SimilaritySearchResponse,
+    responses={
+        400: {"model": ErrorResponse, "description": "Invalid SMILES"},
+    },
+)
+async def similarity_search(request: SimilaritySearchRequest) -> SimilaritySearchResponse:
+    """
+    Find previously converted molecules similar to a query structure.
+
+    Molecules are added to the index as conversions succeed, and ranked by
+    Tanimoto similarity of circular fingerprints.
+    """
+    logger.info("similarity_search_request", smiles=request.smiles, k=request.k)
+
+    # The first call may load (and memory-map) a persisted index, so it runs off the loop too.
+    index = await run_in_threadpool(fingerprint.get_index)
+    try:
+        hits = await run_in_threadpool(index.search, request.smiles, request.k, request.threshold)
+    except SmilesError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "error_code": "INVALID_SMILES",
+                "message": str(e),
+                "correlation_id": get_correlation_id(),
+            },
+        ) from e
+
+    logger.info("similarity_search_success", smiles=request.smiles, hits=len(hits))
+
+    return SimilaritySearchResponse(
+        hits=[SimilarityHit(smiles=s, similarity=score) for s, score in hits],
+        indexed=len(index),
+    )
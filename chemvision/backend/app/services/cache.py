@@ -0,0 +1,361 @@
+"""Conversion result caches shared by the naming and OCSR services.
+
+Two backends are available:
+
+- ``memory``: a per-process LRU cache (one copy per worker).
+- ``shared``: a set-associative hash table in a memory-mapped file, shared by every
+  worker process of a deployment that points at the same path (by default in
+  ``XDG_RUNTIME_DIR`` or the temp directory, see ``cache_shared_path``).
+  Only conversion results are shared; the name dictionary is still a small demo
+  table built per worker (see ``app.services.naming``).
+
+Entries are addressed by a ``(kind, key)`` pair, where ``kind`` namespaces the
+conversion (``name``, ``smiles``, ``image``), and carry the ``source`` engine that
+produced them.
+
+When ``result_store_path`` is set, the durable SQLite store from
+``app.services.store`` is added as a second tier behind the configured backend.
+"""
+
+import contextlib
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import threading
+from collections import OrderedDict
+from functools import cache
+from typing import NamedTuple, Protocol
+
+from app.core.config import settings
+
+KINDS = ("name", "smiles", "image")
+SOURCES = ("demo", "ml", "tool")
+
+
+class CacheEntry(NamedTuple):
+    """A cached conversion result."""
+
+    value: str
+    source: str
+
+
+class ConversionCache(Protocol):
+    """Interface implemented by all cache backends."""
+
+    def get(self, kind: str, key: str) -> CacheEntry | None: ...
+
+    def set(self, kind: str, key: str, value: str, source: str) -> None: ...
+
+    def clear(self) -> None: ...
+
+
+class TieredCache:
+    """Two-level cache: a fast first tier in front of a larger, slower second tier."""
+
+    def __init__(self, first: ConversionCache, second: ConversionCache) -> None:
+        self.first = first
+        self.second = second
+
+    def get(self, kind: str, key: str) -> CacheEntry | None:
+        entry = self.first.get(kind, key)
+        if entry is None:
+            entry = self.second.get(kind, key)
+            if entry is not None:
+                self.first.set(kind, key, entry.value, entry.source)
+        return entry
+
+    def set(self, kind: str, key: str, value: str, source: str) -> None:
+        self.first.set(kind, key, value, source)
+        self.second.set(kind, key, value, source)
+
+    def clear(self) -> None:
+        self.first.clear()
+        self.second.clear()
+
+
+class NullCache:
+    """Cache backend that never stores anything."""
+
+    def get(self, kind: str, key: str) -> CacheEntry | None:
+        return None
+
+    def set(self, kind: str, key: str, value: str, source: str) -> None:
+        return None
+
+    def clear(self) -> None:
+        return None
+
+
+class MemoryCache:
+    """Thread-safe per-process LRU cache."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, str], CacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, kind: str, key: str) -> CacheEntry | None:
+        with self._lock:
+            entry = self._entries.get((kind, key))
+            if entry is not None:
+                self._entries.move_to_end((kind, key))
+            return entry
+
+    def set(self, kind: str, key: str, value: str, source: str) -> None:
+        with self._lock:
+            self._entries[(kind, key)] = CacheEntry(value, source)
+            self._entries.move_to_end((kind, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# File layout:
+#   header: magic, n_sets, ways, slot_size
+#   n_sets * (set tick u64 + ways * slot)
+#   slot: key hash u64 (0 = empty), last-use tick u64, key length u16,
+#         value length u16, source index u8, padding, key bytes, value bytes
+_MAGIC = b"CVSHM001"
+_HEADER = struct.Struct("<8sIII")
+_HEADER_SIZE = 64
+_SET_TICK = struct.Struct("<Q")
+_SLOT_HEADER = struct.Struct("<QQHHBxxx")
+
+
+class SharedMemoryCache:
+    """Cross-process cache backed by a memory-mapped file.
+
+    Keys are hashed with a stable hash onto one of ``n_sets`` sets of ``ways`` slots.
+    Each set is guarded by a POSIX byte-range lock so that workers only contend when
+    they touch the same set; within a process a thread lock serialises access since
+    record locks are held per process. When a set is full the least recently used
+    slot is evicted. Entries whose key and value do not fit in a slot are not cached.
+    """
+
+    def __init__(self, path: str, size_bytes: int, ways: int = 8, slot_size: int = 512) -> None:
+        if slot_size <= _SLOT_HEADER.size:
+            raise ValueError(f"slot_size must be larger than {_SLOT_HEADER.size} bytes")
+        self.path = path
+        self.ways = ways
+        self.slot_size = slot_size
+        self.set_size = _SET_TICK.size + ways * slot_size
+        self.n_sets = max(1, (size_bytes - _HEADER_SIZE) // self.set_size)
+        self._file_size = _HEADER_SIZE + self.n_sets * self.set_size
+        self._lock = threading.Lock()
+
+        self._fd = self._open()
+        try:
+            self._mm = mmap.mmap(self._fd, self._file_size)
+        except BaseException:
+            os.close(self._fd)
+            raise
+
+    def _open(self) -> int:
+        """Open the table at ``path``, creating or replacing it if its layout differs.
+
+        A table in use by other workers is never resized or cleared in place, since
+        their mappings would then see a different layout (or fault past the end of
+        a shrunk file). Instead a fresh table is built in a temporary file and
+        renamed over the path: workers that already mapped the old file keep using
+        it until they restart, and new workers attach to the new one.
+        """
+        expected = _HEADER.pack(_MAGIC, self.n_sets, self.ways, self.slot_size)
+        while True:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.lockf(fd, fcntl.LOCK_EX, _HEADER_SIZE, 0)
+                stat = os.fstat(fd)
+                if os.stat(self.path).st_ino != stat.st_ino:
+                    # Replaced by another worker while we waited for the lock.
+                    os.close(fd)
+                    continue
+                if stat.st_size == self._file_size and os.pread(fd, _HEADER.size, 0) == expected:
+                    fcntl.lockf(fd, fcntl.LOCK_UN, _HEADER_SIZE, 0)
+                    return fd
+                if stat.st_size == 0:
+                    # Freshly created: nobody can have it mapped yet.
+                    os.ftruncate(fd, self._file_size)
+                    os.pwrite(fd, expected, 0)
+                    fcntl.lockf(fd, fcntl.LOCK_UN, _HEADER_SIZE, 0)
+                    return fd
+                replacement = self._create_replacement(expected)
+            except BaseException:
+                os.close(fd)
+                raise
+            # Closing the old descriptor releases its lock; waiters then see the new inode.
+            os.close(fd)
+            return replacement
+
+    def _create_replacement(self, header: bytes) -> int:
+        """Build an empty table next to ``path`` and atomically rename it into place."""
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        fd = os.open(temporary, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            os.ftruncate(fd, self._file_size)
+            os.pwrite(fd, header, 0)
+            os.replace(temporary, self.path)
+        except BaseException:
+            os.close(fd)
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(temporary)
+            raise
+        return fd
+
+    @staticmethod
+    def _hash(kind: str, key: str) -> tuple[int, bytes]:
+        key_bytes = f"{kind}\x00{key}".encode()
+        digest = int.from_bytes(hashlib.blake2b(key_bytes, digest_size=8).digest(), "little")
+        return digest or 1, key_bytes
+
+    def _set_offset(self, key_hash: int) -> int:
+        return _HEADER_SIZE + (key_hash % self.n_sets) * self.set_size
+
+    def get(self, kind: str, key: str) -> CacheEntry | None:
+        key_hash, key_bytes = self._hash(kind, key)
+        offset = self._set_offset(key_hash)
+        mm = self._mm
+        with _SetLock(self, offset):
+            tick = _SET_TICK.unpack_from(mm, offset)[0] + 1
+            for way in range(self.ways):
+                slot = offset + _SET_TICK.size + way * self.slot_size
+                slot_hash, _, key_len, value_len, source = _SLOT_HEADER.unpack_from(mm, slot)
+                if slot_hash != key_hash:
+                    continue
+                data = slot + _SLOT_HEADER.size
+                if mm[data : data + key_len] != key_bytes:
+                    continue
+                value = mm[data + key_len : data + key_len + value_len].decode()
+                _SET_TICK.pack_into(mm, offset, tick)
+                _SET_TICK.pack_into(mm, slot + 8, tick)
+                return CacheEntry(value, SOURCES[source])
+        return None
+
+    def set(self, kind: str, key: str, value: str, source: str) -> None:
+        key_hash, key_bytes = self._hash(kind, key)
+        value_bytes = value.encode()
+        if _SLOT_HEADER.size + len(key_bytes) + len(value_bytes) > self.slot_size:
+            return
+        offset = self._set_offset(key_hash)
+        mm = self._mm
+        with _SetLock(self, offset):
+            tick = _SET_TICK.unpack_from(mm, offset)[0] + 1
+            # Prefer the slot already holding this key, then an empty slot, then the LRU one.
+            victim, victim_rank = 0, None
+            for way in range(self.ways):
+                slot = offset + _SET_TICK.size + way * self.slot_size
+                slot_hash, slot_tick, key_len, _, _ = _SLOT_HEADER.unpack_from(mm, slot)
+                data = slot + _SLOT_HEADER.size
+                if slot_hash == key_hash and mm[data : data + key_len] == key_bytes:
+                    victim = way
+                    break
+                rank = -1 if slot_hash == 0 else slot_tick
+                if victim_rank is None or rank < victim_rank:
+                    victim, victim_rank = way, rank
+
+            slot = offset + _SET_TICK.size + victim * self.slot_size
+            data = slot + _SLOT_HEADER.size
+            # Invalidate the slot first so a torn write is never read back as valid.
+            _SLOT_HEADER.pack_into(mm, slot, 0, 0, 0, 0, 0)
+            mm[data : data + len(key_bytes)] = key_bytes
+            mm[data + len(key_bytes) : data + len(key_bytes) + len(value_bytes)] = value_bytes
+            _SLOT_HEADER.pack_into(
+                mm,
+                slot,
+                key_hash,
+                tick,
+                len(key_bytes),
+                len(value_bytes),
+                SOURCES.index(source),
+            )
+            _SET_TICK.pack_into(mm, offset, tick)
+
+    def clear(self) -> None:
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, self._file_size - _HEADER_SIZE, _HEADER_SIZE)
+            try:
+                self._mm[_HEADER_SIZE:] = bytes(self._file_size - _HEADER_SIZE)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, self._file_size - _HEADER_SIZE, _HEADER_SIZE)
+
+    def close(self) -> None:
+        """Unmap the table and close the backing file."""
+        self._mm.close()
+        os.close(self._fd)
+
+
+class _SetLock:
+    """Context manager holding the thread lock and the byte-range lock of one set."""
+
+    def __init__(self, cache: SharedMemoryCache, offset: int) -> None:
+        self.cache = cache
+        self.offset = offset
+
+    def __enter__(self) -> None:
+        self.cache._lock.acquire()
+        try:
+            fcntl.lockf(self.cache._fd, fcntl.LOCK_EX, self.cache.set_size, self.offset)
+        except BaseException:
+            self.cache._lock.release()
+            raise
+
+    def __exit__(self, *exc_info: object) -> None:
+        try:
+            fcntl.lockf(self.cache._fd, fcntl.LOCK_UN, self.cache.set_size, self.offset)
+        finally:
+            self.cache._lock.release()
+
+
+def _first_tier() -> ConversionCache:
+    if settings.cache_backend == "shared":
+        return SharedMemoryCache(
+            settings.cache_shared_path,
+            settings.cache_shared_size_mb * 1024 * 1024,
+        )
+    if settings.cache_backend == "memory":
+        return MemoryCache(settings.cache_max_entries)
+    return NullCache()
+
+
+@cache
+def get_cache() -> ConversionCache:
+    """Return the process-wide cache configured by ``settings.cache_backend``."""
+    first = _first_tier()
+    if not settings.result_store_path:
+        return first
+
+    # Imported here because the store depends on this module for CacheEntry.
+    from app.services.store import ResultStore
+
+    store = ResultStore(
+        settings.result_store_path,
+        batch_size=settings.result_store_batch_size,
+        flush_interval=settings.result_store_flush_ms / 1000,
+        max_queued=settings.result_store_max_queued,
+    )
+    return TieredCache(first, store)
+
+
+def volatile_cache() -> ConversionCache:
+    """Return the process-wide cache without its persistent result store tier."""
+    current = get_cache()
+    return current.first if isinstance(current, TieredCache) else current
+
+
+def close_cache() -> None:
+    """Flush and release the process-wide cache (called on shutdown)."""
+    if get_cache.cache_info().currsize == 0:
+        return
+    current = get_cache()
+    for tier in (current.first, current.second) if isinstance(current, TieredCache) else (current,):
+        close = getattr(tier, "close", None)
+        if close is not None:
+            close()
+    get_cache.cache_clear()
@@ -0,0 +1,382 @@
+"""Structure depictions (2D drawings) rendered as SVG or PNG.
+
+Molecules are parsed into the backend's molecular graph, laid out with
+``app.services.layout`` and drawn in the usual skeletal style: carbons are
+implicit, heteroatoms are labelled with their hydrogens and charge, and
+aromatic rings get an inner circle. The drawing is built once as a list of
+primitives and then written out as SVG text or rasterized with Pillow.
+
+Rendered images are cached in memory by structure key, format and size. The
+structure key is a canonical hash of the molecular graph (see
+``app.services.molgraph.structure_key``), so different SMILES spellings of the
+same molecule share one cache entry (and one HTTP ETag).
+"""
+
+from __future__ import annotations
+
+import html
+import io
+import math
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import cache, lru_cache
+from typing import TYPE_CHECKING, Literal, NamedTuple
+
+from app.core.config import settings
+from app.core.lazy import lazy_import
+from app.services.layout import Point, compute_coords, smallest_rings
+from app.services.molgraph import MolGraph, parse_smiles, structure_key
+
+if TYPE_CHECKING:
+    from PIL import Image, ImageDraw, ImageFont
+else:
+    Image = lazy_import("PIL.Image")
+    ImageDraw = lazy_import("PIL.ImageDraw")
+    ImageFont = lazy_import("PIL.ImageFont")
+
+# Part of every ETag: bump when drawings change so cached images are refreshed.
+RENDERER_VERSION = "depict-1"
+
+ImageFormat = Literal["svg", "png"]
+MEDIA_TYPES: dict[ImageFormat, str] = {"svg": "image/svg+xml", "png": "image/png"}
+
+ATOM_COLORS = {
+    "N": "#3050f8",
+    "O": "#ff0d0d",
+    "S": "#c6a000",
+    "P": "#ff8000",
+    "F": "#1fa01f",
+    "Cl": "#1fa01f",
+    "Br": "#a62929",
+    "I": "#940094",
+    "B": "#e07070",
+}
+BOND_COLOR = "#000000"
+# PNGs are drawn at this multiple of the requested size and downsampled (anti-aliasing).
+_SUPERSAMPLE = 2
+
+
+class Depiction(NamedTuple):
+    """A rendered structure image."""
+
+    data: bytes
+    media_type: str
+
+
+class _Molecule(NamedTuple):
+    graph: MolGraph
+    rings: list[list[int]]
+    key: str
+
+
+@lru_cache(maxsize=4096)
+def _prepare(smiles: str) -> _Molecule:
+    graph = parse_smiles(smiles)
+    rings = smallest_rings(graph)
+    return _Molecule(graph, rings, structure_key(smiles))
+
+
+@dataclass(frozen=True)
+class _Line:
+    start: Point
+    end: Point
+    color: str
+    dashed: bool = False
+
+
+@dataclass(frozen=True)
+class _Circle:
+    center: Point
+    radius: float
+
+
+@dataclass(frozen=True)
+class _Label:
+    position: Point  # left end of the baseline-centred text
+    text: str
+    color: str
+
+
+@dataclass
+class _Drawing:
+    width: int
+    height: int
+    stroke: float
+    font_size: float
+    lines: list[_Line]
+    circles: list[_Circle]
+    labels: list[_Label]
+
+
+def _atom_label(graph: MolGraph, atom: int, hydrogens_left: bool) -> tuple[str, str, str] | None:
+    """
+    Return the text drawn for an atom, or None for implicit carbons.
+
+    The text is split into the part before the element symbol, the symbol and the
+    part after it, so that the symbol can be centred on the atom position.
+    """
+    a = graph.atoms[atom]
+    if a.symbol == "C" and not a.charge and not a.isotope and graph.adjacency[atom]:
+        return None
+    hydrogens = graph.hydrogen_count(atom)
+    hydrogen_text = ("H" + (str(hydrogens) if hydrogens > 1 else "")) if hydrogens else ""
+    charge_text = ""
+    if a.charge:
+        sign = "+" if a.charge > 0 else "-"
+        charge_text = (str(abs(a.charge)) if abs(a.charge) > 1 else "") + sign
+    symbol = (str(a.isotope) if a.isotope else "") + a.symbol
+    if hydrogens_left:
+        return hydrogen_text, symbol, charge_text
+    return "", symbol, hydrogen_text + charge_text
+
+
+def _ring_bonds(graph: MolGraph, ring: list[int]) -> list[int]:
+    """Return the indices of the bonds around a ring."""
+    return [
+        next(b for n, b in graph.adjacency[atom] if n == following)
+        for atom, following in zip(ring, ring[1:] + ring[:1], strict=True)
+    ]
+
+
+def _build_drawing(molecule: _Molecule, width: int, height: int) -> _Drawing:
+    """Lay out a molecule and convert it into drawing primitives in pixel coordinates."""
+    graph, rings = molecule.graph, molecule.rings
+    coords = compute_coords(graph)
+    xs, ys = [x for x, _ in coords], [y for _, y in coords]
+    span_x, span_y = max(xs) - min(xs), max(ys) - min(ys)
+    padding = 0.08 * min(width, height) + 4
+    scale = min(
+        (width - 2 * padding) / span_x if span_x > 0 else math.inf,
+        (height - 2 * padding) / span_y if span_y > 0 else math.inf,
+        0.3 * min(width, height),  # keep small molecules at a sensible bond length
+    )
+    mid_x, mid_y = (max(xs) + min(xs)) / 2, (max(ys) + min(ys)) / 2
+    points = [
+        (width / 2 + (x - mid_x) * scale, height / 2 - (y - mid_y) * scale) for x, y in coords
+    ]
+    font_size = min(max(scale * 0.5, 7.0), 40.0)
+    gap = scale * 0.16
+
+    labels = []
+    label_radius = [0.0] * len(graph.atoms)
+    char_width = font_size * 0.6  # rough average advance of a sans-serif glyph
+    for atom, (x, y) in enumerate(points):
+        # Hydrogens go on the side away from the bonds (H2N-R, R-NH2).
+        bonds_right = sum(points[n][0] - x for n in graph.neighbors(atom)) > 0
+        parts = _atom_label(graph, atom, hydrogens_left=bonds_right)
+        if parts is not None:
+            before, symbol, after = parts
+            left = x - char_width * (len(before) + len(symbol) / 2)
+            color = ATOM_COLORS.get(graph.atoms[atom].symbol, "#000000")
+            labels.append(_Label((left, y), before + symbol + after, color))
+            label_radius[atom] = font_size * 0.55
+
+    # Ring centre for each ring bond (smallest ring), to put inner double bond lines inside.
+    ring_centers: dict[int, Point] = {}
+    circles = []
+    circled: set[int] = set()
+    for ring in rings:
+        center = (
+            sum(points[a][0] for a in ring) / len(ring),
+            sum(points[a][1] for a in ring) / len(ring),
+        )
+        bond_indices = _ring_bonds(graph, ring)
+        for bond_index in bond_indices:
+            ring_centers.setdefault(bond_index, center)
+        if len(ring) <= 8 and all(graph.bonds[b].order == 1.5 for b in bond_indices):
+            apothem = min(math.dist(center, points[a]) for a in ring) * math.cos(
+                math.pi / len(ring)
+            )
+            circles.append(_Circle(center, apothem * 0.62))
+            circled.update(bond_indices)
+
+    lines = []
+    for index, bond in enumerate(graph.bonds):
+        (x1, y1), (x2, y2) = points[bond.begin], points[bond.end]
+        length = math.hypot(x2 - x1, y2 - y1)
+        if length <= label_radius[bond.begin] + label_radius[bond.end]:
+            continue
+        ux, uy = (x2 - x1) / length, (y2 - y1) / length
+        start = (x1 + ux * label_radius[bond.begin], y1 + uy * label_radius[bond.begin])
+        end = (x2 - ux * label_radius[bond.end], y2 - uy * label_radius[bond.end])
+        nx, ny = -uy, ux
+        ring_center = ring_centers.get(index)
+
+        if bond.order in (2.0, 1.5) and ring_center is not None:
+            # Ring bond: outer line on the ring, shorter inner line towards the centre.
+            side = 1 if nx * (ring_center[0] - x1) + ny * (ring_center[1] - y1) > 0 else -1
+            lines.append(_Line(start, end, BOND_COLOR))
+            if bond.order == 1.5 and index in circled:
+                continue
+            trim_start = max(0.15 * length, label_radius[bond.begin])
+            trim_end = max(0.15 * length, label_radius[bond.end])
+            lines.append(
+                _Line(
+                    (
+                        x1 + ux * trim_start + side * nx * gap,
+                        y1 + uy * trim_start + side * ny * gap,
+                    ),
+                    (x2 - ux * trim_end + side * nx * gap, y2 - uy * trim_end + side * ny * gap),
+                    BOND_COLOR,
+                    dashed=bond.order == 1.5,
+                )
+            )
+        elif bond.order >= 2.0:
+            offsets = [-gap / 2, gap / 2] if bond.order == 2.0 else [-gap, 0.0, gap]
+            for offset in offsets:
+                lines.append(
+                    _Line(
+                        (start[0] + nx * offset, start[1] + ny * offset),
+                        (end[0] + nx * offset, end[1] + ny * offset),
+                        BOND_COLOR,
+                    )
+                )
+        else:
+            lines.append(_Line(start, end, BOND_COLOR))
+
+    return _Drawing(width, height, max(1.0, scale * 0.06), font_size, lines, circles, labels)
+
+
+def _to_svg(drawing: _Drawing) -> bytes:
+    w, h = drawing.width, drawing.height
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{w}" height="{h}" viewBox="0 0 {w} {h}">',
+        '<rect width="100%" height="100%" fill="#ffffff"/>',
+        f'<g stroke-width="{drawing.stroke:.2f}" stroke-linecap="round" fill="none">',
+    ]
+    for line in drawing.lines:
+        dash = f' stroke-dasharray="{drawing.stroke * 3:.1f}"' if line.dashed else ""
+        parts.append(
+            f'<line x1="{line.start[0]:.1f}" y1="{line.start[1]:.1f}" '
+            f'x2="{line.end[0]:.1f}" y2="{line.end[1]:.1f}" stroke="{line.color}"{dash}/>'
+        )
+    for circle in drawing.circles:
+        parts.append(
+            f'<circle cx="{circle.center[0]:.1f}" cy="{circle.center[1]:.1f}" '
+            f'r="{circle.radius:.1f}" stroke="{BOND_COLOR}"/>'
+        )
+    parts.append("</g>")
+    if drawing.labels:
+        parts.append(
+            f'<g font-family="sans-serif" font-size="{drawing.font_size:.1f}" '
+            'dominant-baseline="central">'
+        )
+        for label in drawing.labels:
+            parts.append(
+                f'<text x="{label.position[0]:.1f}" y="{label.position[1]:.1f}" '
+                f'fill="{label.color}">{html.escape(label.text)}</text>'
+            )
+        parts.append("</g>")
+    parts.append("</svg>")
+    return "".join(parts).encode()
+
+
+def _to_png(drawing: _Drawing) -> bytes:
+    s = _SUPERSAMPLE
+    image = Image.new("RGB", (drawing.width * s, drawing.height * s), "white")
+    draw = ImageDraw.Draw(image)
+    stroke = max(1, round(drawing.stroke * s))
+
+    for line in drawing.lines:
+        (x1, y1), (x2, y2) = line.start, line.end
+        if not line.dashed:
+            draw.line([(x1 * s, y1 * s), (x2 * s, y2 * s)], fill=line.color, width=stroke)
+            continue
+        dashes = max(1, round(math.hypot(x2 - x1, y2 - y1) / (drawing.stroke * 6)))
+        for k in range(dashes):
+            t0, t1 = k / dashes, (k + 0.5) / dashes
+            draw.line(
+                [
+                    ((x1 + (x2 - x1) * t0) * s, (y1 + (y2 - y1) * t0) * s),
+                    ((x1 + (x2 - x1) * t1) * s, (y1 + (y2 - y1) * t1) * s),
+                ],
+                fill=line.color,
+                width=stroke,
+            )
+    for circle in drawing.circles:
+        (cx, cy), r = circle.center, circle.radius
+        draw.ellipse(
+            [((cx - r) * s, (cy - r) * s), ((cx + r) * s, (cy + r) * s)],
+            outline=BOND_COLOR,
+            width=stroke,
+        )
+    if drawing.labels:
+        font = ImageFont.load_default(size=drawing.font_size * s)
+        for label in drawing.labels:
+            x, y = label.position
+            draw.text((x * s, y * s), label.text, fill=label.color, font=font, anchor="lm")
+
+    image = image.resize((drawing.width, drawing.height), Image.Resampling.LANCZOS)
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class DepictionCache:
+    """Thread-safe LRU cache of rendered images, bounded by their total size."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries: OrderedDict[tuple[str, str, int, int], bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple[str, str, int, int]) -> bytes | None:
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+            return data
+
+    def set(self, key: tuple[str, str, int, int], data: bytes) -> None:
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.nbytes -= len(previous)
+            self._entries[key] = data
+            self.nbytes += len(data)
+            while self.nbytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self.nbytes -= len(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+@cache
+def get_depiction_cache() -> DepictionCache:
+    """Return the process-wide depiction cache."""
+    return DepictionCache(settings.depiction_cache_size_mb * 1024 * 1024)
+
+
+def depict(smiles: str, image_format: ImageFormat, width: int, height: int) -> Depiction:
+    """
+    Render the 2D structure of a molecule.
+
+    Args:
+        smiles: SMILES notation
+        image_format: "svg" or "png"
+        width: Image width in pixels
+        height: Image height in pixels
+
+    Returns:
+        The encoded image and its media type
+
+    Raises:
+        SmilesError: If the SMILES cannot be parsed
+    """
+    molecule = _prepare(smiles.strip())
+    cache_key = (molecule.key, image_format, width, height)
+    depiction_cache = get_depiction_cache()
+    data = depiction_cache.get(cache_key)
+    if data is None:
+        drawing = _build_drawing(molecule, width, height)
+        data = _to_svg(drawing) if image_format == "svg" else _to_png(drawing)
+        depiction_cache.set(cache_key, data)
+    return Depiction(data, MEDIA_TYPES[image_format])
@@ -0,0 +1,232 @@
+"""Tiered routing of conversions across engines.
+
+A conversion can be answered by several engines of increasing cost: a
+dictionary lookup, rule-based parsers, external tools and ML models. The
+``EngineRouter`` tries them cheapest first and returns the first answer,
+together with the ``source`` of the engine that produced it.
+
+Engines come in three groups, tried in this order:
+
+- ``inline`` engines (dictionary, rules) take microseconds and run directly in
+  the calling thread, in registration order.
+- Hedged engines (external tools, ML models) run in a thread pool. Each has a
+  latency ``budget``: if it has not answered within it, the next engine is
+  launched alongside it and the first answer wins. Their order is learned
+  online from the expected cost of an answer (EWMA latency divided by EWMA
+  success rate), so engines that are fast and usually succeed move forward.
+- ``fallback`` engines (approximate matches such as fuzzy lookup) only run when
+  no exact engine answered.
+
+Engine calls run in a copy of the caller's context, so request deadlines apply
+to them (see ``app.core.deadline``).
+"""
+
+import contextvars
+import threading
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Literal, NamedTuple
+
+import structlog
+
+from app.core.config import settings
+from app.core.deadline import DeadlineExceededError, check_deadline, current_deadline
+
+logger = structlog.get_logger()
+
+Source = Literal["demo", "ml", "tool"]
+
+
+class Conversion(NamedTuple):
+    """A conversion result and the engine that produced it."""
+
+    value: str
+    source: Source
+    engine: str
+
+
+@dataclass(frozen=True)
+class Engine:
+    """
+    One conversion engine.
+
+    Attributes:
+        name: Engine name, used in logs and statistics
+        source: Source reported for its results (demo/ml/tool)
+        convert: Function returning a result, or None if it has no answer
+        budget: Seconds to wait for an answer before hedging with the next engine
+        inline: Run in the calling thread (for engines taking microseconds)
+        fallback: Only run when no exact engine answered
+    """
+
+    name: str
+    source: Source
+    convert: Callable[[str], str | None]
+    budget: float = 0.1
+    inline: bool = False
+    fallback: bool = False
+
+
+class EngineStats:
+    """Exponentially weighted latency and success rate of an engine."""
+
+    def __init__(self, latency: float, alpha: float = 0.1) -> None:
+        self.alpha = alpha
+        self.latency = latency
+        self.success = 0.5
+        self.calls = 0
+        self.errors = 0
+
+    def record(self, latency: float, success: bool) -> None:
+        self.latency += self.alpha * (latency - self.latency)
+        self.success += self.alpha * (float(success) - self.success)
+        self.calls += 1
+
+    @property
+    def expected_cost(self) -> float:
+        """Expected seconds spent per successful answer."""
+        return self.latency / max(self.success, 0.01)
+
+
+class EngineRouter:
+    """Routes conversions through engine tiers (see module docstring)."""
+
+    def __init__(self, engines: Iterable[Engine] = ()) -> None:
+        self._engines: list[Engine] = []
+        self._stats: dict[str, EngineStats] = {}
+        self._lock = threading.Lock()
+        self._executor: ThreadPoolExecutor | None = None
+        for engine in engines:
+            self.register(engine)
+
+    def register(self, engine: Engine) -> None:
+        """Add an engine; its budget is the initial latency estimate."""
+        with self._lock:
+            if engine.name in self._stats:
+                raise ValueError(f"Engine {engine.name!r} is already registered")
+            self._engines.append(engine)
+            self._stats[engine.name] = EngineStats(engine.budget)
+
+    def _tiers(self) -> tuple[list[Engine], list[Engine], list[Engine]]:
+        """Return the inline, hedged and fallback engines, each in the order tried."""
+        with self._lock:
+            engines = list(self._engines)
+            costs = {name: stats.expected_cost for name, stats in self._stats.items()}
+        inline = [e for e in engines if e.inline and not e.fallback]
+        hedged = [e for e in engines if not e.inline and not e.fallback]
+        hedged.sort(key=lambda engine: costs[engine.name])
+        return inline, hedged, [e for e in engines if e.fallback]
+
+    def order(self) -> list[Engine]:
+        """Return the engines in the order they are tried."""
+        inline, hedged, fallback = self._tiers()
+        return inline + hedged + fallback
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        """Return the learned statistics of every engine."""
+        with self._lock:
+            return {
+                name: {
+                    "latency_ms": stats.latency * 1000,
+                    "success_rate": stats.success,
+                    "calls": stats.calls,
+                    "errors": stats.errors,
+                }
+                for name, stats in self._stats.items()
+            }
+
+    def _call(self, engine: Engine, query: str) -> str | None:
+        """Run one engine, recording its latency and outcome."""
+        started = time.perf_counter()
+        try:
+            result = engine.convert(query)
+        except DeadlineExceededError:
+            raise
+        except Exception as e:
+            logger.warning("engine_error", engine=engine.name, error=str(e))
+            result = None
+            with self._lock:
+                self._stats[engine.name].errors += 1
+        with self._lock:
+            self._stats[engine.name].record(time.perf_counter() - started, result is not None)
+        return result
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=settings.engine_max_workers, thread_name_prefix="engine"
+                )
+            return self._executor
+
+    def _hedge(self, engines: list[Engine], query: str) -> Conversion | None:
+        """Run engines in order, launching the next one when the last exceeds its budget."""
+        pending: dict[Future[str | None], Engine] = {}
+        queued = list(engines)
+        launched_at = 0.0
+        try:
+            while queued or pending:
+                if queued:
+                    engine = queued.pop(0)
+                    context = contextvars.copy_context()
+                    future = self._pool().submit(context.run, self._call, engine, query)
+                    pending[future] = engine
+                    launched_at = time.monotonic()
+
+                # Wait for the newest engine's budget, or for any answer once all are running.
+                timeout = None
+                if queued:
+                    timeout = max(0.0, engine.budget - (time.monotonic() - launched_at))
+                deadline = current_deadline()
+                remaining = None if deadline is None else deadline.remaining()
+                if remaining is not None:
+                    timeout = remaining if timeout is None else min(timeout, remaining)
+
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                check_deadline()
+                for future in done:
+                    answered = pending.pop(future)
+                    value = future.result()
+                    if value is not None:
+                        return Conversion(value, answered.source, answered.name)
+                    # A miss launches the next engine without waiting for the budget.
+        finally:
+            # Engines not started yet are dropped; running ones finish in the
+            # background and still update the statistics.
+            for future in pending:
+                future.cancel()
+        return None
+
+    def convert(self, query: str) -> Conversion | None:
+        """
+        Convert a query with the first engine tier that answers.
+
+        Args:
+            query: Normalized input (e.g. a lowercase chemical name)
+
+        Returns:
+            The first answer and its engine, or None if no engine answered
+
+        Raises:
+            DeadlineExceededError: If the request deadline passes while routing
+        """
+        inline, hedged, fallback = self._tiers()
+        for engine in inline:
+            check_deadline()
+            value = self._call(engine, query)
+            if value is not None:
+                return Conversion(value, engine.source, engine.name)
+
+        if hedged:
+            result = self._hedge(hedged, query)
+            if result is not None:
+                return result
+
+        for engine in fallback:
+            check_deadline()
+            value = self._call(engine, query)
+            if value is not None:
+                return Conversion(value, engine.source, engine.name)
+        return None
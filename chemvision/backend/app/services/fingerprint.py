@@ -0,0 +1,431 @@
+"""Molecular fingerprints and an in-memory Tanimoto similarity index.
+
+Fingerprints are Morgan-style (ECFP-like) circular fingerprints computed over the
+molecular graph from ``app.services.molgraph`` and folded into a fixed number of
+bits, stored as packed ``uint64`` words. The index scores fingerprints with
+vectorized AND + popcount over contiguous blocks, so a search is a handful of
+NumPy passes rather than a Python loop per molecule.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import json
+import os
+import struct
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from functools import cache
+from pathlib import Path
+from typing import IO, TYPE_CHECKING
+
+import structlog
+
+from app.core.config import settings
+from app.core.lazy import lazy_import
+from app.services.molgraph import (
+    STRUCTURE_KEY_VERSION,
+    MolGraph,
+    SmilesError,
+    parse_smiles,
+    structure_key,
+)
+
+if TYPE_CHECKING:
+    import numpy as np
+    from numpy.typing import NDArray
+else:
+    np = lazy_import("numpy")
+
+logger = structlog.get_logger()
+
+# Rows scanned per block; keeps temporaries in cache for large indexes.
+_BLOCK_ROWS = 1 << 16
+
+# Advisory lock serializing writers of an index directory against each other and readers.
+_LOCK_FILE = ".lock"
+
+
+def _hash(*values: int) -> int:
+    """Stable 63-bit hash of a tuple of integers."""
+    data = struct.pack(f"<{len(values)}q", *values)
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little") >> 1
+
+
+def _atom_invariants(graph: MolGraph) -> list[int]:
+    """Initial atom identifiers (element, degree, hydrogens, charge, aromaticity, ring)."""
+    ring_atoms = {a for b in graph.ring_bonds() for a in (graph.bonds[b].begin, graph.bonds[b].end)}
+    invariants = []
+    for index, atom in enumerate(graph.atoms):
+        element = int.from_bytes(atom.symbol.encode().ljust(2, b"\0"), "little")
+        invariants.append(
+            _hash(
+                element,
+                len(graph.adjacency[index]),
+                graph.hydrogen_count(index),
+                atom.charge,
+                int(atom.aromatic),
+                int(index in ring_atoms),
+            )
+        )
+    return invariants
+
+
+def morgan_fingerprint(smiles: str, n_bits: int = 1024, radius: int = 2) -> NDArray[np.uint64]:
+    """
+    Compute a folded circular fingerprint.
+
+    Args:
+        smiles: SMILES notation
+        n_bits: Fingerprint length in bits (multiple of 64)
+        radius: Number of neighbourhood expansion iterations
+
+    Returns:
+        Packed fingerprint of ``n_bits // 64`` words
+
+    Raises:
+        SmilesError: If the SMILES cannot be parsed
+    """
+    if n_bits <= 0 or n_bits % 64:
+        raise ValueError("n_bits must be a positive multiple of 64")
+
+    graph = parse_smiles(smiles)
+    identifiers = _atom_invariants(graph)
+    features = set(identifiers)
+    for _ in range(radius):
+        identifiers = [
+            _hash(
+                identifiers[atom],
+                *sorted(
+                    _hash(int(graph.bonds[bond].order * 2), identifiers[neighbor])
+                    for neighbor, bond in graph.adjacency[atom]
+                ),
+            )
+            for atom in range(len(graph.atoms))
+        ]
+        features.update(identifiers)
+
+    words = np.zeros(n_bits // 64, dtype=np.uint64)
+    for feature in features:
+        bit = feature % n_bits
+        words[bit >> 6] |= np.uint64(1 << (bit & 63))
+    return words
+
+
+def _popcount(fingerprints: NDArray[np.uint64]) -> NDArray[np.int32]:
+    """Return the number of set bits of each fingerprint (row)."""
+    counts: NDArray[np.int32] = np.bitwise_count(fingerprints).sum(axis=-1, dtype=np.int32)
+    return counts
+
+
+class _Bucket:
+    """Growable block of fingerprints that all have the same popcount."""
+
+    def __init__(self, fingerprints: NDArray[np.uint64], rows: NDArray[np.int64]) -> None:
+        self.fingerprints = fingerprints
+        self.rows = rows
+        self.size = len(rows)
+
+    def append(self, fingerprint: NDArray[np.uint64], row: int) -> None:
+        if self.size == len(self.rows):
+            # Grow geometrically; also turns a read-only memory map into a private copy.
+            capacity = max(64, 2 * self.size)
+            fingerprints = np.zeros((capacity, self.fingerprints.shape[1]), dtype=np.uint64)
+            fingerprints[: self.size] = self.fingerprints[: self.size]
+            rows = np.zeros(capacity, dtype=np.int64)
+            rows[: self.size] = self.rows[: self.size]
+            self.fingerprints, self.rows = fingerprints, rows
+        self.fingerprints[self.size] = fingerprint
+        self.rows[self.size] = row
+        self.size += 1
+
+
+@contextmanager
+def _directory_lock(path: Path, operation: int) -> Iterator[None]:
+    """Hold ``flock(operation)`` on an index directory's lock file."""
+    try:
+        fd = os.open(path / _LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+    except OSError:
+        # Read-only index volume: nobody can be replacing the files.
+        yield
+        return
+    try:
+        fcntl.flock(fd, operation)
+        yield
+    finally:
+        os.close(fd)
+
+
+def _replace(path: Path, write: Callable[[IO[bytes]], object]) -> None:
+    """Write a file next to ``path`` and atomically rename it into place."""
+    temporary = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(temporary, "wb") as file:
+            write(file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, path)
+    except BaseException:
+        temporary.unlink(missing_ok=True)
+        raise
+
+
+class FingerprintIndex:
+    """
+    Append-only in-memory index of packed fingerprints keyed by structure.
+
+    Molecules are deduplicated by canonical structure key, so different SMILES
+    spellings of one molecule are indexed once (under the first SMILES seen).
+
+    Fingerprints are partitioned by popcount. Since the Tanimoto similarity of
+    fingerprints with ``a`` and ``b`` bits set is at most ``min(a, b) / max(a, b)``,
+    a search visits partitions in order of that bound and stops as soon as no
+    remaining partition can beat the current k-th hit or the threshold, so only a
+    fraction of the index is scanned for typical queries.
+    """
+
+    def __init__(self, n_bits: int = 1024, radius: int = 2) -> None:
+        self.n_bits = n_bits
+        self.radius = radius
+        self._words = n_bits // 64
+        self._buckets: list[_Bucket | None] = [None] * (n_bits + 1)
+        self._smiles: list[str] = []
+        self._keys: list[str] = []
+        self._positions: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._smiles)
+
+    def __contains__(self, smiles: object) -> bool:
+        if not isinstance(smiles, str):
+            return False
+        try:
+            return structure_key(smiles) in self._positions
+        except SmilesError:
+            return False
+
+    def fingerprint(self, smiles: str) -> NDArray[np.uint64]:
+        """Compute a fingerprint with this index's parameters."""
+        return morgan_fingerprint(smiles, self.n_bits, self.radius)
+
+    def add(self, smiles: str) -> bool:
+        """
+        Add a molecule to the index.
+
+        Returns:
+            True if the molecule was added, False if it (in any spelling) was
+            already indexed
+
+        Raises:
+            SmilesError: If the SMILES cannot be parsed
+        """
+        smiles = smiles.strip()
+        key = structure_key(smiles)
+        if key in self._positions:
+            return False
+        return self._insert(smiles, key, self.fingerprint(smiles))
+
+    def _insert(self, smiles: str, key: str, fingerprint: NDArray[np.uint64]) -> bool:
+        """Append a molecule with a known key and fingerprint unless its key is indexed."""
+        count = int(_popcount(fingerprint))
+        with self._lock:
+            if key in self._positions:
+                return False
+            row = len(self._smiles)
+            bucket = self._buckets[count]
+            if bucket is None:
+                bucket = _Bucket(
+                    np.zeros((0, self._words), dtype=np.uint64), np.zeros(0, dtype=np.int64)
+                )
+                self._buckets[count] = bucket
+            # The SMILES must be visible before the bucket row that refers to it.
+            self._smiles.append(smiles)
+            self._keys.append(key)
+            self._positions[key] = row
+            bucket.append(fingerprint, row)
+        return True
+
+    def search(self, smiles: str, k: int = 10, threshold: float = 0.0) -> list[tuple[str, float]]:
+        """
+        Find the indexed molecules most similar to a query.
+
+        Args:
+            smiles: Query SMILES
+            k: Maximum number of hits
+            threshold: Minimum Tanimoto similarity of a hit
+
+        Returns:
+            (SMILES, Tanimoto similarity) pairs, most similar first
+
+        Raises:
+            SmilesError: If the query SMILES cannot be parsed
+        """
+        query = self.fingerprint(smiles)
+        query_count = int(_popcount(query))
+
+        counts = np.arange(self.n_bits + 1)
+        bounds = np.minimum(counts, query_count) / np.maximum(np.maximum(counts, query_count), 1)
+
+        top_scores = np.zeros(0, dtype=np.float32)
+        top_rows = np.zeros(0, dtype=np.int64)
+        for count in np.argsort(-bounds, kind="stable"):
+            bucket = self._buckets[count]
+            if bucket is None:
+                continue
+            bound = bounds[count]
+            if bound < threshold or (len(top_scores) == k and bound <= top_scores.min()):
+                break
+            size = bucket.size
+            fingerprints, rows = bucket.fingerprints, bucket.rows
+            union_base = count + query_count
+            for start in range(0, size, _BLOCK_ROWS):
+                stop = min(size, start + _BLOCK_ROWS)
+                common = _popcount(fingerprints[start:stop] & query)
+                scores = (common / np.maximum(union_base - common, 1)).astype(np.float32)
+                top_scores = np.concatenate((top_scores, scores))
+                top_rows = np.concatenate((top_rows, rows[start:stop]))
+                if len(top_scores) > k:
+                    keep = np.argpartition(top_scores, -k)[-k:]
+                    top_scores, top_rows = top_scores[keep], top_rows[keep]
+
+        order = np.argsort(-top_scores, kind="stable")
+        return [
+            (self._smiles[int(top_rows[i])], float(top_scores[i]))
+            for i in order
+            if top_scores[i] >= threshold
+        ]
+
+    def _entries(self) -> list[tuple[str, str, NDArray[np.uint64]]]:
+        """Return (SMILES, key, fingerprint) of every molecule, grouped by popcount."""
+        with self._lock:
+            return [
+                (self._smiles[row], self._keys[row], bucket.fingerprints[i])
+                for bucket in self._buckets
+                if bucket is not None
+                for i, row in enumerate(bucket.rows[: bucket.size].tolist())
+            ]
+
+    def save(self, directory: str | Path, merge: bool = False) -> None:
+        """
+        Write the index to a directory.
+
+        Fingerprints are written grouped by popcount (``fingerprints.npy``) with the
+        matching SMILES (``smiles.txt``), structure keys (``keys.txt``) and
+        partition sizes (``meta.json``).
+
+        Other processes may have the files memory-mapped, so they are never
+        rewritten in place: each is written to a temporary file and renamed over
+        the old one (existing mappings keep the old contents). An exclusive lock on
+        the directory lets one process write at a time, and :meth:`load` never sees
+        a mix of old and new files.
+
+        Args:
+            directory: Index directory
+            merge: Keep the molecules of an index already saved there (e.g. by
+                another worker process), read under the same lock
+        """
+        path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+        with _directory_lock(path, fcntl.LOCK_EX):
+            entries = self._entries()
+            if merge and (path / "meta.json").exists():
+                stored = self._read(path)
+                if (stored.n_bits, stored.radius) == (self.n_bits, self.radius):
+                    entries = stored._entries() + entries
+                else:
+                    logger.warning("similarity_index_parameters_changed", path=str(path))
+            merged = FingerprintIndex(self.n_bits, self.radius)
+            for smiles, key, fingerprint in entries:
+                merged._insert(smiles, key, fingerprint)
+            # Grouped by popcount, as load() expects.
+            saved = merged._entries()
+            fingerprints = np.zeros((len(saved), self._words), dtype=np.uint64)
+            for row, (_, _, fingerprint) in enumerate(saved):
+                fingerprints[row] = fingerprint
+            smiles_text = "".join(f"{smiles}\n" for smiles, _, _ in saved).encode()
+            keys_text = "".join(f"{key}\n" for _, key, _ in saved).encode()
+            meta = {
+                "n_bits": self.n_bits,
+                "radius": self.radius,
+                "partition_sizes": [0 if b is None else b.size for b in merged._buckets],
+                "structure_key_version": STRUCTURE_KEY_VERSION,
+            }
+
+            _replace(path / "fingerprints.npy", lambda file: np.save(file, fingerprints))
+            _replace(path / "smiles.txt", lambda file: file.write(smiles_text))
+            _replace(path / "keys.txt", lambda file: file.write(keys_text))
+            _replace(path / "meta.json", lambda file: file.write(json.dumps(meta).encode()))
+
+    @classmethod
+    def load(cls, directory: str | Path) -> FingerprintIndex:
+        """
+        Load an index written by :meth:`save`.
+
+        Fingerprints are memory-mapped read-only, so loading does not copy them and
+        pages are shared between worker processes through the page cache.
+        """
+        path = Path(directory)
+        with _directory_lock(path, fcntl.LOCK_SH):
+            return cls._read(path)
+
+    @classmethod
+    def _read(cls, path: Path) -> FingerprintIndex:
+        """Read an index directory; the caller holds its lock."""
+        meta = json.loads((path / "meta.json").read_text())
+        fingerprints = np.load(path / "fingerprints.npy", mmap_mode="r")
+        smiles = (path / "smiles.txt").read_text().splitlines()
+        keys_path = path / "keys.txt"
+        # Keys missing or computed by an older structure_key are recomputed.
+        keys = (
+            keys_path.read_text().splitlines()
+            if meta.get("structure_key_version") == STRUCTURE_KEY_VERSION and keys_path.exists()
+            else [structure_key(s) for s in smiles]
+        )
+        index = cls(n_bits=meta["n_bits"], radius=meta["radius"])
+        sizes = meta["partition_sizes"]
+        if (
+            fingerprints.shape != (len(smiles), index._words)
+            or sum(sizes) != len(smiles)
+            or len(keys) != len(smiles)
+        ):
+            raise ValueError(f"Fingerprint index at {path} is inconsistent")
+
+        offset = 0
+        for count, size in enumerate(sizes):
+            if size:
+                index._buckets[count] = _Bucket(
+                    fingerprints[offset : offset + size],
+                    np.arange(offset, offset + size, dtype=np.int64),
+                )
+                offset += size
+        index._smiles = smiles
+        index._keys = keys
+        index._positions = {key: i for i, key in enumerate(keys)}
+        return index
+
+
+@cache
+def get_index() -> FingerprintIndex:
+    """Return the process-wide similarity index (loaded from disk if configured)."""
+    path = settings.similarity_index_path
+    if path and (Path(path) / "meta.json").exists():
+        index = FingerprintIndex.load(path)
+        logger.info("similarity_index_loaded", path=path, size=len(index))
+        return index
+    return FingerprintIndex(settings.fingerprint_bits, settings.fingerprint_radius)
+
+
+def loaded_index() -> FingerprintIndex | None:
+    """Return the similarity index if it has been created, without creating it."""
+    return get_index() if get_index.cache_info().currsize else None
+
+
+def index_conversion(smiles: str) -> None:
+    """Add a conversion result to the similarity index, ignoring unparseable SMILES."""
+    try:
+        get_index().add(smiles)
+    except SmilesError as e:
+        logger.warning("similarity_index_skipped", smiles=smiles, error=str(e))
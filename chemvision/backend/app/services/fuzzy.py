@@ -0,0 +1,236 @@
+"""Approximate (edit-distance) lookup over a fixed vocabulary of names.
+
+The index is a pigeonhole partition index. Every term is cut into
+``2 * max_distance + 2`` segments, and each segment is stored as a 32-bit hash of
+(term length, segment number, text) next to the term id. With a 16-byte
+character-count signature per term this makes the index about 76 bytes per term
+regardless of term length, held in a few flat NumPy arrays.
+
+A single edit (insertion, deletion, substitution or adjacent transposition)
+changes at most two segments and shifts the others by at most one position.
+A term within distance ``d`` of a query therefore still has at least
+``segments - 2 * d`` of its segments in the query, at most ``d`` characters away
+from their original offset. A query probes those positions for every term length
+within ``d`` of its own and counts matched segments per term. The surviving
+candidates are pruned with the character-count (bag distance) lower bound and
+verified with a bounded Damerau-Levenshtein distance, most promising first.
+Chemical names share long prefixes, so unlike prefix-based schemes this keeps
+candidate lists short for large dictionaries.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable
+from functools import cache
+from typing import TYPE_CHECKING
+
+from app.core.lazy import lazy_import
+
+if TYPE_CHECKING:
+    import numpy as np
+    from numpy.typing import NDArray
+else:
+    np = lazy_import("numpy")
+
+
+_HASH_MASK = (1 << 32) - 1
+_BAG_BUCKETS = 16
+_SEPARATORS = re.compile(r"[\s\-_]+")
+
+
+def fold_name(name: str) -> str:
+    """Return the fuzzy lookup form of a name (lowercase, without spaces and hyphens)."""
+    return _SEPARATORS.sub("", name.strip().lower())
+
+
+def damerau_levenshtein(a: str, b: str, max_distance: int) -> int:
+    """
+    Optimal string alignment distance between two strings, bounded.
+
+    Only the diagonal band of width ``2 * max_distance + 1`` of the edit matrix is
+    computed, and the computation stops as soon as a row exceeds the bound.
+
+    Returns:
+        The distance, or ``max_distance + 1`` if it exceeds ``max_distance``
+    """
+    over = max_distance + 1
+    if abs(len(a) - len(b)) > max_distance:
+        return over
+    if a == b:
+        return 0
+    previous2: list[int] = []
+    previous = [j if j <= max_distance else over for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [over] * (len(b) + 1)
+        if i <= max_distance:
+            current[0] = i
+        row_min = current[0]
+        for j in range(max(1, i - max_distance), min(len(b), i + max_distance) + 1):
+            value = previous[j - 1] if a[i - 1] == b[j - 1] else previous[j - 1] + 1
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            if current[j - 1] + 1 < value:
+                value = current[j - 1] + 1
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = min(value, over)
+            if value < row_min:
+                row_min = value
+        if row_min > max_distance:
+            return over
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+@cache
+def _bounds(length: int, segments: int) -> list[tuple[int, int]]:
+    """Start and end offsets of the non-empty segments of a string."""
+    cuts = [i * length // segments for i in range(segments + 1)]
+    return [(cuts[i], cuts[i + 1]) for i in range(segments) if cuts[i + 1] > cuts[i]]
+
+
+def _hash(length: int, segment: int, text: str) -> int:
+    return hash((length, segment, text)) & _HASH_MASK
+
+
+def _bag(text: str) -> NDArray[np.int16]:
+    """Character counts folded into a few buckets."""
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32) % _BAG_BUCKETS
+    return np.bincount(codes, minlength=_BAG_BUCKETS).astype(np.int16)
+
+
+class FuzzyIndex:
+    """Partition index answering nearest-term queries by edit distance."""
+
+    def __init__(self, terms: Iterable[str], max_distance: int = 2) -> None:
+        self.max_distance = max_distance
+        self.segments = 2 * max_distance + 2
+        self.terms = list(dict.fromkeys(terms))
+        self._lengths = np.array([len(t) for t in self.terms], dtype=np.int32)
+        self._bags = np.zeros((len(self.terms), _BAG_BUCKETS), dtype=np.uint8)
+
+        hashes: list[int] = []
+        ids: list[int] = []
+        for term_id, term in enumerate(self.terms):
+            self._bags[term_id] = np.minimum(_bag(term), 255)
+            for segment, (start, end) in enumerate(_bounds(len(term), self.segments)):
+                hashes.append(_hash(len(term), segment, term[start:end]))
+                ids.append(term_id)
+        keys = np.array(hashes, dtype=np.uint32)
+        order = np.argsort(keys, kind="stable")
+        self._keys = keys[order]
+        self._ids = np.array(ids, dtype=np.uint32)[order]
+        self._by_length = np.argsort(self._lengths, kind="stable").astype(np.uint32)
+        self._sorted_lengths = self._lengths[self._by_length]
+        longest = int(self._lengths.max(initial=0)) + max_distance + 1
+        self._segment_counts = np.array(
+            [len(_bounds(n, self.segments)) for n in range(longest + 1)], dtype=np.int64
+        )
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the index arrays (excluding the term strings)."""
+        arrays = (
+            self._keys,
+            self._ids,
+            self._lengths,
+            self._by_length,
+            self._sorted_lengths,
+            self._bags,
+        )
+        return sum(a.nbytes for a in arrays)
+
+    def _candidates(self, query: str, limit: int) -> tuple[NDArray[np.uint32], NDArray[np.int64]]:
+        """
+        Return the ids of terms that may be within limit of the query, with the
+        number of their segments found in the query.
+        """
+        probes: list[int] = []
+        probe_segments: list[int] = []
+        exhaustive: list[NDArray[np.uint32]] = []
+        for length in range(max(1, len(query) - limit), len(query) + limit + 1):
+            bounds = _bounds(length, self.segments)
+            if len(bounds) <= 2 * limit:
+                # Too short to filter on segments: every term of this length qualifies.
+                start, stop = np.searchsorted(self._sorted_lengths, [length, length + 1])
+                exhaustive.append(self._by_length[start:stop])
+                continue
+            for segment, (start, end) in enumerate(bounds):
+                for offset in range(
+                    max(0, start - limit), min(len(query) - (end - start), start + limit) + 1
+                ):
+                    probes.append(_hash(length, segment, query[offset : offset + end - start]))
+                    probe_segments.append(segment)
+
+        ids = np.zeros(0, dtype=np.uint32)
+        counts = np.zeros(0, dtype=np.int64)
+        if probes:
+            keys = np.array(probes, dtype=np.uint32)
+            starts = np.searchsorted(self._keys, keys, side="left")
+            sizes = np.searchsorted(self._keys, keys, side="right") - starts
+            total = int(sizes.sum())
+            if total:
+                # Gather all matching rows at once: row r of probe p is starts[p] + r.
+                ends = np.cumsum(sizes)
+                rows = np.arange(total) + np.repeat(starts - (ends - sizes), sizes)
+                pairs = self._ids[rows].astype(np.int64) * self.segments + np.repeat(
+                    np.array(probe_segments), sizes
+                )
+                # A segment matched at several offsets counts once.
+                pairs.sort()
+                pairs = pairs[np.concatenate(([True], pairs[1:] != pairs[:-1]))]
+                matched = pairs // self.segments
+                first = np.flatnonzero(np.concatenate(([True], matched[1:] != matched[:-1])))
+                counts = np.diff(np.append(first, len(matched)))
+                matched = matched[first]
+                keep = counts >= self._segment_counts[self._lengths[matched]] - 2 * limit
+                ids, counts = matched[keep].astype(np.uint32), counts[keep]
+        if exhaustive:
+            # Not filtered, so no segment can be assumed missing.
+            extra = np.concatenate(exhaustive)
+            ids = np.concatenate((ids, extra))
+            counts = np.concatenate((counts, self._segment_counts[self._lengths[extra]]))
+        return ids, counts
+
+    def lookup(self, query: str, max_distance: int | None = None) -> tuple[str, int] | None:
+        """
+        Find the closest term to a query.
+
+        Args:
+            query: Query string (already folded like the indexed terms)
+            max_distance: Maximum edit distance (at most the index's max_distance)
+
+        Returns:
+            (term, distance) of the best match, ties broken by insertion order,
+            or None if no term is within max_distance
+        """
+        limit = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        if not self.terms or limit < 0 or not query:
+            return None
+
+        ids, counts = self._candidates(query, limit)
+        # Each edit removes at most two segments, and changes the character counts
+        # by at most one in each direction (bag distance).
+        missing = self._segment_counts[self._lengths[ids]] - counts
+        difference = self._bags[ids].astype(np.int16) - np.minimum(_bag(query), 255)
+        bag_distance = np.maximum(
+            np.clip(difference, 0, None).sum(axis=1), np.clip(-difference, 0, None).sum(axis=1)
+        )
+        lower_bounds = np.maximum((missing + 1) // 2, bag_distance)
+        keep = lower_bounds <= limit
+        ids, lower_bounds = ids[keep], lower_bounds[keep]
+
+        best: tuple[int, int] | None = None
+        for position in np.lexsort((ids, lower_bounds)):
+            if best is not None and lower_bounds[position] > best[0]:
+                break
+            term_id = int(ids[position])
+            distance = damerau_levenshtein(query, self.terms[term_id], limit)
+            if distance <= limit and (best is None or (distance, term_id) < best):
+                best = (distance, term_id)
+                limit = distance
+        return None if best is None else (self.terms[best[1]], best[0])
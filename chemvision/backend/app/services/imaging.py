@@ -0,0 +1,198 @@
+"""Image validation and decoding helpers shared by the OCSR pipeline."""
+
+from __future__ import annotations
+
+import io
+import mmap
+import struct
+from dataclasses import dataclass
+from typing import IO, TYPE_CHECKING, TypeAlias, cast
+
+from app.core.lazy import lazy_import
+
+if TYPE_CHECKING:
+    import numpy as np
+    from numpy.typing import NDArray
+    from PIL import Image
+else:
+    np = lazy_import("numpy")
+    Image = lazy_import("PIL.Image")
+
+
+# Encoded image: bytes from an upload, or a read-only mapping of a file on a
+# shared volume (see app.services.references), which is decoded without copying.
+ImageData: TypeAlias = bytes | mmap.mmap
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# PNG color type -> (color name, channels, allowed bit depths)
+_PNG_COLOR_TYPES = {
+    0: ("gray", 1, (1, 2, 4, 8, 16)),
+    2: ("rgb", 3, (8, 16)),
+    3: ("palette", 1, (1, 2, 4, 8)),
+    4: ("gray-alpha", 2, (8, 16)),
+    6: ("rgba", 4, (8, 16)),
+}
+_JPEG_COLORS = {1: "gray", 3: "ycbcr", 4: "cmyk"}
+# Start-of-frame markers (baseline, extended, progressive, lossless, arithmetic).
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+# Markers without a length field.
+_JPEG_STANDALONE = {0x01, *range(0xD0, 0xD8)}
+
+
+class ImageDecodeError(ValueError):
+    """Raised when image bytes cannot be decoded."""
+
+
+class ImageTooLargeError(ImageDecodeError):
+    """Raised when an image exceeds the configured size limits."""
+
+
+@dataclass(frozen=True)
+class ImageInfo:
+    """Image properties read from the file header."""
+
+    format: str
+    width: int
+    height: int
+    color: str
+    channels: int
+    bit_depth: int
+
+    @property
+    def pixels(self) -> int:
+        return self.width * self.height
+
+
+def _read_png_header(data: ImageData) -> ImageInfo:
+    # Signature, then the IHDR chunk: length, type, width, height, depth, color type.
+    if len(data) < 33 or data[12:16] != b"IHDR":
+        raise ImageDecodeError("Truncated or invalid PNG header")
+    width, height, bit_depth, color_type = struct.unpack(">IIBB", data[16:26])
+    if color_type not in _PNG_COLOR_TYPES:
+        raise ImageDecodeError(f"Invalid PNG color type {color_type}")
+    color, channels, depths = _PNG_COLOR_TYPES[color_type]
+    if bit_depth not in depths:
+        raise ImageDecodeError(f"Invalid PNG bit depth {bit_depth} for {color} images")
+    return ImageInfo("png", width, height, color, channels, bit_depth)
+
+
+def _read_jpeg_header(data: ImageData) -> ImageInfo:
+    position = 2
+    while position + 4 <= len(data):
+        if data[position] != 0xFF:
+            raise ImageDecodeError("Invalid JPEG marker")
+        marker = data[position + 1]
+        if marker == 0xFF:  # fill byte
+            position += 1
+            continue
+        if marker in _JPEG_STANDALONE:
+            position += 2
+            continue
+        (length,) = struct.unpack(">H", data[position + 2 : position + 4])
+        if marker in _JPEG_SOF:
+            if position + 10 > len(data):
+                break
+            bit_depth, height, width, components = struct.unpack(
+                ">BHHB", data[position + 4 : position + 10]
+            )
+            if components not in _JPEG_COLORS:
+                raise ImageDecodeError(f"Unsupported JPEG component count {components}")
+            return ImageInfo("jpeg", width, height, _JPEG_COLORS[components], components, bit_depth)
+        if marker == 0xDA or length < 2:  # scan data before any frame header
+            break
+        position += 2 + length
+    raise ImageDecodeError("Truncated or invalid JPEG header")
+
+
+def warmup() -> None:
+    """Import the decoding libraries and register Pillow's image plugins."""
+    Image.init()
+    np.zeros(0, dtype=np.uint8)
+
+
+def read_image_info(image_bytes: ImageData) -> ImageInfo:
+    """
+    Read dimensions, color type and bit depth from a PNG or JPEG header.
+
+    Only the first bytes of the file are parsed; no pixel data is decoded.
+
+    Args:
+        image_bytes: Raw image bytes
+
+    Returns:
+        Header information
+
+    Raises:
+        ImageDecodeError: If the bytes do not start with a valid PNG or JPEG header
+    """
+    if image_bytes[: len(PNG_SIGNATURE)] == PNG_SIGNATURE:
+        info = _read_png_header(image_bytes)
+    elif image_bytes[:2] == b"\xff\xd8":
+        info = _read_jpeg_header(image_bytes)
+    else:
+        raise ImageDecodeError("Not a PNG or JPEG image")
+    if info.width == 0 or info.height == 0:
+        raise ImageDecodeError("Image has no pixels")
+    return info
+
+
+def validate_image(image_bytes: ImageData, max_pixels: int, max_dimension: int) -> ImageInfo:
+    """
+    Check an image against size limits using only its header.
+
+    Raises:
+        ImageDecodeError: If the header is invalid
+        ImageTooLargeError: If the image has too many pixels or a side is too long
+    """
+    info = read_image_info(image_bytes)
+    if info.pixels > max_pixels or max(info.width, info.height) > max_dimension:
+        raise ImageTooLargeError(
+            f"Image of {info.width}x{info.height} pixels exceeds the limit of "
+            f"{max_pixels} pixels or {max_dimension} pixels per side"
+        )
+    return info
+
+
+def decode_grayscale(image_bytes: ImageData, max_side: int | None = None) -> NDArray[np.uint8]:
+    """
+    Decode PNG/JPEG bytes into an 8-bit grayscale array.
+
+    Transparent pixels are composited onto a white background so that
+    transparent depictions binarize the same way as opaque ones.
+
+    JPEGs larger than ``max_side`` are decoded at a reduced DCT scale (1/2, 1/4 or
+    1/8, the strongest reduction that keeps the long side at least ``max_side``),
+    so no full-resolution buffer is allocated. Other images are decoded at full size.
+
+    Args:
+        image_bytes: Raw image bytes (PNG or JPEG), or a mapping of an image file
+        max_side: Preferred maximum width/height of the decoded JPEG
+
+    Returns:
+        Array of shape (height, width) with values 0 (black) to 255 (white)
+
+    Raises:
+        ImageDecodeError: If the bytes are not a decodable image
+    """
+    if isinstance(image_bytes, mmap.mmap):
+        # Mappings are file-like: the decoder reads straight from the page cache.
+        image_bytes.seek(0)
+        source = cast(IO[bytes], image_bytes)
+    else:
+        source = io.BytesIO(image_bytes)
+    try:
+        with Image.open(source) as image:
+            if max_side is not None and image.format == "JPEG":
+                scale = max_side / max(image.size)
+                if scale < 1:
+                    image.draft("L", (int(image.width * scale), int(image.height * scale)))
+            if image.mode in ("RGBA", "LA", "P"):
+                rgba = image.convert("RGBA")
+                background = Image.new("RGBA", rgba.size, (255, 255, 255, 255))
+                return np.asarray(
+                    Image.alpha_composite(background, rgba).convert("L"), dtype=np.uint8
+                )
+            return np.asarray(image.convert("L"), dtype=np.uint8)
+    except (Image.UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        raise ImageDecodeError(f"Could not decode image: {e}") from e
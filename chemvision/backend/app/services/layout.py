@@ -0,0 +1,280 @@
+"""2D coordinates for molecular graphs.
+
+A compact, deterministic layout in the spirit of the classic depiction
+algorithms: rings are drawn as regular polygons, fused and spiro rings are
+attached to the rings already placed, and chains grow outwards from placed
+atoms in a zig-zag with substituents spread around the free side of each atom.
+Disconnected components are laid out side by side. Coordinates are in units of
+the bond length, with y pointing up.
+"""
+
+import math
+from collections import deque
+
+from app.core.deadline import check_deadline
+from app.services.molgraph import MolGraph
+
+Point = tuple[float, float]
+
+
+def smallest_rings(graph: MolGraph) -> list[list[int]]:
+    """
+    Return the smallest ring through each ring bond, without duplicates.
+
+    For ordinary (fused, spiro and bridged) ring systems this is the set of
+    rings a chemist would draw. Each ring is a list of atom indices in ring order.
+    """
+    rings: list[list[int]] = []
+    seen: set[frozenset[int]] = set()
+    for bond_index in sorted(graph.ring_bonds()):
+        bond = graph.bonds[bond_index]
+        # Shortest path between the bond's atoms that does not use the bond itself.
+        parents: dict[int, int] = {bond.begin: -1}
+        queue = deque([bond.begin])
+        while queue and bond.end not in parents:
+            atom = queue.popleft()
+            for neighbor, via in graph.adjacency[atom]:
+                if via != bond_index and neighbor not in parents:
+                    parents[neighbor] = atom
+                    queue.append(neighbor)
+        ring = [bond.end]
+        while parents[ring[-1]] != -1:
+            ring.append(parents[ring[-1]])
+        if frozenset(ring) not in seen:
+            seen.add(frozenset(ring))
+            rings.append(ring)
+    return sorted(rings, key=len)
+
+
+def _components(graph: MolGraph) -> list[list[int]]:
+    """Return the atoms of each connected component, in order of first atom."""
+    component = [-1] * len(graph.atoms)
+    components: list[list[int]] = []
+    for root in range(len(graph.atoms)):
+        if component[root] != -1:
+            continue
+        component[root] = len(components)
+        members = [root]
+        queue = deque([root])
+        while queue:
+            for neighbor in graph.neighbors(queue.popleft()):
+                if component[neighbor] == -1:
+                    component[neighbor] = len(components)
+                    members.append(neighbor)
+                    queue.append(neighbor)
+        components.append(members)
+    return components
+
+
+def _unit(x: float, y: float) -> Point:
+    length = math.hypot(x, y)
+    return (x / length, y / length) if length > 1e-9 else (0.0, 0.0)
+
+
+class _Layout:
+    """Incremental placement of the atoms of one molecule."""
+
+    def __init__(self, graph: MolGraph, rings: list[list[int]]) -> None:
+        self.graph = graph
+        self.coords: list[Point | None] = [None] * len(graph.atoms)
+        self.rings = rings
+        self.ring_atoms = {atom for ring in rings for atom in ring}
+        # Side (+1/-1) of the last turn of each chain atom, to keep chains zig-zag.
+        self.turns: dict[int, int] = {}
+
+    def placed(self, atom: int) -> Point:
+        point = self.coords[atom]
+        if point is None:
+            raise RuntimeError(f"Atom {atom} has not been placed")
+        return point
+
+    def _away_from_neighbors(self, atom: int) -> Point:
+        """Unit vector pointing away from the placed neighbours of an atom."""
+        x, y = self.placed(atom)
+        sx = sy = 0.0
+        for neighbor in self.graph.neighbors(atom):
+            point = self.coords[neighbor]
+            if point is not None:
+                ux, uy = _unit(point[0] - x, point[1] - y)
+                sx, sy = sx + ux, sy + uy
+        direction = _unit(-sx, -sy)
+        return direction if direction != (0.0, 0.0) else (0.0, 1.0)
+
+    def place_polygon(self, ring: list[int], center: Point, start_angle: float) -> list[int]:
+        """Place the unplaced atoms of a ring on a regular polygon."""
+        radius = 1 / (2 * math.sin(math.pi / len(ring)))
+        placed = []
+        for k, atom in enumerate(ring):
+            if self.coords[atom] is None:
+                angle = start_angle + 2 * math.pi * k / len(ring)
+                self.coords[atom] = (
+                    center[0] + radius * math.cos(angle),
+                    center[1] + radius * math.sin(angle),
+                )
+                placed.append(atom)
+        return placed
+
+    def _place_arc(self, first: int, last: int, atoms: list[int]) -> None:
+        """Place atoms between two placed ring atoms on a regular polygon built on them."""
+        (ax, ay), (bx, by) = self.placed(first), self.placed(last)
+        sides = len(atoms) + 2
+        chord = max(math.hypot(bx - ax, by - ay), 1e-3)
+        nx, ny = _unit(ay - by, bx - ax)
+        # The new ring goes on the side away from the atoms already bonded to the chord.
+        mx, my = (ax + bx) / 2, (ay + by) / 2
+        others = [
+            self.placed(n)
+            for atom in (first, last)
+            for n in self.graph.neighbors(atom)
+            if n not in (first, last) and self.coords[n] is not None
+        ]
+        if others:
+            cx = sum(p[0] for p in others) / len(others)
+            cy = sum(p[1] for p in others) / len(others)
+            if nx * (mx - cx) + ny * (my - cy) < 0:
+                nx, ny = -nx, -ny
+        offset = chord / (2 * math.tan(math.pi / sides))
+        center = (mx + nx * offset, my + ny * offset)
+        radius = chord / (2 * math.sin(math.pi / sides))
+        angle = math.atan2(ay - center[1], ax - center[0])
+        cross = (ax - center[0]) * (by - center[1]) - (ay - center[1]) * (bx - center[0])
+        # Walk from the first atom the long way round, away from the chord.
+        step = (-1 if cross > 0 else 1) * 2 * math.pi / sides
+        for k, atom in enumerate(atoms, start=1):
+            self.coords[atom] = (
+                center[0] + radius * math.cos(angle + k * step),
+                center[1] + radius * math.sin(angle + k * step),
+            )
+
+    def place_ring(self, ring: list[int]) -> list[int]:
+        """Place the unplaced atoms of a ring that shares atoms with placed ones."""
+        size = len(ring)
+        known = [self.coords[atom] is not None for atom in ring]
+        if sum(known) == 1:
+            # Spiro junction or ring attached through a substituent bond.
+            index = known.index(True)
+            atom = ring[index]
+            x, y = self.placed(atom)
+            dx, dy = self._away_from_neighbors(atom)
+            radius = 1 / (2 * math.sin(math.pi / size))
+            center = (x + dx * radius, y + dy * radius)
+            start = math.atan2(-dy, -dx) - 2 * math.pi * index / size
+            return self.place_polygon(ring, center, start)
+
+        # Fused or bridged: fill each run of unplaced atoms between placed ones.
+        placed: list[int] = []
+        start = known.index(True)
+        run: list[int] = []
+        for k in range(1, size + 1):
+            atom = ring[(start + k) % size]
+            if self.coords[atom] is None:
+                run.append(atom)
+            elif run:
+                self._place_arc(ring[(start + k - len(run) - 1) % size], atom, run)
+                placed.extend(run)
+                run = []
+        return placed
+
+    def _clearance(self, atom: int, angles: list[float]) -> float:
+        """Smallest distance from bonds at the given angles to other placed atoms."""
+        x, y = self.placed(atom)
+        others = [p for i, p in enumerate(self.coords) if p is not None and i != atom]
+        return min(
+            (
+                math.hypot(x + math.cos(angle) - px, y + math.sin(angle) - py)
+                for angle in angles
+                for px, py in others
+            ),
+            default=math.inf,
+        )
+
+    def place_neighbors(self, atom: int) -> list[int]:
+        """Place the unplaced neighbours of a placed atom (chain growth)."""
+        neighbors = self.graph.neighbors(atom)
+        free = [n for n in neighbors if self.coords[n] is None]
+        if not free:
+            return []
+        anchored = [n for n in neighbors if self.coords[n] is not None]
+        x, y = self.placed(atom)
+
+        if not anchored:
+            angles = [-math.pi / 6 + 2 * math.pi * i / len(free) for i in range(len(free))]
+        elif len(anchored) == 1:
+            px, py = self.placed(anchored[0])
+            back = math.atan2(py - y, px - x)
+            orders = [self.graph.bonds[b].order for _, b in self.graph.adjacency[atom]]
+            if len(free) == 1 and (3.0 in orders or orders.count(2.0) == 2):
+                angles = [back + math.pi]  # triple bonds and allenes are linear
+            elif len(free) == 1:
+                angles = [back + math.pi - self.turns.get(atom, 1) * math.pi / 3]
+            else:
+                angles = [back + 2 * math.pi * (i + 1) / (len(free) + 1) for i in range(len(free))]
+            # Flip to the mirror image when that keeps the new atoms clear of placed ones.
+            mirrored = [2 * back - angle for angle in angles]
+            if self._clearance(atom, mirrored) > max(self._clearance(atom, angles), 0.7):
+                angles = mirrored
+        else:
+            dx, dy = self._away_from_neighbors(atom)
+            middle = math.atan2(dy, dx)
+            angles = [middle + (i - (len(free) - 1) / 2) * math.pi / 3 for i in range(len(free))]
+
+        for neighbor, angle in zip(free, angles, strict=True):
+            self.coords[neighbor] = (x + math.cos(angle), y + math.sin(angle))
+            if len(anchored) == 1:
+                px, py = self.placed(anchored[0])
+                cross = (x - px) * math.sin(angle) - (y - py) * math.cos(angle)
+                self.turns[neighbor] = 1 if cross > 0 else -1
+            else:
+                self.turns[neighbor] = 1
+        return free
+
+    def layout_component(self, atoms: list[int]) -> None:
+        members = set(atoms)
+        pending = [ring for ring in self.rings if ring[0] in members]
+        root = atoms[0]
+        if pending:
+            # Start from the largest ring so the main ring system is drawn regularly.
+            first = max(pending, key=len)
+            root = first[0]
+            queue = deque(self.place_polygon(first, (0.0, 0.0), math.pi / 2))
+        else:
+            self.coords[root] = (0.0, 0.0)
+            queue = deque([root])
+
+        while True:
+            # Placing an atom scans the atoms already placed, so large molecules
+            # take a while: stop with the request.
+            check_deadline()
+            for ring in pending:
+                placed_atoms = sum(self.coords[atom] is not None for atom in ring)
+                if 0 < placed_atoms < len(ring):
+                    queue.extend(self.place_ring(ring))
+                    break
+            else:
+                if not queue:
+                    break
+                queue.extend(self.place_neighbors(queue.popleft()))
+
+
+def compute_coords(graph: MolGraph) -> list[Point]:
+    """
+    Compute 2D depiction coordinates for every atom of a molecular graph.
+
+    Args:
+        graph: Molecular graph (see ``app.services.molgraph.parse_smiles``)
+
+    Returns:
+        One (x, y) point per atom, in bond-length units
+    """
+    layout = _Layout(graph, smallest_rings(graph))
+    offset = 0.0
+    for atoms in _components(graph):
+        layout.layout_component(atoms)
+        xs = [layout.placed(atom)[0] for atom in atoms]
+        ys = [layout.placed(atom)[1] for atom in atoms]
+        dx, dy = offset - min(xs), -(min(ys) + max(ys)) / 2
+        for atom in atoms:
+            x, y = layout.placed(atom)
+            layout.coords[atom] = (x + dx, y + dy)
+        offset += max(xs) - min(xs) + 1.5
+    return [layout.placed(atom) for atom in range(len(graph.atoms))]
@@ -0,0 +1,502 @@
+"""Molecular graph built from SMILES.
+
+A small, dependency-free SMILES reader covering the organic subset, bracket atoms
+(isotope, chirality, hydrogen count, charge, atom class), bond symbols, branches,
+ring closures and disconnected components. Stereo markers are accepted but not
+interpreted. It is intended for fingerprints and depictions, not for full
+chemical validation.
+"""
+
+import hashlib
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+ORGANIC_SUBSET = {"B", "C", "N", "O", "P", "S", "F", "Cl", "Br", "I"}
+AROMATIC_SUBSET = {"b", "c", "n", "o", "p", "s"}
+DEFAULT_VALENCES = {
+    "B": (3,),
+    "C": (4,),
+    "N": (3, 5),
+    "O": (2,),
+    "P": (3, 5),
+    "S": (2, 4, 6),
+    "F": (1,),
+    "Cl": (1,),
+    "Br": (1,),
+    "I": (1,),
+}
+BOND_ORDERS = {"-": 1.0, "=": 2.0, "#": 3.0, "$": 4.0, ":": 1.5, "/": 1.0, "\\": 1.0}
+
+# Stored with persisted structure keys: bump whenever canonical_key changes.
+STRUCTURE_KEY_VERSION = 2
+
+# Canonical labelling gives up (and keys the graph in input order) after this many
+# atom relabellings, e.g. for hundreds of identical disconnected components.
+_CANONICAL_WORK_LIMIT = 200_000
+
+_TOKEN = re.compile(r"\[[^\]]*\]|Br|Cl|[BCNOPSFI]|[bcnops]|\*|[-=#$:/\\.]|\(|\)|%\d{2}|\d")
+_BRACKET = re.compile(
+    r"\[(?P<isotope>\d+)?(?P<symbol>[A-Z][a-z]?|[a-z][a-z]?|\*)(?P<chiral>@{1,2})?"
+    r"(?P<hcount>H\d*)?(?P<charge>[+-]+\d*)?(?::\d+)?\]"
+)
+
+
+class SmilesError(ValueError):
+    """Raised when a SMILES string cannot be parsed."""
+
+
+@dataclass
+class Atom:
+    """An atom of a molecular graph."""
+
+    symbol: str
+    aromatic: bool = False
+    charge: int = 0
+    isotope: int = 0
+    explicit_hydrogens: int | None = None
+
+
+@dataclass(frozen=True)
+class Bond:
+    """A bond between two atoms; aromatic bonds have order 1.5."""
+
+    begin: int
+    end: int
+    order: float
+
+
+@dataclass
+class MolGraph:
+    """Atoms, bonds and adjacency of a molecule."""
+
+    atoms: list[Atom] = field(default_factory=list)
+    bonds: list[Bond] = field(default_factory=list)
+    adjacency: list[list[tuple[int, int]]] = field(default_factory=list)
+
+    def add_atom(self, atom: Atom) -> int:
+        self.atoms.append(atom)
+        self.adjacency.append([])
+        return len(self.atoms) - 1
+
+    def add_bond(self, begin: int, end: int, order: float) -> None:
+        if begin == end or any(n == end for n, _ in self.adjacency[begin]):
+            raise SmilesError(f"Invalid bond between atoms {begin} and {end}")
+        self.bonds.append(Bond(begin, end, order))
+        index = len(self.bonds) - 1
+        self.adjacency[begin].append((end, index))
+        self.adjacency[end].append((begin, index))
+
+    def neighbors(self, atom: int) -> list[int]:
+        """Return the indices of the atoms bonded to an atom."""
+        return [n for n, _ in self.adjacency[atom]]
+
+    def hydrogen_count(self, atom: int) -> int:
+        """Return the number of hydrogens on an atom (explicit or implicit)."""
+        a = self.atoms[atom]
+        if a.explicit_hydrogens is not None:
+            return a.explicit_hydrogens
+        if a.symbol not in DEFAULT_VALENCES:
+            return 0
+        orders = [self.bonds[b].order for _, b in self.adjacency[atom]]
+        # Aromatic bonds count as single bonds plus one shared pi bond per atom,
+        # unless the atom's valence is already used up (pyrrole-type n, thiophene s).
+        used = sum(1.0 if o == 1.5 else o for o in orders)
+        for valence in DEFAULT_VALENCES[a.symbol]:
+            if a.aromatic and valence == used:
+                return 0
+            if valence >= used + a.aromatic:
+                return int(valence - used - a.aromatic)
+        return 0
+
+    def ring_bonds(self) -> set[int]:
+        """Return the indices of bonds that lie on at least one ring (non-bridges)."""
+        n = len(self.atoms)
+        order = [-1] * n
+        low = [0] * n
+        bridges: set[int] = set()
+        counter = 0
+        for root in range(n):
+            if order[root] != -1:
+                continue
+            order[root] = low[root] = counter
+            counter += 1
+            stack = [(root, -1, iter(self.adjacency[root]))]
+            while stack:
+                atom, via, edges = stack[-1]
+                for neighbor, bond in edges:
+                    if bond == via:
+                        continue
+                    if order[neighbor] == -1:
+                        order[neighbor] = low[neighbor] = counter
+                        counter += 1
+                        stack.append((neighbor, bond, iter(self.adjacency[neighbor])))
+                        break
+                    low[atom] = min(low[atom], order[neighbor])
+                else:
+                    stack.pop()
+                    if stack:
+                        parent = stack[-1][0]
+                        low[parent] = min(low[parent], low[atom])
+                        if low[atom] > order[parent]:
+                            bridges.add(via)
+        return set(range(len(self.bonds))) - bridges
+
+
+def _parse_bracket(token: str) -> Atom:
+    match = _BRACKET.fullmatch(token)
+    if match is None:
+        raise SmilesError(f"Invalid bracket atom {token!r}")
+    symbol = match["symbol"]
+    aromatic = symbol.islower() and symbol != "*"
+    if aromatic:
+        symbol = symbol.capitalize()
+    hcount = match["hcount"]
+    hydrogens = 0 if hcount is None else int(hcount[1:] or 1)
+    charge = 0
+    if match["charge"]:
+        text = match["charge"]
+        sign = 1 if text[0] == "+" else -1
+        digits = text.lstrip("+-")
+        charge = sign * (int(digits) if digits else len(text))
+    return Atom(
+        symbol=symbol,
+        aromatic=aromatic,
+        charge=charge,
+        isotope=int(match["isotope"] or 0),
+        explicit_hydrogens=hydrogens,
+    )
+
+
+def parse_smiles(smiles: str) -> MolGraph:
+    """
+    Parse a SMILES string into a molecular graph.
+
+    Args:
+        smiles: SMILES notation
+
+    Returns:
+        The molecular graph
+
+    Raises:
+        SmilesError: If the string is not valid SMILES
+    """
+    text = smiles.strip()
+    if not text:
+        raise SmilesError("Empty SMILES")
+
+    graph = MolGraph()
+    position = 0
+    previous: int | None = None
+    pending_bond: str | None = None
+    branches: list[int | None] = []
+    rings: dict[str, tuple[int, str | None]] = {}
+
+    for match in _TOKEN.finditer(text):
+        if match.start() != position:
+            raise SmilesError(f"Unexpected character at position {position}: {text[position]!r}")
+        position = match.end()
+        lexeme = match.group()
+
+        if (
+            lexeme.startswith("[")
+            or lexeme in ORGANIC_SUBSET
+            or lexeme in AROMATIC_SUBSET
+            or lexeme == "*"
+        ):
+            if lexeme.startswith("["):
+                atom = _parse_bracket(lexeme)
+            elif lexeme in AROMATIC_SUBSET:
+                atom = Atom(symbol=lexeme.upper(), aromatic=True)
+            else:
+                atom = Atom(symbol=lexeme)
+            index = graph.add_atom(atom)
+            if previous is not None:
+                graph.add_bond(previous, index, _bond_order(graph, previous, index, pending_bond))
+            previous, pending_bond = index, None
+        elif lexeme in BOND_ORDERS:
+            if previous is None or pending_bond is not None:
+                raise SmilesError(f"Misplaced bond {lexeme!r} at position {match.start()}")
+            pending_bond = lexeme
+        elif lexeme == ".":
+            if previous is None or pending_bond is not None:
+                raise SmilesError(f"Misplaced '.' at position {match.start()}")
+            previous = None
+        elif lexeme == "(":
+            if previous is None:
+                raise SmilesError(f"Branch without atom at position {match.start()}")
+            branches.append(previous)
+        elif lexeme == ")":
+            if not branches or pending_bond is not None:
+                raise SmilesError(f"Unbalanced ')' at position {match.start()}")
+            if previous is None:
+                raise SmilesError(f"Empty component at position {match.start()}")
+            previous = branches.pop()
+        else:  # ring closure digit or %nn
+            if previous is None:
+                raise SmilesError(f"Ring closure without atom at position {match.start()}")
+            label = lexeme.lstrip("%")
+            if label in rings:
+                other, other_bond = rings.pop(label)
+                bond = pending_bond or other_bond
+                graph.add_bond(other, previous, _bond_order(graph, other, previous, bond))
+            else:
+                rings[label] = (previous, pending_bond)
+            pending_bond = None
+
+    if position != len(text):
+        raise SmilesError(f"Unexpected character at position {position}: {text[position]!r}")
+    if branches:
+        raise SmilesError("Unbalanced '('")
+    if rings:
+        raise SmilesError(f"Unclosed ring bond(s): {', '.join(sorted(rings))}")
+    if pending_bond is not None:
+        raise SmilesError("SMILES ends with a bond")
+    if previous is None or not graph.atoms:
+        raise SmilesError("SMILES ends with '.'")
+
+    # An unmarked bond between aromatic atoms is only aromatic inside a ring
+    # (e.g. the bond joining the two rings of c1ccccc1c1ccccc1 is single).
+    ring_bonds = graph.ring_bonds()
+    for index, aromatic_bond in enumerate(graph.bonds):
+        if aromatic_bond.order == 1.5 and index not in ring_bonds:
+            graph.bonds[index] = Bond(aromatic_bond.begin, aromatic_bond.end, 1.0)
+    return graph
+
+
+def _bond_order(graph: MolGraph, begin: int, end: int, symbol: str | None) -> float:
+    if symbol is not None:
+        return BOND_ORDERS[symbol]
+    if graph.atoms[begin].aromatic and graph.atoms[end].aromatic:
+        return 1.5
+    return 1.0
+
+
+class _SearchLimitError(Exception):
+    """Raised when canonical labelling exceeds its work limit."""
+
+
+def _refine(
+    neighbors: list[list[tuple[float, int]]], labels: list[int], budget: list[int]
+) -> list[int]:
+    """
+    Refine atom classes by the classes of their neighbours until they are stable.
+
+    Labels are ranks of sorted signatures, so they depend only on the structure
+    and not on atom order. Each relabelled atom uses up one unit of ``budget``.
+    """
+    classes = len(set(labels))
+    while True:
+        budget[0] -= len(labels)
+        if budget[0] < 0:
+            raise _SearchLimitError
+        signatures = [
+            (labels[atom], tuple(sorted((order, labels[n]) for order, n in bonded)))
+            for atom, bonded in enumerate(neighbors)
+        ]
+        ranks = {signature: rank for rank, signature in enumerate(sorted(set(signatures)))}
+        labels = [ranks[signature] for signature in signatures]
+        if len(ranks) == classes:
+            return labels
+        classes = len(ranks)
+
+
+def _peel(
+    neighbors: list[list[tuple[float, int]]], atoms: list[tuple[object, ...]]
+) -> tuple[list[int], list[tuple[object, ...]], tuple[object, ...]]:
+    """
+    Fold terminal atoms, round by round, into the label of the atom they hang from.
+
+    Swapping equal substituents (the methyls of a tert-butyl group, identical
+    side chains) is then no longer a symmetry the search has to try out. Rounds
+    stop at the ring system, or at the one or two central atoms of a tree, so
+    what remains does not depend on atom order. A folded atom is named by its
+    round and the rank of its label within the round.
+
+    Returns:
+        The remaining atoms, the labels of all atoms, and the label of each name
+    """
+    remaining = set(range(len(atoms)))
+    degree = [len(bonded) for bonded in neighbors]
+    folded: list[list[tuple[float, tuple[int, int]]]] = [[] for _ in atoms]
+    names: dict[tuple[object, ...], tuple[int, int]] = {}
+    leaves = [atom for atom in remaining if degree[atom] == 1]
+    peeled = 0
+    while len(remaining) > 2 and leaves:
+        labels = {leaf: (atoms[leaf], tuple(sorted(folded[leaf]))) for leaf in leaves}
+        for rank, label in enumerate(sorted(set(labels.values()))):
+            names[label] = (peeled, rank)
+        peeled += 1
+        following = []
+        for leaf in leaves:
+            remaining.discard(leaf)
+            order, parent = next((o, n) for o, n in neighbors[leaf] if n in remaining)
+            folded[parent].append((order, names[labels[leaf]]))
+            degree[parent] -= 1
+            if degree[parent] == 1:
+                following.append(parent)
+        leaves = following
+    return (
+        sorted(remaining),
+        [(atom, tuple(sorted(branches))) for atom, branches in zip(atoms, folded, strict=True)],
+        tuple(sorted((name, label) for label, name in names.items())),
+    )
+
+
+def _target_cell(classes: list[int]) -> list[int] | None:
+    """Return the smallest class of more than one atom (the next to split), if any."""
+    cells: dict[int, list[int]] = {}
+    for atom, label in enumerate(classes):
+        cells.setdefault(label, []).append(atom)
+    return min(
+        (cell for cell in cells.values() if len(cell) > 1),
+        key=lambda cell: (len(cell), classes[cell[0]]),
+        default=None,
+    )
+
+
+def _individualize(classes: list[int], chosen: int) -> list[int]:
+    """Split an atom off its class, sorting it before the other atoms of the class."""
+    return [2 * label + (atom != chosen) for atom, label in enumerate(classes)]
+
+
+def _canonical_form(graph: MolGraph, members: list[int], budget: list[int]) -> tuple[object, ...]:
+    """Return the smallest encoding of a connected component over its canonical orders."""
+    local = {atom: index for index, atom in enumerate(members)}
+    bonded = [
+        [(graph.bonds[b].order, local[n]) for n, b in graph.adjacency[atom]] for atom in members
+    ]
+    core, labels, names = _peel(
+        bonded,
+        [
+            (a.symbol, a.aromatic, a.charge, a.isotope, graph.hydrogen_count(atom))
+            for atom in members
+            for a in (graph.atoms[atom],)
+        ],
+    )
+    position = {atom: index for index, atom in enumerate(core)}
+    atoms = [labels[atom] for atom in core]
+    neighbors = [[(o, position[n]) for o, n in bonded[atom] if n in position] for atom in core]
+    bonds = [(i, n, order) for i, near in enumerate(neighbors) for order, n in near if i < n]
+
+    best: tuple[object, ...] | None = None
+    best_classes: list[int] = []
+    # Orbits of the symmetries found so far (union-find over atoms).
+    orbit = list(range(len(atoms)))
+
+    def find(atom: int) -> int:
+        while orbit[atom] != atom:
+            orbit[atom] = orbit[orbit[atom]]
+            atom = orbit[atom]
+        return atom
+
+    def leaf(classes: list[int]) -> None:
+        nonlocal best, best_classes
+        # Discrete: each class is the atom's position in this order.
+        order = sorted(range(len(atoms)), key=classes.__getitem__)
+        form = (
+            tuple(atoms[atom] for atom in order),
+            tuple(sorted((*sorted((classes[a], classes[b])), o) for a, b, o in bonds)),
+        )
+        if best is None or form < best:
+            best, best_classes = form, classes
+        elif form == best:
+            # Both orders give the same encoding, so mapping one onto the other
+            # is a symmetry of the molecule.
+            at = {label: atom for atom, label in enumerate(best_classes)}
+            for atom, label in enumerate(classes):
+                orbit[find(atom)] = find(at[label])
+
+    def explore(classes: list[int]) -> None:
+        pending = [classes]
+        while pending:
+            classes = _refine(neighbors, pending.pop(), budget)
+            target = _target_cell(classes)
+            if target is None:
+                leaf(classes)
+            else:
+                pending.extend(_individualize(classes, chosen) for chosen in reversed(target))
+
+    ranks = {atom: rank for rank, atom in enumerate(sorted(set(atoms)))}
+    root = _refine(neighbors, [ranks[atom] for atom in atoms], budget)
+    target = _target_cell(root)
+    if target is None:
+        leaf(root)
+    tried: list[int] = []
+    for chosen in target or []:
+        # Symmetric first choices lead to the same encodings: try one per orbit.
+        if all(find(chosen) != find(other) for other in tried):
+            tried.append(chosen)
+            explore(_individualize(root, chosen))
+    if best is None:
+        raise _SearchLimitError
+    return names, best
+
+
+def _components(graph: MolGraph) -> list[list[int]]:
+    """Return the atoms of each connected component."""
+    seen: set[int] = set()
+    components = []
+    for root in range(len(graph.atoms)):
+        if root in seen:
+            continue
+        seen.add(root)
+        members, index = [root], 0
+        while index < len(members):
+            for neighbor in graph.neighbors(members[index]):
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    members.append(neighbor)
+            index += 1
+        components.append(members)
+    return components
+
+
+def canonical_key(graph: MolGraph) -> str:
+    """
+    Return a key that identifies a molecular graph independently of atom order.
+
+    The atoms of each component are ordered by individualization-refinement:
+    classes are refined from neighbour classes, and where symmetric atoms remain,
+    each of them is tried in turn as the next one in order. The key hashes the
+    sorted smallest encodings (atoms and bonds by position) of the components,
+    so two graphs share a key only if they are isomorphic. If the search grows
+    too large, the key encodes the graph in input order instead: it then still
+    identifies the molecule, but other spellings of it get different keys.
+    """
+    form: tuple[object, ...]
+    try:
+        budget = [_CANONICAL_WORK_LIMIT]
+        form = (
+            "canonical",
+            tuple(
+                sorted(_canonical_form(graph, members, budget) for members in _components(graph))
+            ),
+        )
+    except _SearchLimitError:
+        form = (
+            "input order",
+            tuple(
+                (a.symbol, a.aromatic, a.charge, a.isotope, graph.hydrogen_count(i))
+                for i, a in enumerate(graph.atoms)
+            ),
+            tuple((b.begin, b.end, b.order) for b in graph.bonds),
+        )
+    return hashlib.sha256(repr(form).encode()).hexdigest()[:32]
+
+
+@lru_cache(maxsize=4096)
+def _structure_key(smiles: str) -> str:
+    return canonical_key(parse_smiles(smiles))
+
+
+def structure_key(smiles: str) -> str:
+    """
+    Return the canonical structure key of a SMILES string.
+
+    Different spellings of a molecule share one key (see :func:`canonical_key`).
+
+    Raises:
+        SmilesError: If the SMILES cannot be parsed
+    """
+    return _structure_key(smiles.strip())
@@ -1,5 +1,19 @@
 """Chemical naming service for IUPAC <-> SMILES conversion."""
 
+from functools import cache
+from typing import cast
+
+from app.core.config import settings
+from app.core.deadline import check_deadline
+from app.services.cache import get_cache, volatile_cache
+from app.services.engines import Conversion, Engine, EngineRouter, Source
+from app.services.fuzzy import FuzzyIndex, fold_name
+from app.services.nomenclature import alkane_to_smiles
+
+# Bumped whenever a change to the engines can change a conversion result;
+# part of the HTTP ETag of cacheable conversions.
+ENGINE_VERSION = "demo-1.2"
+
 # Phase 1: Single demo mapping for testing
 DEMO_MAPPINGS = {
     "isopentane": "CC(C)CC",
@@ -7,12 +21,113 @@ DEMO_MAPPINGS = {
 }
 
 
+def normalize_name(name: str) -> str:
+    """Return the lookup form of a name (trimmed, lowercase)."""
+    return name.strip().lower()
+
+
+def normalize_smiles(smiles: str) -> str:
+    """Return the lookup form of a SMILES string (trimmed)."""
+    return smiles.strip()
+
+
+@cache
+def _fuzzy_index() -> tuple[FuzzyIndex, dict[str, str]]:
+    """Fuzzy index over the folded known names, with the folded -> known name map."""
+    folded = {fold_name(known): known for known in DEMO_MAPPINGS}
+    return FuzzyIndex(folded, max_distance=settings.fuzzy_max_distance), folded
+
+
+def warmup() -> None:
+    """Build the fuzzy name index."""
+    _fuzzy_index()
+
+
+def fuzzy_match(name: str) -> tuple[str, int] | None:
+    """
+    Find the known name closest to a misspelled or oddly punctuated name.
+
+    Spaces, hyphens and case are ignored. The allowed edit distance grows with
+    the name length (none below 5 characters, at most 1 below 10, then
+    ``fuzzy_max_distance``) so that short names do not match unrelated ones.
+
+    Args:
+        name: Chemical name
+
+    Returns:
+        (known name, edit distance) of the best match, or None
+    """
+    query = fold_name(name)
+    limit = settings.fuzzy_max_distance
+    max_distance = 0 if len(query) < 5 else min(1, limit) if len(query) < 10 else limit
+    index, folded = _fuzzy_index()
+    match = index.lookup(query, max_distance)
+    return None if match is None else (folded[match[0]], match[1])
+
+
+def _fuzzy_to_smiles(name: str) -> str | None:
+    match = fuzzy_match(name)
+    return None if match is None else DEMO_MAPPINGS[match[0]]
+
+
+@cache
+def name_router() -> EngineRouter:
+    """
+    Return the engine router for name -> SMILES conversion.
+
+    Tiers: exact dictionary lookup, the rule-based alkane parser, then any
+    registered external tools or ML models, and finally fuzzy matching against
+    the dictionary. Further engines are added with ``name_router().register``.
+    """
+    return EngineRouter(
+        [
+            Engine("dictionary", "demo", DEMO_MAPPINGS.get, inline=True),
+            Engine("rules", "tool", alkane_to_smiles, inline=True),
+            Engine("fuzzy", "demo", _fuzzy_to_smiles, inline=True, fallback=True),
+        ]
+    )
+
+
+def convert_name(name: str, persist: bool = True) -> Conversion | None:
+    """
+    Convert IUPAC chemical name to SMILES notation, reporting the engine used.
+
+    Phase 1: Dictionary of demo mappings and rule-based alkane names.
+    Phase 2: Will register OPSIN or Python-based IUPAC parser as a further tier.
+
+    Results are looked up in and stored to the conversion cache together with
+    their source; cache hits report the engine ``cache``.
+
+    Args:
+        name: IUPAC chemical name (case-insensitive)
+        persist: Also store the result in the persistent result store (previews
+            of partly typed names only go to the in-memory cache)
+
+    Returns:
+        The SMILES and its source if conversion successful, None otherwise
+    """
+    check_deadline()
+    name_normalized = normalize_name(name)
+
+    cache = get_cache()
+    cached = cache.get("name", name_normalized)
+    if cached is not None:
+        return Conversion(cached.value, cast(Source, cached.source), "cache")
+
+    result = name_router().convert(name_normalized)
+    if result is not None:
+        target = cache if persist else volatile_cache()
+        target.set("name", name_normalized, result.value, result.source)
+    return result
+
+
 def name_to_smiles(name: str) -> str | None:
     """
     Convert IUPAC chemical name to SMILES notation.
 
-    Phase 1: Returns SMILES only for demo mappings, None otherwise.
-    Phase 2: Will integrate OPSIN or Python-based IUPAC parser.
+    Names without an exact match fall back to the closest known name within a
+    small edit distance (see ``fuzzy_match``). See ``convert_name`` for the
+    engine tiers.
 
     Args:
         name: IUPAC chemical name (case-insensitive)
@@ -20,11 +135,32 @@ def name_to_smiles(name: str) -> str | None:
     Returns:
         SMILES string if conversion successful, None otherwise
     """
-    name_normalized = name.strip().lower()
+    result = convert_name(name)
+    return None if result is None else result.value
+
+
+def convert_smiles(smiles: str) -> Conversion | None:
+    """
+    Convert SMILES notation to IUPAC chemical name, reporting the engine used.
 
-    if name_normalized in DEMO_MAPPINGS:
-        return DEMO_MAPPINGS[name_normalized]
+    Phase 1: Not implemented (returns None).
+    Phase 2: Will use ML model or rule-based approach.
+
+    Results are looked up in and stored to the conversion cache together with
+    their source; cache hits report the engine ``cache``.
+
+    Args:
+        smiles: SMILES notation string
+
+    Returns:
+        The IUPAC name and its source if conversion successful, None otherwise
+    """
+    check_deadline()
+    cached = get_cache().get("smiles", normalize_smiles(smiles))
+    if cached is not None:
+        return Conversion(cached.value, cast(Source, cached.source), "cache")
 
+    # Phase 1: Not implemented
     return None
 
 
@@ -32,8 +168,7 @@ def smiles_to_name(smiles: str) -> str | None:
     """
     Convert SMILES notation to IUPAC chemical name.
 
-    Phase 1: Not implemented (returns None).
-    Phase 2: Will use ML model or rule-based approach.
+    See ``convert_smiles``.
 
     Args:
         smiles: SMILES notation string
@@ -41,5 +176,5 @@ def smiles_to_name(smiles: str) -> str | None:
     Returns:
         IUPAC name if conversion successful, None otherwise
     """
-    # Phase 1: Not implemented
-    return None
+    result = convert_smiles(smiles)
+    return None if result is None else result.value
@@ -0,0 +1,110 @@
+"""Rule-based IUPAC name parser for saturated hydrocarbons.
+
+Handles the systematic names of alkanes and cycloalkanes, with alkyl
+substituents on the parent chain or ring: ``hexane``, ``2-methylpentane``,
+``3-ethyl-2,4-dimethylhexane``, ``cyclohexane``, ``methylcyclopentane``. Names
+only need to describe a structure; lowest-locant and alphabetical-order rules
+are not enforced. Anything else returns None so the next engine tier can try.
+"""
+
+import re
+
+_STEMS = {
+    "meth": 1,
+    "eth": 2,
+    "prop": 3,
+    "but": 4,
+    "pent": 5,
+    "hex": 6,
+    "hept": 7,
+    "oct": 8,
+    "non": 9,
+    "dec": 10,
+    "undec": 11,
+    "dodec": 12,
+    "tridec": 13,
+    "tetradec": 14,
+    "pentadec": 15,
+    "hexadec": 16,
+    "heptadec": 17,
+    "octadec": 18,
+    "nonadec": 19,
+    "icos": 20,
+}
+_MULTIPLIERS = {"": 1, "di": 2, "tri": 3, "tetra": 4, "penta": 5, "hexa": 6}
+
+# Longest stems first so that e.g. "undec" is not read as "un" + "dec".
+_STEM = "|".join(sorted(_STEMS, key=len, reverse=True))
+_SUBSTITUENT = re.compile(rf"(?:(\d+(?:,\d+)*)-)?(di|tri|tetra|penta|hexa)?({_STEM})yl-?")
+_PARENT = re.compile(rf"(cyclo)?({_STEM})ane$")
+
+
+def _substituents(prefix: str) -> list[tuple[int | None, int]] | None:
+    """Parse substituent prefixes into (locant or None, alkyl length) pairs."""
+    substituents: list[tuple[int | None, int]] = []
+    position = 0
+    while position < len(prefix):
+        match = _SUBSTITUENT.match(prefix, position)
+        if match is None:
+            return None
+        locants, multiplier, stem = match.groups()
+        count = _MULTIPLIERS[multiplier or ""]
+        if locants is None:
+            substituents.extend([(None, _STEMS[stem])] * count)
+        else:
+            positions = [int(locant) for locant in locants.split(",")]
+            if len(positions) != count:
+                return None
+            substituents.extend((locant, _STEMS[stem]) for locant in positions)
+        position = match.end()
+    return substituents
+
+
+def alkane_to_smiles(name: str) -> str | None:
+    """
+    Convert the IUPAC name of an alkane or cycloalkane to SMILES.
+
+    Args:
+        name: Normalized (trimmed, lowercase) chemical name
+
+    Returns:
+        SMILES string, or None if the name is not a saturated hydrocarbon name
+        understood by the rules
+    """
+    name = name.replace(" ", "")
+    match = _PARENT.search(name)
+    if match is None:
+        return None
+    ring = match.group(1) is not None
+    size = _STEMS[match.group(2)]
+    if ring and size < 3:
+        return None
+
+    substituents = _substituents(name[: match.start()])
+    if substituents is None:
+        return None
+    if any(locant is None for locant, _ in substituents):
+        # Locants may only be omitted for a single substituent on a ring.
+        if not ring or len(substituents) != 1:
+            return None
+        substituents = [(1, substituents[0][1])]
+
+    branches: dict[int, list[int]] = {}
+    for locant, length in substituents:
+        if locant is None:
+            raise RuntimeError("Substituent locant missing after defaulting")
+        # Substituents on chain ends would extend the parent chain.
+        if not 1 <= locant <= size or (not ring and locant in (1, size)):
+            return None
+        branches.setdefault(locant, []).append(length)
+    if any(len(lengths) > 2 for lengths in branches.values()):
+        return None
+
+    atoms = []
+    for position in range(1, size + 1):
+        atom = "C"
+        if ring and position in (1, size):
+            atom += "1"
+        atom += "".join(f"({'C' * length})" for length in branches.get(position, []))
+        atoms.append(atom)
+    return "".join(atoms)
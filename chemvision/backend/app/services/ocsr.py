@@ -1,19 +1,137 @@
 """Optical Chemical Structure Recognition (OCSR) service."""
 
+from __future__ import annotations
 
-def image_to_smiles(image_bytes: bytes) -> str | None:
+import contextvars
+import hashlib
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
+from typing import TYPE_CHECKING, cast
+
+from app.core.config import settings
+from app.core.deadline import check_deadline
+from app.core.lazy import lazy_import
+from app.services import imaging
+from app.services.cache import get_cache
+from app.services.engines import Conversion, Source
+
+if TYPE_CHECKING:
+    import numpy as np
+    from numpy.typing import NDArray
+else:
+    np = lazy_import("numpy")
+
+
+def image_key(image_bytes: imaging.ImageData) -> str:
+    """Return the cache key of an image (SHA-256 of its bytes)."""
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+def pixels_key(image: NDArray[np.uint8]) -> str:
+    """Return the cache key of a decoded image (SHA-256 of its shape and pixels)."""
+    digest = hashlib.sha256(f"{image.shape}".encode())
+    digest.update(np.ascontiguousarray(image).data)
+    return digest.hexdigest()
+
+
+@cache
+def _executor() -> ThreadPoolExecutor:
+    """Return the thread pool used for batched region recognition."""
+    return ThreadPoolExecutor(max_workers=settings.ocsr_max_workers, thread_name_prefix="ocsr")
+
+
+def warmup() -> None:
+    """Load the recognition dependencies and start the worker pool."""
+    imaging.warmup()
+    _executor()
+
+
+def convert_image(image_bytes: imaging.ImageData) -> Conversion | None:
     """
-    Extract SMILES notation from a molecular structure image.
+    Extract SMILES from a molecular structure image, reporting the engine used.
 
     Phase 1: Not implemented (returns None).
     Phase 2: Will implement baseline image-to-sequence model.
     Phase 3: Will use production-quality ViT/CNN hybrid.
 
+    Results are looked up in and stored to the conversion cache, keyed by image
+    hash, together with their source; cache hits report the engine ``cache``.
+
     Args:
-        image_bytes: Raw image bytes (PNG or JPEG)
+        image_bytes: Raw image bytes (PNG or JPEG), or a mapping of an image file
+
+    Returns:
+        The SMILES and its source if recognition successful, None otherwise
+    """
+    check_deadline()
+    cached = get_cache().get("image", image_key(image_bytes))
+    if cached is not None:
+        return Conversion(cached.value, cast(Source, cached.source), "cache")
+
+    # Phase 1: Not implemented
+    return None
+
+
+def image_to_smiles(image_bytes: imaging.ImageData) -> str | None:
+    """
+    Extract SMILES notation from a molecular structure image.
+
+    See ``convert_image``.
+
+    Args:
+        image_bytes: Raw image bytes (PNG or JPEG), or a mapping of an image file
 
     Returns:
         SMILES string if recognition successful, None otherwise
     """
+    result = convert_image(image_bytes)
+    return None if result is None else result.value
+
+
+def recognize(image: NDArray[np.uint8]) -> Conversion | None:
+    """
+    Recognize a single decoded depiction.
+
+    Phase 1: Not implemented (returns None).
+
+    Args:
+        image: Grayscale image array of one structure depiction
+
+    Returns:
+        The SMILES and its source if recognition successful, None otherwise
+    """
+    check_deadline()
+    cached = get_cache().get("image", pixels_key(image))
+    if cached is not None:
+        return Conversion(cached.value, cast(Source, cached.source), "cache")
+
     # Phase 1: Not implemented
     return None
+
+
+def recognize_batch(images: Sequence[NDArray[np.uint8]]) -> list[Conversion | None]:
+    """
+    Recognize several depictions concurrently.
+
+    Regions are dispatched to a shared thread pool, so the latency of a batch is
+    bounded by its slowest region rather than the sum over all regions. Each task
+    runs in a copy of the caller's context, so regions still queued when the
+    request deadline passes are skipped.
+
+    Args:
+        images: Grayscale image arrays, one per depiction
+
+    Returns:
+        SMILES and source (or None) for each image, in input order
+    """
+    if len(images) <= 1:
+        return [recognize(image) for image in images]
+    futures = [
+        _executor().submit(contextvars.copy_context().run, recognize, image) for image in images
+    ]
+    try:
+        return [future.result() for future in futures]
+    finally:
+        for future in futures:
+            future.cancel()
@@ -0,0 +1,158 @@
+"""Access to images submitted by reference from a shared volume.
+
+Ingestion workers can submit images that already sit on a volume mounted into
+the backend, instead of uploading them. Paths are relative to
+``image_reference_root`` and are confined to it: every component is opened
+relative to its parent directory with ``O_NOFOLLOW``, so ``..``, absolute paths
+and symbolic links (anywhere in the path) are rejected without a window for the
+file system to change between check and use.
+
+Files are memory-mapped read-only and passed to header validation, hashing and
+decoding as is, so the image is never copied into a Python bytes object. Files
+must not be truncated while they are being read, as with any memory mapping.
+"""
+
+import mmap
+import os
+import stat
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from app.core.config import settings
+from app.services.imaging import ImageTooLargeError
+
+IMAGE_SUFFIXES = (".png", ".jpg", ".jpeg")
+
+
+class ImageReferenceError(ValueError):
+    """Raised when a referenced path is invalid or escapes the reference root."""
+
+
+class ReferenceNotFoundError(ImageReferenceError):
+    """Raised when a referenced file or directory does not exist."""
+
+
+class TooManyImagesError(ImageReferenceError):
+    """Raised when a referenced directory holds more images than a batch allows."""
+
+
+def _components(path: str) -> list[str]:
+    """Split a relative reference into path components, rejecting escapes."""
+    if path.startswith("/") or "\0" in path:
+        raise ImageReferenceError("Paths must be relative to the image reference root")
+    parts = [part for part in path.split("/") if part not in ("", ".")]
+    if ".." in parts:
+        raise ImageReferenceError("Paths must not contain '..'")
+    return parts
+
+
+def _open_beneath(path: str, directory: bool) -> int:
+    """
+    Open a path under the reference root without following symbolic links.
+
+    Returns:
+        File descriptor opened read-only (the caller closes it)
+    """
+    root = settings.image_reference_root
+    if root is None:
+        raise ImageReferenceError("Image references are not enabled")
+    parts = _components(path)
+    if not parts and not directory:
+        raise ImageReferenceError("Path names a directory, not a file")
+
+    directory_flags = os.O_RDONLY | os.O_DIRECTORY | os.O_NOFOLLOW | os.O_CLOEXEC
+    # O_NONBLOCK: opening a FIFO must not wait for a writer (it is rejected after fstat).
+    file_flags = os.O_RDONLY | os.O_NOFOLLOW | os.O_NONBLOCK | os.O_CLOEXEC
+    fd = os.open(root, os.O_RDONLY | os.O_DIRECTORY | os.O_CLOEXEC)
+    try:
+        for index, part in enumerate(parts):
+            last = index == len(parts) - 1
+            flags = file_flags if last and not directory else directory_flags
+            try:
+                child = os.open(part, flags, dir_fd=fd)
+            except FileNotFoundError as e:
+                raise ReferenceNotFoundError(f"{path} does not exist") from e
+            except OSError as e:
+                # ELOOP (symbolic link) or ENOTDIR (file used as a directory).
+                raise ImageReferenceError(f"{path} is not a plain file or directory") from e
+            os.close(fd)
+            fd = child
+        result, fd = fd, -1
+        return result
+    finally:
+        if fd != -1:
+            os.close(fd)
+
+
+@contextmanager
+def map_image(path: str) -> Iterator[mmap.mmap]:
+    """
+    Memory-map a referenced image file read-only.
+
+    Args:
+        path: Path relative to ``image_reference_root``
+
+    Raises:
+        ImageReferenceError: If the path escapes the root, is a link or not a regular file
+        ReferenceNotFoundError: If the file does not exist
+        ImageTooLargeError: If the file is larger than ``max_upload_size``
+    """
+    fd = _open_beneath(path, directory=False)
+    try:
+        info = os.fstat(fd)
+        if not stat.S_ISREG(info.st_mode):
+            raise ImageReferenceError(f"{path} is not a regular file")
+        if info.st_size == 0:
+            raise ImageReferenceError(f"{path} is empty")
+        if info.st_size > settings.max_upload_size:
+            raise ImageTooLargeError(
+                f"File of {info.st_size} bytes exceeds the limit of "
+                f"{settings.max_upload_size} bytes"
+            )
+        # The mapping stays valid after the descriptor is closed.
+        mapped = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+    finally:
+        os.close(fd)
+    try:
+        if hasattr(mapped, "madvise"):
+            mapped.madvise(mmap.MADV_SEQUENTIAL)
+        yield mapped
+    finally:
+        mapped.close()
+
+
+def list_images(directory: str) -> list[str]:
+    """
+    List the PNG/JPEG files directly inside a referenced directory.
+
+    Only regular files are listed (links and subdirectories are skipped).
+
+    Args:
+        directory: Path relative to ``image_reference_root`` ("" for the root)
+
+    Returns:
+        Paths of the images relative to the root, sorted by name
+
+    Raises:
+        ImageReferenceError: If the path escapes the root or is not a directory
+        ReferenceNotFoundError: If the directory does not exist
+        TooManyImagesError: If there are more than ``image_reference_max_files`` images
+    """
+    fd = _open_beneath(directory, directory=True)
+    try:
+        with os.scandir(fd) as entries:
+            names = sorted(
+                entry.name
+                for entry in entries
+                if entry.name.lower().endswith(IMAGE_SUFFIXES)
+                and entry.is_file(follow_symlinks=False)
+            )
+    finally:
+        os.close(fd)
+    if len(names) > settings.image_reference_max_files:
+        raise TooManyImagesError(
+            f"{directory or '.'} holds {len(names)} images, more than the limit of "
+            f"{settings.image_reference_max_files}"
+        )
+    prefix = "/".join(_components(directory))
+    return [f"{prefix}/{name}" if prefix else name for name in names]
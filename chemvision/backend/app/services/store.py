@@ -0,0 +1,357 @@
+"""Durable conversion result store on local disk.
+
+Results (name -> SMILES, SMILES -> name, image hash -> SMILES) are kept in a SQLite
+database in WAL mode so that they survive restarts and deploys. Writes are queued
+and committed in batches by a background thread, so request handlers never wait
+on disk I/O; reads use one connection per thread and run concurrently with the
+writer thanks to WAL.
+
+The store implements the ``ConversionCache`` interface and is used as the second
+tier behind the in-memory cache (see ``app.services.cache``).
+
+Command-line usage for pre-seeding a fresh node::
+
+    python -m app.services.store export results.jsonl
+    python -m app.services.store import results.jsonl
+"""
+
+import argparse
+import json
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import closing, nullcontext
+from typing import NamedTuple, TextIO
+
+import structlog
+
+from app.core.config import settings
+from app.services.cache import KINDS, SOURCES, CacheEntry
+
+logger = structlog.get_logger()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    source TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (kind, key)
+) WITHOUT ROWID
+"""
+_UPSERT = (
+    "INSERT OR REPLACE INTO results (kind, key, value, source, created_at) VALUES (?, ?, ?, ?, ?)"
+)
+
+_Row = tuple[str, str, str, str, float]
+
+
+class ResultStoreError(RuntimeError):
+    """Raised when the store is closed or its writer thread has failed."""
+
+
+class ImportResult(NamedTuple):
+    """Outcome of :meth:`ResultStore.import_rows`."""
+
+    imported: int
+    skipped: int
+
+
+class ResultStore:
+    """SQLite-backed result store with a batching background writer."""
+
+    def __init__(
+        self,
+        path: str,
+        batch_size: int = 256,
+        flush_interval: float = 0.05,
+        max_queued: int = 10_000,
+    ) -> None:
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._local = threading.local()
+        # Reader connections of all threads, so close() can release them.
+        self._readers: list[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+        self._closed = False
+        self._failure: BaseException | None = None
+        # Rows to write, flush markers (set once everything queued before them is
+        # committed) and None, the stop sentinel. Bounded, so a stalled disk cannot
+        # grow it without limit.
+        self._queue: queue.Queue[_Row | threading.Event | None] = queue.Queue(max_queued)
+
+        with closing(self._connect()) as connection:
+            connection.execute(_SCHEMA)
+
+        self._writer = threading.Thread(target=self._write_loop, name="result-store", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        # With WAL, NORMAL only syncs at checkpoints; a crash can lose the last batch
+        # but never corrupts the database.
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _reader(self) -> sqlite3.Connection:
+        if self._closed:
+            raise ResultStoreError("Result store is closed")
+        connection: sqlite3.Connection | None = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._connect()
+            self._local.connection = connection
+            with self._readers_lock:
+                self._readers.append(connection)
+        return connection
+
+    def get(self, kind: str, key: str) -> CacheEntry | None:
+        row = (
+            self._reader()
+            .execute("SELECT value, source FROM results WHERE kind = ? AND key = ?", (kind, key))
+            .fetchone()
+        )
+        return CacheEntry(row[0], row[1]) if row is not None else None
+
+    def set(self, kind: str, key: str, value: str, source: str) -> None:
+        """Queue a result for writing; returns immediately.
+
+        Writes after :meth:`close` or a writer failure, or while the queue is full,
+        are dropped with a warning, like any other failed cache write.
+        """
+        if self._closed or self._failure is not None:
+            logger.warning("result_store_write_dropped", kind=kind, closed=self._closed)
+            return
+        try:
+            self._queue.put_nowait((kind, key, value, source, time.time()))
+        except queue.Full:
+            logger.warning("result_store_write_dropped", kind=kind, reason="queue_full")
+
+    def clear(self) -> None:
+        self.flush()
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM results")
+
+    def flush(self, timeout: float | None = 30.0) -> None:
+        """
+        Block until every queued write has been committed.
+
+        Raises:
+            ResultStoreError: If the writer thread failed or has stopped
+            TimeoutError: If the writes are not committed within ``timeout`` seconds
+        """
+        self._raise_if_failed()
+        if not self._writer.is_alive():
+            raise ResultStoreError("Result store writer is not running")
+        done = threading.Event()
+        started = time.monotonic()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            raise TimeoutError(f"Result store writes not committed within {timeout} s") from None
+        if timeout is not None:
+            timeout = max(0.0, timeout - (time.monotonic() - started))
+        if not done.wait(timeout):
+            raise TimeoutError(f"Result store writes not committed within {timeout} s")
+        self._raise_if_failed()
+
+    def _raise_if_failed(self) -> None:
+        if self._failure is not None:
+            raise ResultStoreError("Result store writer failed") from self._failure
+
+    def close(self) -> None:
+        """Commit queued writes, stop the writer thread and close all connections."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join()
+        with self._readers_lock:
+            readers, self._readers = self._readers, []
+        for connection in readers:
+            connection.close()
+
+    def __len__(self) -> int:
+        return int(self._reader().execute("SELECT COUNT(*) FROM results").fetchone()[0])
+
+    def _write_loop(self) -> None:
+        try:
+            connection = self._connect()
+        except BaseException as e:
+            logger.error("result_store_writer_failed", path=self.path, error=str(e))
+            self._failure = e
+            self._discard_queue()
+            return
+        stopping = False
+        while not stopping:
+            batch: list[_Row] = []
+            markers: list[threading.Event] = []
+            item = self._queue.get()
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is None:
+                    stopping = True
+                elif isinstance(item, threading.Event):
+                    markers.append(item)
+                else:
+                    batch.append(item)
+                if stopping or markers or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            try:
+                if batch:
+                    with connection:
+                        connection.executemany(_UPSERT, batch)
+            except sqlite3.Error as e:
+                logger.error("result_store_write_error", error=str(e), rows=len(batch))
+            finally:
+                for marker in markers:
+                    marker.set()
+        connection.close()
+
+    def _discard_queue(self) -> None:
+        """Drop queued rows after a writer failure, releasing flush() waiters."""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if isinstance(item, threading.Event):
+                item.set()
+
+    def export_rows(self) -> Iterator[dict[str, str]]:
+        """Yield every stored result as a dict."""
+        self.flush()
+        with closing(self._connect()) as connection:
+            cursor = connection.execute(
+                "SELECT kind, key, value, source FROM results ORDER BY kind, key"
+            )
+            for kind, key, value, source in cursor:
+                yield {"kind": kind, "key": key, "value": value, "source": source}
+
+    def import_rows(self, rows: Iterable[object]) -> ImportResult:
+        """
+        Insert results synchronously in large transactions.
+
+        Rows that are not a result as written by :meth:`export_rows` (a kind of
+        ``KINDS``, a source of ``SOURCES``, string key and value) are skipped with a
+        warning, so a bad line cannot poison later lookups.
+
+        Args:
+            rows: Result dicts; anything else (e.g. None for an unparseable line)
+                counts as malformed
+
+        Returns:
+            Numbers of imported and skipped rows
+        """
+        self.flush()
+        imported = skipped = 0
+        batch: list[_Row] = []
+        now = time.time()
+        with closing(self._connect()) as connection:
+            for number, row in enumerate(rows, start=1):
+                try:
+                    kind, key, value, source = _result_fields(row)
+                except ValueError as e:
+                    logger.warning("result_store_import_skipped", row=number, reason=str(e))
+                    skipped += 1
+                    continue
+                batch.append((kind, key, value, source, now))
+                if len(batch) >= 10_000:
+                    with connection:
+                        connection.executemany(_UPSERT, batch)
+                    imported += len(batch)
+                    batch.clear()
+            with connection:
+                connection.executemany(_UPSERT, batch)
+        return ImportResult(imported + len(batch), skipped)
+
+
+def _result_fields(row: object) -> tuple[str, str, str, str]:
+    """
+    Return the kind, key, value and source of an imported row.
+
+    Raises:
+        ValueError: If the row is not a valid result
+    """
+    if not isinstance(row, dict):
+        raise ValueError("not a JSON object")
+    kind, key, value, source = (row.get(name) for name in ("kind", "key", "value", "source"))
+    if not (
+        isinstance(kind, str)
+        and isinstance(key, str)
+        and isinstance(value, str)
+        and isinstance(source, str)
+    ):
+        raise ValueError("kind, key, value and source must be strings")
+    if kind not in KINDS:
+        raise ValueError(f"unknown kind {kind!r}")
+    if source not in SOURCES:
+        raise ValueError(f"unknown source {source!r}")
+    return kind, key, value, source
+
+
+def _read_jsonl(stream: TextIO) -> Iterator[object]:
+    """Yield the value of each non-empty line, or None for lines that are not JSON."""
+    for line in stream:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                yield None
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Export or import stored results as JSON lines."""
+    parser = argparse.ArgumentParser(description="Export or import the conversion result store")
+    parser.add_argument(
+        "--db",
+        default=settings.result_store_path,
+        help="SQLite database path (default: RESULT_STORE_PATH)",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="Write all results as JSON lines")
+    export_parser.add_argument("file", help="Output file ('-' for stdout)")
+    import_parser = commands.add_parser("import", help="Load results from JSON lines")
+    import_parser.add_argument("file", help="Input file ('-' for stdin)")
+    args = parser.parse_args(argv)
+
+    if not args.db:
+        parser.error("no database: pass --db or set RESULT_STORE_PATH")
+
+    store = ResultStore(args.db)
+    try:
+        if args.command == "export":
+            with (
+                nullcontext(sys.stdout)
+                if args.file == "-"
+                else open(args.file, "w", encoding="utf-8")
+            ) as output:
+                count = 0
+                for row in store.export_rows():
+                    output.write(json.dumps(row) + "\n")
+                    count += 1
+            print(f"exported {count} results", file=sys.stderr)
+        else:
+            with (
+                nullcontext(sys.stdin) if args.file == "-" else open(args.file, encoding="utf-8")
+            ) as source:
+                result = store.import_rows(_read_jsonl(source))
+            print(
+                f"imported {result.imported} results, skipped {result.skipped} malformed lines",
+                file=sys.stderr,
+            )
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
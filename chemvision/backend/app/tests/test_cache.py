@@ -0,0 +1,198 @@
+"""Unit tests for the conversion cache backends."""
+
+import multiprocessing
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from app.services import cache as cache_module
+from app.services.cache import (
+    CacheEntry,
+    MemoryCache,
+    NullCache,
+    SharedMemoryCache,
+    get_cache,
+)
+from app.services.naming import name_to_smiles
+
+
+def _write_entries(path: str, start: int, count: int) -> None:
+    """Write entries from a separate process."""
+    shared = SharedMemoryCache(path, 1024 * 1024)
+    for i in range(start, start + count):
+        shared.set("name", f"molecule-{i}", "C" * (i % 10 + 1), "tool")
+    shared.close()
+
+
+@pytest.fixture
+def shared_cache(tmp_path: Path) -> SharedMemoryCache:
+    """Create a small shared cache in a temporary file."""
+    return SharedMemoryCache(str(tmp_path / "cache"), 1024 * 1024)
+
+
+class TestNullCache:
+    """Tests for NullCache."""
+
+    def test_never_stores(self) -> None:
+        """Test that values are never returned."""
+        null = NullCache()
+        null.set("name", "isopentane", "CC(C)CC", "demo")
+        assert null.get("name", "isopentane") is None
+
+
+class TestMemoryCache:
+    """Tests for MemoryCache."""
+
+    def test_round_trip(self) -> None:
+        """Test that stored values are returned with their source."""
+        memory = MemoryCache(max_entries=10)
+        memory.set("name", "isopentane", "CC(C)CC", "demo")
+        assert memory.get("name", "isopentane") == CacheEntry("CC(C)CC", "demo")
+
+    def test_kinds_are_namespaced(self) -> None:
+        """Test that the same key in different kinds does not collide."""
+        memory = MemoryCache(max_entries=10)
+        memory.set("name", "CC", "ethane", "demo")
+        assert memory.get("smiles", "CC") is None
+
+    def test_evicts_least_recently_used(self) -> None:
+        """Test LRU eviction when full."""
+        memory = MemoryCache(max_entries=2)
+        memory.set("name", "a", "C", "demo")
+        memory.set("name", "b", "CC", "demo")
+        memory.get("name", "a")
+        memory.set("name", "c", "CCC", "demo")
+
+        assert memory.get("name", "a") is not None
+        assert memory.get("name", "b") is None
+        assert len(memory) == 2
+
+    def test_clear(self) -> None:
+        """Test that clear removes all entries."""
+        memory = MemoryCache(max_entries=10)
+        memory.set("name", "a", "C", "demo")
+        memory.clear()
+        assert memory.get("name", "a") is None
+
+
+class TestSharedMemoryCache:
+    """Tests for SharedMemoryCache."""
+
+    def test_round_trip(self, shared_cache: SharedMemoryCache) -> None:
+        """Test that stored values are returned with their source."""
+        shared_cache.set("name", "isopentane", "CC(C)CC", "demo")
+        assert shared_cache.get("name", "isopentane") == CacheEntry("CC(C)CC", "demo")
+
+    def test_missing_key(self, shared_cache: SharedMemoryCache) -> None:
+        """Test that unknown keys return None."""
+        assert shared_cache.get("name", "unknown") is None
+
+    def test_overwrite(self, shared_cache: SharedMemoryCache) -> None:
+        """Test that setting an existing key replaces its value."""
+        shared_cache.set("name", "x", "C", "demo")
+        shared_cache.set("name", "x", "CC", "ml")
+        assert shared_cache.get("name", "x") == CacheEntry("CC", "ml")
+
+    def test_oversized_entry_is_skipped(self, shared_cache: SharedMemoryCache) -> None:
+        """Test that entries larger than a slot are not cached."""
+        shared_cache.set("name", "big", "C" * 1000, "demo")
+        assert shared_cache.get("name", "big") is None
+
+    def test_evicts_least_recently_used_within_set(self, tmp_path: Path) -> None:
+        """Test LRU eviction inside a single set."""
+        tiny = SharedMemoryCache(str(tmp_path / "tiny"), 0, ways=2)
+        assert tiny.n_sets == 1
+        tiny.set("name", "a", "C", "demo")
+        tiny.set("name", "b", "CC", "demo")
+        tiny.get("name", "a")
+        tiny.set("name", "c", "CCC", "demo")
+
+        assert tiny.get("name", "a") is not None
+        assert tiny.get("name", "b") is None
+        assert tiny.get("name", "c") is not None
+
+    def test_shared_between_instances(self, tmp_path: Path) -> None:
+        """Test that two handles on the same file see each other's writes."""
+        path = str(tmp_path / "cache")
+        first = SharedMemoryCache(path, 1024 * 1024)
+        second = SharedMemoryCache(path, 1024 * 1024)
+        first.set("image", "abc", "c1ccccc1", "ml")
+        assert second.get("image", "abc") == CacheEntry("c1ccccc1", "ml")
+
+    def test_shared_between_processes(self, tmp_path: Path) -> None:
+        """Test concurrent writers in separate processes."""
+        path = str(tmp_path / "cache")
+        reader = SharedMemoryCache(path, 1024 * 1024)
+        ctx = multiprocessing.get_context("fork")
+        workers = [ctx.Process(target=_write_entries, args=(path, i * 50, 50)) for i in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+            assert worker.exitcode == 0
+
+        for i in range(200):
+            assert reader.get("name", f"molecule-{i}") == CacheEntry("C" * (i % 10 + 1), "tool")
+
+    def test_geometry_change_resets_table(self, tmp_path: Path) -> None:
+        """Test that reopening with a different size starts from an empty table."""
+        path = str(tmp_path / "cache")
+        SharedMemoryCache(path, 1024 * 1024).set("name", "a", "C", "demo")
+        resized = SharedMemoryCache(path, 2 * 1024 * 1024)
+        assert resized.get("name", "a") is None
+
+    def test_geometry_change_keeps_existing_mappings(self, tmp_path: Path) -> None:
+        """Test that a resized table replaces the file instead of truncating it in place."""
+        path = str(tmp_path / "cache")
+        large = SharedMemoryCache(path, 2 * 1024 * 1024)
+        large.set("name", "a", "C", "demo")
+
+        small = SharedMemoryCache(path, 1024 * 1024)
+        small.set("name", "b", "CC", "demo")
+
+        # The old handle keeps its (now unlinked) table intact and readable.
+        assert large.get("name", "a") == CacheEntry("C", "demo")
+        assert large.get("name", "b") is None
+        assert os.path.getsize(path) == small._file_size
+        assert SharedMemoryCache(path, 1024 * 1024).get("name", "b") == CacheEntry("CC", "demo")
+        assert os.listdir(tmp_path) == ["cache"]
+
+    def test_clear(self, shared_cache: SharedMemoryCache) -> None:
+        """Test that clear removes all entries."""
+        shared_cache.set("name", "a", "C", "demo")
+        shared_cache.clear()
+        assert shared_cache.get("name", "a") is None
+
+    def test_rejects_tiny_slots(self, tmp_path: Path) -> None:
+        """Test that slots too small for the slot header are rejected."""
+        with pytest.raises(ValueError):
+            SharedMemoryCache(str(tmp_path / "cache"), 1024, slot_size=8)
+
+
+class TestGetCache:
+    """Tests for the configured cache factory."""
+
+    @pytest.mark.parametrize(
+        ("backend", "expected"),
+        [("none", NullCache), ("memory", MemoryCache), ("shared", SharedMemoryCache)],
+    )
+    def test_backend_selection(self, tmp_path: Path, backend: str, expected: type) -> None:
+        """Test that the backend follows settings.cache_backend."""
+        get_cache.cache_clear()
+        try:
+            with (
+                patch.object(cache_module.settings, "cache_backend", backend),
+                patch.object(cache_module.settings, "cache_shared_path", str(tmp_path / "c")),
+                patch.object(cache_module.settings, "cache_shared_size_mb", 1),
+            ):
+                assert isinstance(get_cache(), expected)
+        finally:
+            get_cache.cache_clear()
+
+    def test_naming_service_populates_cache(self) -> None:
+        """Test that successful name conversions are cached with their source."""
+        get_cache().clear()
+        name_to_smiles("  IsoPentane ")
+        assert get_cache().get("name", "isopentane") == CacheEntry("CC(C)CC", "demo")
@@ -1,6 +1,7 @@
 """Unit tests for application configuration."""
 
 import os
+import tempfile
 from unittest.mock import patch
 
 from app.core.config import Settings
@@ -34,6 +35,20 @@ class TestSettingsDefaults:
             settings = Settings()
             assert settings.max_upload_size == 10 * 1024 * 1024
 
+    def test_default_cache_backend(self) -> None:
+        """Test default conversion cache backend."""
+        with patch.dict(os.environ, {}, clear=True):
+            settings = Settings()
+            assert settings.cache_backend == "memory"
+
+    def test_default_cache_shared_path(self) -> None:
+        """Test that the shared cache lives in the runtime directory, else the temp directory."""
+        with patch.dict(os.environ, {"XDG_RUNTIME_DIR": "/run/user/1000"}, clear=True):
+            assert Settings().cache_shared_path == "/run/user/1000/chemvision-cache"
+        with patch.dict(os.environ, {}, clear=True):
+            expected = os.path.join(tempfile.gettempdir(), "chemvision-cache")
+            assert Settings().cache_shared_path == expected
+
 
 class TestSettingsFromEnv:
     """Tests for Settings loaded from environment variables."""
@@ -1,6 +1,21 @@
 """Tests for conversion endpoints."""
 
+import asyncio
+import io
+import mmap
+import struct
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
 from fastapi.testclient import TestClient
+from PIL import Image, ImageDraw
+
+from app.core.config import settings
+from app.services.cache import get_cache
+from app.services.engines import Conversion
+from app.services.ocsr import image_key
 
 
 class TestNameToStructure:
@@ -29,6 +44,13 @@ class TestNameToStructure:
         data = response.json()
         assert data["smiles"] == "CC(C)CC"
 
+    def test_reports_winning_engine_source(self, client: TestClient) -> None:
+        """Test that names answered by the rule parser report the tool source."""
+        response = client.post("/api/name-to-structure", json={"name": "2,2-dimethylbutane"})
+
+        assert response.status_code == 200
+        assert response.json() == {"smiles": "CC(C)(C)CC", "source": "tool"}
+
     def test_unknown_name_returns_501(self, client: TestClient) -> None:
         """Test that unknown names return 501 Not Implemented."""
         response = client.post(
@@ -80,6 +102,15 @@ class TestStructureToName:
 
         assert response.status_code == 422
 
+    def test_reports_cached_source(self, client: TestClient) -> None:
+        """Test that a cached name is returned with the source it was stored with."""
+        get_cache().set("smiles", "OCC(O)CO", "propane-1,2,3-triol", "tool")
+
+        response = client.post("/api/structure-to-name", json={"smiles": "OCC(O)CO"})
+
+        assert response.status_code == 200
+        assert response.json() == {"name": "propane-1,2,3-triol", "source": "tool"}
+
 
 class TestImageToStructure:
     """Tests for image-to-structure endpoint."""
@@ -118,6 +149,367 @@ class TestImageToStructure:
         error = data["detail"]
         assert error["error_code"] == "INVALID_IMAGE_TYPE"
 
+    def test_reports_cached_source(self, client: TestClient) -> None:
+        """Test that a cached recognition is returned with the source it was stored with."""
+        png = io.BytesIO()
+        Image.new("L", (3, 5), 200).save(png, format="PNG")
+        get_cache().set("image", image_key(png.getvalue()), "c1ccccc1", "tool")
+
+        response = client.post(
+            "/api/image-to-structure",
+            files={"image": ("test.png", png.getvalue(), "image/png")},
+        )
+
+        assert response.status_code == 200
+        assert response.json() == {"smiles": "c1ccccc1", "source": "tool"}
+
+
+class TestCacheableConversions:
+    """Tests for the HTTP-cacheable GET conversion endpoints."""
+
+    def test_name_to_structure_get(self, client: TestClient) -> None:
+        """Test that GET returns the conversion with caching headers."""
+        response = client.get("/api/name-to-structure", params={"name": "isopentane"})
+
+        assert response.status_code == 200
+        assert response.json() == {"smiles": "CC(C)CC", "source": "demo"}
+        assert response.headers["ETag"].startswith('"')
+        assert "max-age=" in response.headers["Cache-Control"]
+        assert "Accept" in response.headers["Vary"]
+
+    def test_etag_uses_normalized_input(self, client: TestClient) -> None:
+        """Test that equivalent spellings share an ETag."""
+        first = client.get("/api/name-to-structure", params={"name": "isopentane"})
+        second = client.get("/api/name-to-structure", params={"name": "  IsoPentane "})
+
+        assert first.headers["ETag"] == second.headers["ETag"]
+
+    def test_etag_changes_with_engine_version(self, client: TestClient) -> None:
+        """Test that a new engine version invalidates cached responses."""
+        first = client.get("/api/name-to-structure", params={"name": "isopentane"})
+        with patch("app.services.naming.ENGINE_VERSION", "demo-2"):
+            second = client.get("/api/name-to-structure", params={"name": "isopentane"})
+
+        assert first.headers["ETag"] != second.headers["ETag"]
+
+    def test_if_none_match_returns_304(self, client: TestClient) -> None:
+        """Test conditional GET with a matching ETag."""
+        etag = client.get("/api/name-to-structure", params={"name": "isopentane"}).headers["ETag"]
+
+        with patch("app.services.naming.convert_name") as convert:
+            response = client.get(
+                "/api/name-to-structure",
+                params={"name": "isopentane"},
+                headers={"If-None-Match": f'"other", W/{etag}'},
+            )
+            convert.assert_not_called()
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+
+    def test_stale_etag_returns_200(self, client: TestClient) -> None:
+        """Test conditional GET with a non-matching ETag."""
+        response = client.get(
+            "/api/name-to-structure",
+            params={"name": "isopentane"},
+            headers={"If-None-Match": '"stale"'},
+        )
+
+        assert response.status_code == 200
+
+    def test_errors_are_not_cacheable(self, client: TestClient) -> None:
+        """Test that failed conversions are marked no-store."""
+        response = client.get("/api/name-to-structure", params={"name": "unknown-molecule"})
+
+        assert response.status_code == 501
+        assert response.headers["Cache-Control"] == "no-store"
+        assert "ETag" not in response.headers
+
+    def test_structure_to_name_get(self, client: TestClient) -> None:
+        """Test the GET structure-to-name variant."""
+        response = client.get("/api/structure-to-name", params={"smiles": "CC(C)CC"})
+
+        assert response.status_code == 501
+        assert response.json()["detail"]["error_code"] == "NOT_IMPLEMENTED"
+        assert response.headers["Cache-Control"] == "no-store"
+
+    def test_lookups_run_off_event_loop(self, client: TestClient) -> None:
+        """Test that cache and result store lookups never block the event loop."""
+        on_loop = []
+
+        def record(_: str, persist: bool = True) -> None:
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(True)
+            except RuntimeError:
+                on_loop.append(False)
+
+        with (
+            patch("app.services.naming.convert_name", side_effect=record),
+            patch("app.services.naming.convert_smiles", side_effect=record),
+        ):
+            client.post("/api/name-to-structure", json={"name": "isopentane"})
+            client.get("/api/name-to-structure", params={"name": "isopentane"})
+            client.post("/api/structure-to-name", json={"smiles": "CC(C)CC"})
+            client.get("/api/structure-to-name", params={"smiles": "CC(C)CC"})
+
+        assert on_loop == [False] * 4
+
+    def test_validation_missing_query(self, client: TestClient) -> None:
+        """Test that the query parameter is required."""
+        assert client.get("/api/name-to-structure").status_code == 422
+        assert client.get("/api/structure-to-name", params={"smiles": ""}).status_code == 422
+
+
+class TestPageToStructures:
+    """Tests for page-to-structures endpoint."""
+
+    @staticmethod
+    def _page_png() -> bytes:
+        """Render a page with two depictions and a text line."""
+        page = Image.new("L", (600, 400), 255)
+        draw = ImageDraw.Draw(page)
+        for cx in (150, 450):
+            draw.polygon(
+                [(cx - 50, 100), (cx, 70), (cx + 50, 100), (cx + 50, 160), (cx, 190)],
+                outline=0,
+                width=3,
+            )
+        draw.rectangle([(40, 320), (560, 330)], fill=0)
+        buffer = io.BytesIO()
+        page.save(buffer, format="PNG")
+        return buffer.getvalue()
+
+    def test_returns_regions(self, client: TestClient) -> None:
+        """Test that each depiction is returned with a bounding box."""
+        response = client.post(
+            "/api/page-to-structures",
+            files={"image": ("page.png", self._page_png(), "image/png")},
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert (data["width"], data["height"]) == (600, 400)
+        assert len(data["regions"]) == 2
+        first = data["regions"][0]
+        assert set(first["bbox"]) == {"x", "y", "width", "height"}
+        assert first["smiles"] is None
+        assert first["source"] == "ml"
+
+    def test_invalid_image_type(self, client: TestClient) -> None:
+        """Test that non-image uploads are rejected."""
+        response = client.post(
+            "/api/page-to-structures",
+            files={"image": ("page.txt", b"text", "text/plain")},
+        )
+
+        assert response.status_code == 400
+        assert response.json()["detail"]["error_code"] == "INVALID_IMAGE_TYPE"
+
+    def test_undecodable_image(self, client: TestClient) -> None:
+        """Test that corrupt images are rejected."""
+        response = client.post(
+            "/api/page-to-structures",
+            files={"image": ("page.png", b"not a png", "image/png")},
+        )
+
+        assert response.status_code == 400
+        assert response.json()["detail"]["error_code"] == "INVALID_IMAGE"
+
+    def test_rejects_oversized_page_from_header(self, client: TestClient) -> None:
+        """Test that pages over the pixel limit are rejected before decoding."""
+        header = b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR" + struct.pack(">IIBB", 60000, 60000, 8, 0)
+        response = client.post(
+            "/api/page-to-structures",
+            files={"image": ("page.png", header + b"\x00" * 16, "image/png")},
+        )
+
+        assert response.status_code == 413
+        assert response.json()["detail"]["error_code"] == "IMAGE_TOO_LARGE"
+
+    def test_reduced_scale_jpeg_keeps_page_coordinates(self, client: TestClient) -> None:
+        """Test that regions of a downscaled JPEG page are reported in page pixels."""
+        page = Image.open(io.BytesIO(self._page_png())).resize((2400, 1600))
+        buffer = io.BytesIO()
+        page.save(buffer, format="JPEG", quality=95)
+
+        with patch.object(settings, "page_decode_max_side", 600):
+            response = client.post(
+                "/api/page-to-structures",
+                files={"image": ("page.jpg", buffer.getvalue(), "image/jpeg")},
+            )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert (data["width"], data["height"]) == (2400, 1600)
+        assert len(data["regions"]) == 2
+        bbox = data["regions"][0]["bbox"]
+        # The first depiction spans x 100..200 of the 600-pixel page.
+        assert abs(bbox["x"] + bbox["width"] / 2 - 600) < 40
+
+
+class TestImageValidation:
+    """Tests for header validation of image-to-structure uploads."""
+
+    def test_rejects_oversized_image(self, client: TestClient) -> None:
+        """Test that images over the pixel limit return 413."""
+        header = b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR" + struct.pack(">IIBB", 100000, 100000, 8, 6)
+        response = client.post(
+            "/api/image-to-structure",
+            files={"image": ("big.png", header + b"\x00" * 16, "image/png")},
+        )
+
+        assert response.status_code == 413
+        assert response.json()["detail"]["error_code"] == "IMAGE_TOO_LARGE"
+
+    def test_rejects_mislabelled_bytes(self, client: TestClient) -> None:
+        """Test that bytes without a PNG/JPEG header return 400."""
+        response = client.post(
+            "/api/image-to-structure",
+            files={"image": ("fake.png", b"GIF89a" + b"\x00" * 64, "image/png")},
+        )
+
+        assert response.status_code == 400
+        assert response.json()["detail"]["error_code"] == "INVALID_IMAGE"
+
+
+class TestImageReferences:
+    """Tests for image submission by reference to the shared image volume."""
+
+    @staticmethod
+    def _png() -> bytes:
+        """Encode a small grayscale PNG."""
+        buffer = io.BytesIO()
+        Image.new("L", (8, 8), 255).save(buffer, format="PNG")
+        return buffer.getvalue()
+
+    def test_disabled_by_default(self, client: TestClient) -> None:
+        """Test that references are rejected when no root is configured."""
+        response = client.post("/api/image-to-structure/by-reference", json={"path": "a.png"})
+
+        assert response.status_code == 403
+        assert response.json()["detail"]["error_code"] == "IMAGE_REFERENCES_DISABLED"
+
+    def test_recognizes_mapped_file(self, client: TestClient, tmp_path: Path) -> None:
+        """Test that the referenced file is passed to OCSR as a memory mapping."""
+        (tmp_path / "a.png").write_bytes(self._png())
+
+        def recognize(image_data: object) -> Conversion:
+            assert isinstance(image_data, mmap.mmap)
+            return Conversion("CC", "ml", "model")
+
+        with (
+            patch.object(settings, "image_reference_root", str(tmp_path)),
+            patch("app.services.ocsr.convert_image", side_effect=recognize),
+        ):
+            response = client.post("/api/image-to-structure/by-reference", json={"path": "a.png"})
+
+        assert response.status_code == 200
+        assert response.json() == {"smiles": "CC", "source": "ml"}
+
+    def test_not_implemented(self, client: TestClient, tmp_path: Path) -> None:
+        """Test that unrecognized images return 501 as for uploads."""
+        (tmp_path / "a.png").write_bytes(self._png())
+
+        with patch.object(settings, "image_reference_root", str(tmp_path)):
+            response = client.post("/api/image-to-structure/by-reference", json={"path": "a.png"})
+
+        assert response.status_code == 501
+        assert response.json()["detail"]["error_code"] == "NOT_IMPLEMENTED"
+
+    def test_errors(self, client: TestClient, tmp_path: Path) -> None:
+        """Test the error codes for escaping, missing and invalid files."""
+        (tmp_path / "fake.png").write_bytes(b"GIF89a" + b"\x00" * 64)
+        cases = {
+            "../a.png": (400, "INVALID_IMAGE_PATH"),
+            "missing.png": (404, "IMAGE_NOT_FOUND"),
+            "fake.png": (400, "INVALID_IMAGE"),
+        }
+
+        with patch.object(settings, "image_reference_root", str(tmp_path)):
+            for path, (status_code, error_code) in cases.items():
+                response = client.post("/api/image-to-structure/by-reference", json={"path": path})
+
+                assert response.status_code == status_code
+                assert response.json()["detail"]["error_code"] == error_code
+
+    def test_directory_batch(self, client: TestClient, tmp_path: Path) -> None:
+        """Test that every image in a directory gets its own result."""
+        (tmp_path / "batch").mkdir()
+        (tmp_path / "batch" / "a.png").write_bytes(self._png())
+        (tmp_path / "batch" / "b.png").write_bytes(self._png())
+        (tmp_path / "batch" / "c.png").write_bytes(b"GIF89a" + b"\x00" * 64)
+
+        with (
+            patch.object(settings, "image_reference_root", str(tmp_path)),
+            patch(
+                "app.services.ocsr.convert_image",
+                side_effect=[Conversion("CC", "ml", "model"), None],
+            ),
+        ):
+            response = client.post(
+                "/api/image-to-structure/by-reference/batch", json={"directory": "batch"}
+            )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["directory"] == "batch"
+        results = {result["path"]: result for result in data["results"]}
+        assert list(results) == ["batch/a.png", "batch/b.png", "batch/c.png"]
+        recognized = [r for r in results.values() if r["smiles"] is not None]
+        assert [r["smiles"] for r in recognized] == ["CC"]
+        errors = sorted(r["error"]["error_code"] for r in results.values() if r["error"])
+        assert errors == ["INVALID_IMAGE", "NOT_IMPLEMENTED"]
+
+    def test_directory_batch_is_bounded(self, client: TestClient, tmp_path: Path) -> None:
+        """Test that no more than ocsr_max_workers images are recognized at once."""
+        (tmp_path / "batch").mkdir()
+        for index in range(12):
+            (tmp_path / "batch" / f"{index}.png").write_bytes(self._png())
+        lock = threading.Lock()
+        active = peak = 0
+
+        def recognize(image_data: object) -> Conversion:
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.02)
+            with lock:
+                active -= 1
+            return Conversion("CC", "ml", "model")
+
+        with (
+            patch.object(settings, "image_reference_root", str(tmp_path)),
+            patch.object(settings, "ocsr_max_workers", 3),
+            patch("app.services.ocsr.convert_image", side_effect=recognize),
+        ):
+            response = client.post(
+                "/api/image-to-structure/by-reference/batch", json={"directory": "batch"}
+            )
+
+        assert response.status_code == 200
+        assert len(response.json()["results"]) == 12
+        assert 1 <= peak <= 3
+
+    def test_directory_errors(self, client: TestClient, tmp_path: Path) -> None:
+        """Test that missing directories and oversized batches are rejected."""
+        for index in range(3):
+            (tmp_path / f"{index}.png").write_bytes(self._png())
+
+        with patch.object(settings, "image_reference_root", str(tmp_path)):
+            missing = client.post(
+                "/api/image-to-structure/by-reference/batch", json={"directory": "missing"}
+            )
+            with patch.object(settings, "image_reference_max_files", 2):
+                too_many = client.post("/api/image-to-structure/by-reference/batch", json={})
+
+        assert missing.status_code == 404
+        assert missing.json()["detail"]["error_code"] == "IMAGE_NOT_FOUND"
+        assert too_many.status_code == 400
+        assert too_many.json()["detail"]["error_code"] == "TOO_MANY_IMAGES"
+
 
 class TestCorrelationId:
     """Tests for correlation ID handling."""
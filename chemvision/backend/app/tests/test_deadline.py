@@ -0,0 +1,280 @@
+"""Tests for request deadlines and cancellation."""
+
+import asyncio
+import io
+import threading
+import time
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+from starlette.types import Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.deadline import (
+    Deadline,
+    DeadlineExceededError,
+    DeadlineMiddleware,
+    check_deadline,
+    current_deadline,
+    deadline_scope,
+    request_timeout,
+)
+from app.services import ocsr
+from app.services.engines import Conversion
+
+
+class TestDeadline:
+    """Tests for Deadline."""
+
+    def test_unlimited(self) -> None:
+        """Test that a deadline without timeout never expires on its own."""
+        deadline = Deadline(None)
+
+        assert deadline.remaining() is None
+        assert not deadline.expired
+
+    def test_expires(self) -> None:
+        """Test that a deadline expires once its timeout has elapsed."""
+        deadline = Deadline(0.01)
+        time.sleep(0.02)
+
+        assert deadline.remaining() == 0.0
+        with pytest.raises(DeadlineExceededError):
+            deadline.check()
+
+    def test_cancel(self) -> None:
+        """Test that a cancelled deadline is expired immediately."""
+        deadline = Deadline(60)
+        deadline.cancel()
+
+        assert deadline.expired
+
+    def test_cancel_reason(self) -> None:
+        """Test that the first cancellation reason is kept and reported."""
+        deadline = Deadline(60)
+        deadline.cancel("disconnect")
+        deadline.cancel("deadline")
+
+        assert deadline.reason == "disconnect"
+        with pytest.raises(DeadlineExceededError, match="disconnect"):
+            deadline.check()
+
+
+class TestDeadlineContext:
+    """Tests for the current-deadline context variable."""
+
+    def test_no_deadline(self) -> None:
+        """Test that checks pass outside of a request."""
+        assert current_deadline() is None
+        check_deadline()
+
+    def test_scope(self) -> None:
+        """Test that the deadline is current only within its scope."""
+        deadline = Deadline(0)
+        with deadline_scope(deadline):
+            assert current_deadline() is deadline
+            with pytest.raises(DeadlineExceededError):
+                check_deadline()
+        assert current_deadline() is None
+
+    def test_propagates_to_executor_tasks(self) -> None:
+        """Test that batched recognition stops once the deadline has passed."""
+        images = [np.zeros((4, 4), dtype=np.uint8)] * 3
+
+        with deadline_scope(Deadline(0)), pytest.raises(DeadlineExceededError):
+            ocsr.recognize_batch(images)
+
+
+class TestRequestTimeout:
+    """Tests for request_timeout."""
+
+    def test_server_default(self) -> None:
+        """Test that the setting applies without a header."""
+        with patch.object(settings, "request_timeout_ms", 2000):
+            assert request_timeout({}) == 2.0
+
+    def test_header_shortens(self) -> None:
+        """Test that clients can shorten but not extend the server timeout."""
+        with patch.object(settings, "request_timeout_ms", 2000):
+            assert request_timeout({"x-request-timeout-ms": "500"}) == 0.5
+            assert request_timeout({"x-request-timeout-ms": "5000"}) == 2.0
+
+    def test_unlimited(self) -> None:
+        """Test that only the header applies when the setting is unset."""
+        with patch.object(settings, "request_timeout_ms", None):
+            assert request_timeout({}) is None
+            assert request_timeout({"x-request-timeout-ms": "5000"}) == 5.0
+
+    def test_route_override(self) -> None:
+        """Test that per-route timeouts replace the default for their path only."""
+        overrides = {"/api/page-to-structures": 120_000, "/api/depiction/batch": None}
+        with (
+            patch.object(settings, "request_timeout_ms", 2000),
+            patch.object(settings, "route_timeouts_ms", overrides),
+        ):
+            assert request_timeout({}, "/api/page-to-structures") == 120.0
+            assert request_timeout({}, "/api/depiction/batch") is None
+            assert request_timeout({}, "/api/image-to-structure") == 2.0
+            assert request_timeout({"x-request-timeout-ms": "500"}, "/api/depiction/batch") == 0.5
+
+    @pytest.mark.parametrize("value", ["0", "-5", "soon"])
+    def test_invalid(self, value: str) -> None:
+        """Test that non-positive and non-numeric timeouts are rejected."""
+        with pytest.raises(ValueError):
+            request_timeout({"x-request-timeout-ms": value})
+
+
+class TestDeadlineEndpoints:
+    """Tests for deadline handling of the API."""
+
+    def test_invalid_header(self, client: TestClient) -> None:
+        """Test that an invalid timeout header is rejected with 400."""
+        response = client.post(
+            "/api/name-to-structure",
+            json={"name": "isopentane"},
+            headers={"X-Request-Timeout-Ms": "soon"},
+        )
+
+        assert response.status_code == 400
+        assert response.json()["error_code"] == "INVALID_TIMEOUT"
+
+    def test_service_deadline_check(self, client: TestClient) -> None:
+        """Test that a service stopping at a deadline check yields 504."""
+        with patch(
+            "app.services.naming.convert_name",
+            side_effect=DeadlineExceededError("Request deadline exceeded"),
+        ):
+            response = client.post("/api/name-to-structure", json={"name": "isopentane"})
+
+        assert response.status_code == 504
+        assert response.json()["error_code"] == "DEADLINE_EXCEEDED"
+
+    def test_slow_conversion_is_cancelled(self, client: TestClient) -> None:
+        """Test that a conversion still running at the deadline is answered with 504."""
+        seen: list[Deadline | None] = []
+        released = threading.Event()
+
+        def slow_recognition(image_bytes: bytes) -> Conversion:
+            seen.append(current_deadline())
+            released.wait(timeout=5)
+            return Conversion("C", "ml", "model")
+
+        png = io.BytesIO()
+        Image.new("L", (8, 8), 255).save(png, format="PNG")
+        with patch("app.services.ocsr.convert_image", side_effect=slow_recognition):
+            started = time.monotonic()
+            response = client.post(
+                "/api/image-to-structure",
+                files={"image": ("page.png", png.getvalue(), "image/png")},
+                headers={"X-Request-Timeout-Ms": "100"},
+            )
+            elapsed = time.monotonic() - started
+            released.set()
+
+        assert response.status_code == 504
+        assert response.json()["error_code"] == "DEADLINE_EXCEEDED"
+        assert elapsed < 2
+        assert seen[0] is not None and seen[0].expired
+        assert seen[0].reason == "deadline"
+
+    def test_non_api_paths_are_exempt(self, client: TestClient) -> None:
+        """Test that the timeout header is not applied outside of the API."""
+        response = client.get("/health", headers={"X-Request-Timeout-Ms": "soon"})
+
+        assert response.status_code == 200
+
+
+class TestDisconnect:
+    """Tests for cancellation on client disconnect."""
+
+    async def test_cancels_on_disconnect(self) -> None:
+        """Test that the handler is cancelled and its deadline marked on disconnect."""
+        seen: list[Deadline | None] = []
+        finished = asyncio.Event()
+
+        async def app(scope: Scope, receive: Receive, send: Send) -> None:
+            seen.append(current_deadline())
+            await receive()
+            await asyncio.sleep(10)
+            finished.set()
+
+        messages: list[Message] = [
+            {"type": "http.request", "body": b"", "more_body": False},
+            {"type": "http.disconnect"},
+        ]
+
+        async def receive() -> Message:
+            if len(messages) == 1:
+                await asyncio.sleep(0.05)
+            return messages.pop(0)
+
+        sent: list[Message] = []
+
+        async def send(message: Message) -> None:
+            sent.append(message)
+
+        scope = {"type": "http", "path": "/api/image-to-structure", "headers": []}
+        await asyncio.wait_for(DeadlineMiddleware(app)(scope, receive, send), timeout=2)
+
+        assert not finished.is_set()
+        assert seen[0] is not None and seen[0].expired
+        assert seen[0].reason == "disconnect"
+        assert sent[0]["status"] == 504
+
+    async def test_forwards_disconnect(self) -> None:
+        """Test that the app receives http.disconnect instead of waiting forever."""
+        received: list[Message] = []
+
+        async def app(scope: Scope, receive: Receive, send: Send) -> None:
+            await receive()
+            try:
+                received.append(await receive())
+            finally:
+                # Cleanup after cancellation may still read the request.
+                received.append(await receive())
+
+        messages: list[Message] = [
+            {"type": "http.request", "body": b"", "more_body": False},
+            {"type": "http.disconnect"},
+        ]
+
+        async def receive() -> Message:
+            if len(messages) == 1:
+                await asyncio.sleep(0.05)
+            return messages.pop(0)
+
+        async def send(message: Message) -> None:
+            pass
+
+        scope = {"type": "http", "path": "/api/image-to-structure", "headers": []}
+        await asyncio.wait_for(DeadlineMiddleware(app)(scope, receive, send), timeout=2)
+
+        assert received
+        assert all(message["type"] == "http.disconnect" for message in received)
+
+    async def test_receive_error_is_not_a_timeout(self) -> None:
+        """Test that a failing receive cancels the handler and re-raises the error."""
+        seen: list[Deadline | None] = []
+
+        async def app(scope: Scope, receive: Receive, send: Send) -> None:
+            seen.append(current_deadline())
+            await asyncio.sleep(10)
+
+        async def receive() -> Message:
+            await asyncio.sleep(0.05)
+            raise RuntimeError("connection reset")
+
+        sent: list[Message] = []
+
+        async def send(message: Message) -> None:
+            sent.append(message)
+
+        scope = {"type": "http", "path": "/api/image-to-structure", "headers": []}
+        with pytest.raises(RuntimeError, match="connection reset"):
+            await asyncio.wait_for(DeadlineMiddleware(app)(scope, receive, send), timeout=2)
+
+        assert seen[0] is not None and seen[0].reason == "receive_error"
+        assert sent == []
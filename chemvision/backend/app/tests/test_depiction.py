@@ -0,0 +1,141 @@
+"""Unit tests for 2D layout and structure depiction."""
+
+import io
+import math
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.core.deadline import Deadline, DeadlineExceededError, deadline_scope
+from app.services.depiction import DepictionCache, depict, get_depiction_cache
+from app.services.layout import compute_coords, smallest_rings
+from app.services.molgraph import parse_smiles
+
+
+def _bond_lengths(smiles: str) -> list[float]:
+    graph = parse_smiles(smiles)
+    coords = compute_coords(graph)
+    return [math.dist(coords[b.begin], coords[b.end]) for b in graph.bonds]
+
+
+def _min_atom_distance(smiles: str) -> float:
+    coords = compute_coords(parse_smiles(smiles))
+    return min(math.dist(a, b) for i, a in enumerate(coords) for b in coords[i + 1 :])
+
+
+class TestLayout:
+    """Tests for ring perception and 2D coordinates."""
+
+    def test_smallest_rings(self) -> None:
+        """Test that fused and spiro systems yield one ring per drawn ring."""
+        assert sorted(len(r) for r in smallest_rings(parse_smiles("c1ccc2ccccc2c1"))) == [6, 6]
+        assert sorted(len(r) for r in smallest_rings(parse_smiles("C1CCC2(CC1)CCCC2"))) == [5, 6]
+        assert smallest_rings(parse_smiles("CCCC")) == []
+
+    @pytest.mark.parametrize(
+        "smiles",
+        [
+            "CCCCCC",
+            "CC(C)(C)CC",
+            "c1ccccc1",
+            "c1ccc2ccccc2c1",
+            "C1CCC2(CC1)CCCC2",
+            "CC(=O)Oc1ccccc1C(=O)O",
+            "CC(C)CCCC(C)C1CCC2C1(CCC3C2CC=C4C3(CCC(C4)O)C)C",
+        ],
+    )
+    def test_unit_bond_lengths(self, smiles: str) -> None:
+        """Test that chains, rings and fused rings are drawn with equal bond lengths."""
+        assert all(abs(length - 1) < 1e-6 for length in _bond_lengths(smiles))
+
+    @pytest.mark.parametrize(
+        "smiles", ["CC(=O)Oc1ccccc1C(=O)O", "CC(C)Cc1ccc(cc1)C(C)C(=O)O", "Cc1c(C)c(C)c(C)c(C)c1C"]
+    )
+    def test_atoms_do_not_overlap(self, smiles: str) -> None:
+        """Test that substituents are placed clear of other atoms."""
+        assert _min_atom_distance(smiles) > 0.7
+
+    def test_linear_triple_bond(self) -> None:
+        """Test that atoms around a triple bond are collinear."""
+        (x0, y0), (x1, y1), (x2, y2) = compute_coords(parse_smiles("CC#N"))
+        assert abs((x1 - x0) * (y2 - y1) - (y1 - y0) * (x2 - x1)) < 1e-6
+
+    def test_components_side_by_side(self) -> None:
+        """Test that disconnected components do not overlap."""
+        coords = compute_coords(parse_smiles("c1ccccc1.CCO"))
+        assert max(x for x, _ in coords[:6]) < min(x for x, _ in coords[6:])
+
+    def test_stops_at_deadline(self) -> None:
+        """Test that laying out a molecule stops once the request deadline has passed."""
+        with deadline_scope(Deadline(0)), pytest.raises(DeadlineExceededError):
+            compute_coords(parse_smiles("C" * 200))
+
+
+class TestDepict:
+    """Tests for SVG and PNG rendering."""
+
+    def test_svg(self) -> None:
+        """Test that SVG output is well-formed and labels heteroatoms only."""
+        image = depict("NCC(=O)O", "svg", 300, 200)
+
+        root = ET.fromstring(image.data)
+        namespace = "{http://www.w3.org/2000/svg}"
+        assert image.media_type == "image/svg+xml"
+        assert (root.get("width"), root.get("height")) == ("300", "200")
+        labels = sorted(t.text or "" for t in root.iter(f"{namespace}text"))
+        assert [label.strip("H2") for label in labels] == ["N", "O", "O"]
+        assert len(list(root.iter(f"{namespace}line"))) == 5  # C=O is drawn twice
+
+    def test_aromatic_ring_circle(self) -> None:
+        """Test that aromatic rings are drawn with an inner circle."""
+        root = ET.fromstring(depict("c1ccccc1", "svg", 200, 200).data)
+
+        assert len(list(root.iter("{http://www.w3.org/2000/svg}circle"))) == 1
+
+    def test_png(self) -> None:
+        """Test that PNG output decodes at the requested size and is not blank."""
+        image = depict("CC(=O)Oc1ccccc1C(=O)O", "png", 120, 80)
+
+        decoded = Image.open(io.BytesIO(image.data))
+        assert image.media_type == "image/png"
+        assert decoded.size == (120, 80)
+        assert np.asarray(decoded.convert("L")).min() < 100
+
+    def test_cached_by_structure(self) -> None:
+        """Test that equivalent SMILES are served from one cache entry."""
+        cache = get_depiction_cache()
+        cache.clear()
+
+        first = depict("CCO", "svg", 100, 100)
+        second = depict("OCC", "svg", 100, 100)
+        depict("CCO", "svg", 100, 120)
+
+        assert second.data is first.data
+        assert len(cache) == 2
+
+
+class TestDepictionCache:
+    """Tests for the size-bounded LRU cache."""
+
+    def test_evicts_least_recently_used(self) -> None:
+        """Test that entries are evicted by total size, oldest use first."""
+        cache = DepictionCache(max_bytes=10)
+        cache.set(("a", "svg", 1, 1), b"1234")
+        cache.set(("b", "svg", 1, 1), b"1234")
+        assert cache.get(("a", "svg", 1, 1)) == b"1234"
+
+        cache.set(("c", "svg", 1, 1), b"1234")
+
+        assert cache.get(("b", "svg", 1, 1)) is None
+        assert cache.get(("a", "svg", 1, 1)) is not None
+        assert cache.nbytes == 8
+
+    def test_replace_updates_size(self) -> None:
+        """Test that overwriting an entry does not double count its size."""
+        cache = DepictionCache(max_bytes=100)
+        cache.set(("a", "png", 1, 1), b"12345")
+        cache.set(("a", "png", 1, 1), b"12")
+
+        assert (len(cache), cache.nbytes) == (1, 2)
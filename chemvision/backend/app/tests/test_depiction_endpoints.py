@@ -0,0 +1,124 @@
+"""Tests for the structure depiction endpoints."""
+
+import base64
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+class TestDepiction:
+    """Tests for the GET depiction endpoint."""
+
+    def test_svg(self, client: TestClient) -> None:
+        """Test that an SVG is returned with caching headers."""
+        response = client.get("/api/depiction", params={"smiles": "CC(C)CC"})
+
+        assert response.status_code == 200
+        assert response.headers["Content-Type"].startswith("image/svg+xml")
+        assert response.content.startswith(b"<svg")
+        assert response.headers["ETag"].startswith('"')
+        assert "max-age=" in response.headers["Cache-Control"]
+
+    def test_png(self, client: TestClient) -> None:
+        """Test PNG output at a requested size."""
+        response = client.get(
+            "/api/depiction",
+            params={"smiles": "c1ccccc1O", "format": "png", "width": 64, "height": 48},
+        )
+
+        assert response.status_code == 200
+        assert response.headers["Content-Type"] == "image/png"
+        assert response.content.startswith(b"\x89PNG")
+
+    def test_etag_uses_canonical_structure(self, client: TestClient) -> None:
+        """Test that SMILES spellings of one molecule share an ETag, sizes do not."""
+        first = client.get("/api/depiction", params={"smiles": "CC(C)CC"})
+        second = client.get("/api/depiction", params={"smiles": "CCC(C)C"})
+        larger = client.get("/api/depiction", params={"smiles": "CC(C)CC", "width": 400})
+
+        assert first.headers["ETag"] == second.headers["ETag"]
+        assert first.headers["ETag"] != larger.headers["ETag"]
+
+    def test_if_none_match_returns_304(self, client: TestClient) -> None:
+        """Test that revalidation does not render the image again."""
+        etag = client.get("/api/depiction", params={"smiles": "CCO"}).headers["ETag"]
+
+        with patch("app.services.depiction.depict") as depict:
+            response = client.get(
+                "/api/depiction", params={"smiles": "OCC"}, headers={"If-None-Match": etag}
+            )
+            depict.assert_not_called()
+
+        assert response.status_code == 304
+        assert response.content == b""
+
+    def test_invalid_smiles(self, client: TestClient) -> None:
+        """Test that unparseable SMILES return 400 and are not cached."""
+        response = client.get("/api/depiction", params={"smiles": "C(C"})
+
+        assert response.status_code == 400
+        assert response.json()["detail"]["error_code"] == "INVALID_SMILES"
+        assert response.headers["Cache-Control"] == "no-store"
+
+    def test_empty_component(self, client: TestClient) -> None:
+        """Test that SMILES with no atoms or an empty component return 400."""
+        for smiles in [".", "..", "C..C"]:
+            response = client.get("/api/depiction", params={"smiles": smiles})
+
+            assert response.status_code == 400
+            assert response.json()["detail"]["error_code"] == "INVALID_SMILES"
+
+    def test_validation(self, client: TestClient) -> None:
+        """Test that sizes and formats are validated."""
+        params = {"smiles": "CC"}
+        assert client.get("/api/depiction", params={**params, "width": 8}).status_code == 422
+        assert client.get("/api/depiction", params={**params, "format": "gif"}).status_code == 422
+
+
+class TestDepictionBatch:
+    """Tests for the batch depiction endpoint."""
+
+    def test_batch(self, client: TestClient) -> None:
+        """Test that each molecule gets a data URI or an error, in request order."""
+        response = client.post(
+            "/api/depiction/batch",
+            json={"smiles": ["CCO", "C(C", "c1ccccc1"], "format": "png", "width": 80, "height": 60},
+        )
+
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [r["smiles"] for r in results] == ["CCO", "C(C", "c1ccccc1"]
+        assert results[1]["image"] is None
+        assert results[1]["error"]["error_code"] == "INVALID_SMILES"
+        header, data = results[0]["image"].split(",", 1)
+        assert header == "data:image/png;base64"
+        assert base64.b64decode(data).startswith(b"\x89PNG")
+
+    def test_batch_empty_component(self, client: TestClient) -> None:
+        """Test that an atomless SMILES fails only its own item."""
+        response = client.post("/api/depiction/batch", json={"smiles": [".", "C"]})
+
+        assert response.status_code == 200
+        first, second = response.json()["results"]
+        assert first["error"]["error_code"] == "INVALID_SMILES"
+        assert second["image"].startswith("data:image/svg+xml;base64,")
+
+    def test_batch_matches_single_render(self, client: TestClient) -> None:
+        """Test that batch and GET renderings of a molecule are identical."""
+        single = client.get("/api/depiction", params={"smiles": "CC(C)CC"}).content
+        batch = client.post("/api/depiction/batch", json={"smiles": ["CCC(C)C"]}).json()
+
+        data = batch["results"][0]["image"].removeprefix("data:image/svg+xml;base64,")
+        assert base64.b64decode(data) == single
+
+    def test_validation(self, client: TestClient) -> None:
+        """Test that empty batches are rejected."""
+        assert client.post("/api/depiction/batch", json={"smiles": []}).status_code == 422
+
+    @pytest.mark.parametrize("smiles", ["", "C" * 1001])
+    def test_item_length(self, client: TestClient, smiles: str) -> None:
+        """Test that each SMILES of a batch is limited like the single-image query."""
+        response = client.post("/api/depiction/batch", json={"smiles": ["CCO", smiles]})
+
+        assert response.status_code == 422
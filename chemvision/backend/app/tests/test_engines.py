@@ -0,0 +1,148 @@
+"""Unit tests for tiered engine routing."""
+
+import threading
+import time
+from collections.abc import Callable
+
+import pytest
+
+from app.core.deadline import Deadline, DeadlineExceededError, deadline_scope
+from app.services.engines import Engine, EngineRouter
+
+
+def _answer(value: str | None, delay: float = 0.0) -> Callable[[str], str | None]:
+    def convert(query: str) -> str | None:
+        time.sleep(delay)
+        return value
+
+    return convert
+
+
+def _fail(query: str) -> str | None:
+    raise RuntimeError("engine crashed")
+
+
+class TestInlineTiers:
+    """Tests for inline and fallback engines."""
+
+    def test_first_answer_wins(self) -> None:
+        """Test that tiers are tried in order and the first answer is returned."""
+        router = EngineRouter(
+            [
+                Engine("dictionary", "demo", _answer(None), inline=True),
+                Engine("rules", "tool", _answer("CC"), inline=True),
+                Engine("model", "ml", _answer("CCC")),
+            ]
+        )
+
+        assert router.convert("ethane") == ("CC", "tool", "rules")
+
+    def test_fallback_runs_last(self) -> None:
+        """Test that fallback engines only answer when exact engines do not."""
+        router = EngineRouter(
+            [
+                Engine("fuzzy", "demo", _answer("C"), inline=True, fallback=True),
+                Engine("dictionary", "demo", _answer(None), inline=True),
+                Engine("model", "ml", _answer(None)),
+            ]
+        )
+
+        assert [engine.name for engine in router.order()] == ["dictionary", "model", "fuzzy"]
+        assert router.convert("methan") == ("C", "demo", "fuzzy")
+
+    def test_no_answer(self) -> None:
+        """Test that None is returned when no engine answers."""
+        router = EngineRouter([Engine("dictionary", "demo", _answer(None), inline=True)])
+
+        assert router.convert("unknown") is None
+
+    def test_errors_are_misses(self) -> None:
+        """Test that a failing engine is skipped and counted."""
+        router = EngineRouter(
+            [
+                Engine("broken", "tool", _fail, inline=True),
+                Engine("dictionary", "demo", _answer("C"), inline=True),
+            ]
+        )
+
+        assert router.convert("methane") == ("C", "demo", "dictionary")
+        assert router.stats()["broken"]["errors"] == 1
+
+    def test_duplicate_name(self) -> None:
+        """Test that engine names must be unique."""
+        router = EngineRouter([Engine("dictionary", "demo", _answer(None), inline=True)])
+
+        with pytest.raises(ValueError):
+            router.register(Engine("dictionary", "demo", _answer(None)))
+
+
+class TestHedging:
+    """Tests for hedged engines."""
+
+    def test_hedges_after_budget(self) -> None:
+        """Test that a slow engine is hedged with the next one and the first answer wins."""
+        release = threading.Event()
+
+        def slow(query: str) -> str | None:
+            release.wait(timeout=5)
+            return "slow"
+
+        router = EngineRouter(
+            [
+                Engine("tool", "tool", slow, budget=0.01),
+                Engine("model", "ml", _answer("fast"), budget=1.0),
+            ]
+        )
+
+        started = time.monotonic()
+        result = router.convert("query")
+        release.set()
+
+        assert result == ("fast", "ml", "model")
+        assert time.monotonic() - started < 1.0
+
+    def test_miss_launches_next_without_waiting(self) -> None:
+        """Test that a miss moves to the next engine before the budget is used up."""
+        router = EngineRouter(
+            [
+                Engine("tool", "tool", _answer(None), budget=10.0),
+                Engine("model", "ml", _answer("C"), budget=10.0),
+            ]
+        )
+
+        started = time.monotonic()
+
+        assert router.convert("query") == ("C", "ml", "model")
+        assert time.monotonic() - started < 1.0
+
+    def test_learns_order(self) -> None:
+        """Test that engines that answer fast and reliably move forward."""
+        router = EngineRouter(
+            [
+                Engine("tool", "tool", _answer(None), budget=0.01),
+                Engine("model", "ml", _answer("C"), budget=0.05),
+            ]
+        )
+        assert [engine.name for engine in router.order()] == ["tool", "model"]
+
+        for _ in range(30):
+            router.convert("query")
+
+        assert [engine.name for engine in router.order()] == ["model", "tool"]
+        assert router.stats()["model"]["success_rate"] > 0.9
+
+    def test_deadline(self) -> None:
+        """Test that hedged routing stops at the request deadline."""
+        release = threading.Event()
+
+        def slow(query: str) -> str | None:
+            release.wait(timeout=5)
+            return "C"
+
+        router = EngineRouter([Engine("model", "ml", slow, budget=10.0)])
+
+        try:
+            with deadline_scope(Deadline(0.05)), pytest.raises(DeadlineExceededError):
+                router.convert("query")
+        finally:
+            release.set()
@@ -11,7 +11,7 @@ class TestGlobalExceptionHandler:
     def test_unhandled_exception_returns_500(self, client: TestClient) -> None:
         """Test that unhandled exceptions return 500 status."""
         # We'll use a mock to force an exception in an endpoint
-        with patch("app.services.naming.name_to_smiles", side_effect=RuntimeError("Test error")):
+        with patch("app.services.naming.convert_name", side_effect=RuntimeError("Test error")):
             response = client.post(
                 "/api/name-to-structure",
                 json={"name": "test"},
@@ -21,7 +21,7 @@ class TestGlobalExceptionHandler:
 
     def test_exception_response_format(self, client: TestClient) -> None:
         """Test that exception response has correct format."""
-        with patch("app.services.naming.name_to_smiles", side_effect=RuntimeError("Test error")):
+        with patch("app.services.naming.convert_name", side_effect=RuntimeError("Test error")):
             response = client.post(
                 "/api/name-to-structure",
                 json={"name": "test"},
@@ -35,7 +35,7 @@ class TestGlobalExceptionHandler:
 
     def test_exception_includes_correlation_id(self, client: TestClient) -> None:
         """Test that exceptions include correlation ID."""
-        with patch("app.services.naming.name_to_smiles", side_effect=RuntimeError("Test error")):
+        with patch("app.services.naming.convert_name", side_effect=RuntimeError("Test error")):
             response = client.post(
                 "/api/name-to-structure",
                 json={"name": "test"},
@@ -110,7 +110,7 @@ class TestEndpointExceptionHandling:
 
     def test_name_to_structure_handles_service_error(self, client: TestClient) -> None:
         """Test name-to-structure handles service errors gracefully."""
-        with patch("app.services.naming.name_to_smiles", side_effect=ValueError("Invalid input")):
+        with patch("app.services.naming.convert_name", side_effect=ValueError("Invalid input")):
             response = client.post(
                 "/api/name-to-structure",
                 json={"name": "test"},
@@ -121,7 +121,7 @@ class TestEndpointExceptionHandling:
 
     def test_structure_to_name_handles_service_error(self, client: TestClient) -> None:
         """Test structure-to-name handles service errors gracefully."""
-        with patch("app.services.naming.smiles_to_name", side_effect=ValueError("Invalid SMILES")):
+        with patch("app.services.naming.convert_smiles", side_effect=ValueError("Invalid SMILES")):
             response = client.post(
                 "/api/structure-to-name",
                 json={"smiles": "CC"},
@@ -138,7 +138,7 @@ class TestEndpointExceptionHandling:
             b"\x00\x00\x05\x00\x01\r\n-\xb4\x00\x00\x00\x00IEND\xaeB`\x82"
         )
         with patch(
-            "app.services.ocsr.image_to_smiles", side_effect=ValueError("Image processing error")
+            "app.services.ocsr.convert_image", side_effect=ValueError("Image processing error")
         ):
             response = client.post(
                 "/api/image-to-structure",
@@ -0,0 +1,223 @@
+"""Unit tests for fingerprints and the similarity index."""
+
+import fcntl
+import json
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.services.fingerprint import FingerprintIndex, morgan_fingerprint
+from app.services.molgraph import SmilesError
+
+MOLECULES = [
+    "CC(C)CC",
+    "CCCCC",
+    "CC(C)(C)C",
+    "c1ccccc1",
+    "Cc1ccccc1",
+    "CCc1ccccc1",
+    "CC(=O)Oc1ccccc1C(=O)O",
+    "CCO",
+]
+
+
+@pytest.fixture
+def index() -> FingerprintIndex:
+    """Create an index populated with a few molecules."""
+    idx = FingerprintIndex(n_bits=512)
+    for smiles in MOLECULES:
+        idx.add(smiles)
+    return idx
+
+
+class TestMorganFingerprint:
+    """Tests for morgan_fingerprint."""
+
+    def test_shape_and_dtype(self) -> None:
+        """Test packed layout."""
+        fp = morgan_fingerprint("CCO", n_bits=1024)
+        assert fp.dtype == np.uint64
+        assert fp.shape == (16,)
+
+    def test_deterministic(self) -> None:
+        """Test that fingerprints are stable across calls."""
+        assert (morgan_fingerprint("c1ccccc1O") == morgan_fingerprint("c1ccccc1O")).all()
+
+    def test_independent_of_atom_order(self) -> None:
+        """Test that equivalent SMILES give the same fingerprint."""
+        assert (morgan_fingerprint("OCC") == morgan_fingerprint("CCO")).all()
+
+    def test_different_molecules_differ(self) -> None:
+        """Test that different structures give different fingerprints."""
+        assert (morgan_fingerprint("CCO") != morgan_fingerprint("CCN")).any()
+
+    def test_rejects_bad_length(self) -> None:
+        """Test that lengths must be multiples of 64."""
+        with pytest.raises(ValueError):
+            morgan_fingerprint("C", n_bits=100)
+
+
+class TestFingerprintIndex:
+    """Tests for FingerprintIndex."""
+
+    def test_add_deduplicates(self, index: FingerprintIndex) -> None:
+        """Test that re-adding a molecule is a no-op."""
+        assert not index.add("CCO")
+        assert len(index) == len(MOLECULES)
+        assert "CCO" in index
+
+    def test_add_deduplicates_spellings(self, index: FingerprintIndex) -> None:
+        """Test that another SMILES of an indexed molecule is not added again."""
+        assert not index.add("OCC")
+        assert not index.add("C(C)(C)CC")
+        assert "OCC" in index
+        assert "C(C" not in index
+        assert [smiles for smiles, _ in index.search("OCC", k=1)] == ["CCO"]
+
+    def test_add_keeps_refinement_equivalent_structures(self) -> None:
+        """Test that distinct molecules alike under neighbour refinement are both indexed."""
+        index = FingerprintIndex()
+
+        assert index.add("C12C3C4C1C5C2C3C45")
+        assert index.add("C1%10C%11C%12C%13C%10C%11C%12C1%13")
+        assert len(index) == 2
+
+    def test_add_rejects_invalid_smiles(self, index: FingerprintIndex) -> None:
+        """Test that invalid SMILES are rejected."""
+        with pytest.raises(SmilesError):
+            index.add("C(C")
+
+    def test_exact_match_ranks_first(self, index: FingerprintIndex) -> None:
+        """Test that an indexed molecule is its own best hit."""
+        hits = index.search("Cc1ccccc1", k=3)
+        assert hits[0] == ("Cc1ccccc1", 1.0)
+        assert len(hits) == 3
+        assert [s for _, s in hits] == sorted((s for _, s in hits), reverse=True)
+
+    def test_matches_brute_force(self, index: FingerprintIndex) -> None:
+        """Test that pruned search returns the exact top-k."""
+        query = index.fingerprint("CCc1ccccc1C")
+
+        def tanimoto(smiles: str) -> float:
+            fp = index.fingerprint(smiles)
+            common = int(np.bitwise_count(fp & query).sum())
+            union = int(np.bitwise_count(fp | query).sum())
+            return common / union
+
+        expected = sorted(MOLECULES, key=tanimoto, reverse=True)[:4]
+        hits = index.search("CCc1ccccc1C", k=4)
+        assert [s for s, _ in hits] == expected
+        for smiles, score in hits:
+            assert score == pytest.approx(tanimoto(smiles))
+
+    def test_threshold(self, index: FingerprintIndex) -> None:
+        """Test that hits below the threshold are dropped."""
+        hits = index.search("c1ccccc1", k=10, threshold=0.99)
+        assert hits == [("c1ccccc1", 1.0)]
+
+    def test_empty_index(self) -> None:
+        """Test search on an empty index."""
+        assert FingerprintIndex().search("CCO") == []
+
+    def test_save_and_load(self, index: FingerprintIndex, tmp_path: Path) -> None:
+        """Test that a saved index loads memory-mapped with identical results."""
+        index.save(tmp_path / "index")
+        loaded = FingerprintIndex.load(tmp_path / "index")
+
+        assert len(loaded) == len(index)
+        assert loaded.n_bits == 512
+        assert loaded.search("CCO", k=3) == index.search("CCO", k=3)
+        assert loaded.add("CCN")
+        assert loaded.search("CCN", k=1) == [("CCN", 1.0)]
+
+    def test_save_replaces_files_atomically(self, index: FingerprintIndex, tmp_path: Path) -> None:
+        """Test that saving over a memory-mapped index leaves the loaded copy intact."""
+        index.save(tmp_path / "index")
+        loaded = FingerprintIndex.load(tmp_path / "index")
+        before = loaded.search("CCO", k=3)
+
+        index.add("CCN")
+        index.save(tmp_path / "index")
+
+        assert loaded.search("CCO", k=3) == before
+        assert len(FingerprintIndex.load(tmp_path / "index")) == len(MOLECULES) + 1
+        assert not list((tmp_path / "index").glob("*.tmp"))
+
+    def test_save_merges_other_workers(self, index: FingerprintIndex, tmp_path: Path) -> None:
+        """Test that merging keeps molecules saved by another process."""
+        index.save(tmp_path / "index")
+        worker = FingerprintIndex(n_bits=512)
+        worker.add("CCN")
+        worker.add("OCC")
+
+        worker.save(tmp_path / "index", merge=True)
+        merged = FingerprintIndex.load(tmp_path / "index")
+
+        assert len(merged) == len(MOLECULES) + 1
+        assert "CCN" in merged and "CC(C)CC" in merged
+        assert merged.search("CCN", k=1) == [("CCN", 1.0)]
+        assert merged.search("OCC", k=1) == [("CCO", 1.0)]
+        assert len(worker) == 2
+
+    def test_save_without_merge_replaces(self, index: FingerprintIndex, tmp_path: Path) -> None:
+        """Test that a plain save writes only the saving index."""
+        index.save(tmp_path / "index")
+        worker = FingerprintIndex(n_bits=512)
+        worker.add("CCN")
+
+        worker.save(tmp_path / "index")
+
+        assert len(FingerprintIndex.load(tmp_path / "index")) == 1
+
+    def test_save_waits_for_lock(self, index: FingerprintIndex, tmp_path: Path) -> None:
+        """Test that only one process writes (or reads) the index directory at a time."""
+        directory = tmp_path / "index"
+        directory.mkdir()
+        saved = threading.Event()
+
+        def save() -> None:
+            index.save(directory)
+            saved.set()
+
+        with open(directory / ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            thread = threading.Thread(target=save)
+            thread.start()
+            assert not saved.wait(0.2)
+            fcntl.flock(lock, fcntl.LOCK_UN)
+        thread.join(timeout=5)
+
+        assert saved.is_set()
+        assert (directory / "meta.json").exists()
+
+    def test_load_without_keys(self, index: FingerprintIndex, tmp_path: Path) -> None:
+        """Test that indexes saved without structure keys still load and deduplicate."""
+        index.save(tmp_path / "index")
+        (tmp_path / "index" / "keys.txt").unlink()
+
+        loaded = FingerprintIndex.load(tmp_path / "index")
+
+        assert not loaded.add("OCC")
+
+    def test_load_recomputes_outdated_keys(self, index: FingerprintIndex, tmp_path: Path) -> None:
+        """Test that keys saved by an older structure_key are not trusted."""
+        index.save(tmp_path / "index")
+        meta_path = tmp_path / "index" / "meta.json"
+        meta = json.loads(meta_path.read_text())
+        del meta["structure_key_version"]
+        meta_path.write_text(json.dumps(meta))
+        keys_path = tmp_path / "index" / "keys.txt"
+        keys_path.write_text("stale\n" * len(keys_path.read_text().splitlines()))
+
+        loaded = FingerprintIndex.load(tmp_path / "index")
+
+        assert not loaded.add("OCC")
+
+    def test_load_rejects_inconsistent_files(self, index: FingerprintIndex, tmp_path: Path) -> None:
+        """Test that a truncated SMILES list is detected."""
+        index.save(tmp_path / "index")
+        (tmp_path / "index" / "smiles.txt").write_text("CCO\n")
+        with pytest.raises(ValueError):
+            FingerprintIndex.load(tmp_path / "index")
@@ -0,0 +1,127 @@
+"""Tests for the fuzzy name index."""
+
+import random
+
+import pytest
+
+from app.services.fuzzy import FuzzyIndex, damerau_levenshtein, fold_name
+
+
+def _mutate(rng: random.Random, text: str, edits: int) -> str:
+    for _ in range(edits):
+        i = rng.randrange(len(text))
+        op = rng.randrange(4)
+        if op == 0:
+            text = text[:i] + text[i + 1 :]
+        elif op == 1:
+            text = text[:i] + rng.choice("abcdehlmnoy") + text[i:]
+        elif op == 2:
+            text = text[:i] + rng.choice("abcdehlmnoy") + text[i + 1 :]
+        elif i < len(text) - 1:
+            text = text[:i] + text[i + 1] + text[i] + text[i + 2 :]
+    return text
+
+
+class TestDamerauLevenshtein:
+    """Tests for damerau_levenshtein function."""
+
+    @pytest.mark.parametrize(
+        ("a", "b", "expected"),
+        [
+            ("ethanol", "ethanol", 0),
+            ("ethanol", "ethanal", 1),
+            ("ethanol", "ehtanol", 1),
+            ("ethanol", "ethnol", 1),
+            ("ethanol", "methanol", 1),
+            ("propane", "porpnae", 2),
+            ("", "ab", 2),
+        ],
+    )
+    def test_distances(self, a: str, b: str, expected: int) -> None:
+        """Test distances within the bound."""
+        assert damerau_levenshtein(a, b, 2) == expected
+        assert damerau_levenshtein(b, a, 2) == expected
+
+    def test_bounded(self) -> None:
+        """Test that distances above the bound return bound + 1."""
+        assert damerau_levenshtein("methane", "butanone", 2) == 3
+        assert damerau_levenshtein("a", "abcdef", 1) == 2
+
+
+class TestFoldName:
+    """Tests for fold_name function."""
+
+    def test_ignores_case_spaces_and_hyphens(self) -> None:
+        """Test that punctuation variants fold to the same key."""
+        assert fold_name("Iso-Pentane") == "isopentane"
+        assert fold_name(" 2,2 dimethylpropane ") == fold_name("2,2-dimethylpropane")
+
+
+class TestFuzzyIndex:
+    """Tests for FuzzyIndex."""
+
+    def test_exact_and_near_matches(self) -> None:
+        """Test that exact and misspelled terms find the right entry."""
+        index = FuzzyIndex(["ethanol", "methanol", "propanol", "isopentane"])
+
+        assert index.lookup("ethanol") == ("ethanol", 0)
+        assert index.lookup("isopentan") == ("isopentane", 1)
+        assert index.lookup("ispoentane") == ("isopentane", 1)
+
+    def test_no_match(self) -> None:
+        """Test that distant queries return None."""
+        index = FuzzyIndex(["ethanol", "isopentane"])
+
+        assert index.lookup("cyclohexanone") is None
+        assert index.lookup("") is None
+        assert FuzzyIndex([]).lookup("ethanol") is None
+
+    def test_max_distance(self) -> None:
+        """Test that the per-query distance limit is honoured."""
+        index = FuzzyIndex(["isopentane"])
+
+        assert index.lookup("isopntan", max_distance=1) is None
+        assert index.lookup("isopntan", max_distance=2) == ("isopentane", 2)
+        assert index.lookup("isopentane", max_distance=0) == ("isopentane", 0)
+
+    def test_ties_prefer_first_term(self) -> None:
+        """Test that equally close terms resolve to the earliest inserted."""
+        index = FuzzyIndex(["ethanal", "ethanol"])
+
+        assert index.lookup("ethanil") == ("ethanal", 1)
+
+    def test_short_terms(self) -> None:
+        """Test that terms too short to partition are still matched."""
+        index = FuzzyIndex(["co", "cn", "h2o"])
+
+        assert index.lookup("h2o") == ("h2o", 0)
+        assert index.lookup("h20", max_distance=1) == ("h2o", 1)
+
+    def test_matches_brute_force(self) -> None:
+        """Test that lookups agree with an exhaustive scan."""
+        rng = random.Random(7)
+        parts = ["meth", "eth", "prop", "but", "chloro", "hydroxy", "yl", "ane", "ol", "2,3", "oxo"]
+        terms = list(
+            dict.fromkeys(
+                "".join(rng.choice(parts) for _ in range(rng.randint(1, 6))) for _ in range(1000)
+            )
+        )
+        index = FuzzyIndex(terms)
+
+        for term in rng.sample(terms, 100):
+            query = _mutate(rng, term, rng.randint(0, 3))
+            expected = None
+            for i, candidate in enumerate(terms):
+                distance = damerau_levenshtein(query, candidate, 2)
+                if distance <= 2 and (expected is None or distance < expected[0]):
+                    expected = (distance, i)
+            assert index.lookup(query) == (
+                None if expected is None else (terms[expected[1]], expected[0])
+            ), query
+
+    def test_memory_is_per_term(self) -> None:
+        """Test that the index size does not depend on term length."""
+        short = FuzzyIndex([f"{i:04d}ethane" for i in range(1000)])
+        long = FuzzyIndex([f"{i:04d}-" + "chloromethyl" * 10 for i in range(1000)])
+
+        assert short.nbytes == long.nbytes
@@ -0,0 +1,125 @@
+"""Unit tests for image decoding helpers."""
+
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.services.imaging import (
+    ImageDecodeError,
+    ImageTooLargeError,
+    decode_grayscale,
+    read_image_info,
+    validate_image,
+)
+
+
+def _encode(image: Image.Image, fmt: str) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+class TestDecodeGrayscale:
+    """Tests for decode_grayscale."""
+
+    def test_decodes_png(self) -> None:
+        """Test that a grayscale PNG decodes to the same pixels."""
+        pixels = np.arange(64, dtype=np.uint8).reshape(8, 8)
+        decoded = decode_grayscale(_encode(Image.fromarray(pixels), "PNG"))
+        assert decoded.dtype == np.uint8
+        assert (decoded == pixels).all()
+
+    def test_decodes_jpeg(self) -> None:
+        """Test that a colour JPEG decodes to a 2-D array."""
+        decoded = decode_grayscale(_encode(Image.new("RGB", (20, 10), (0, 0, 0)), "JPEG"))
+        assert decoded.shape == (10, 20)
+
+    def test_transparent_pixels_become_white(self) -> None:
+        """Test that transparency is composited onto white."""
+        image = Image.new("RGBA", (4, 4), (0, 0, 0, 0))
+        assert (decode_grayscale(_encode(image, "PNG")) == 255).all()
+
+    def test_rejects_garbage(self) -> None:
+        """Test that undecodable bytes raise ImageDecodeError."""
+        with pytest.raises(ImageDecodeError):
+            decode_grayscale(b"not an image")
+
+    def test_reduced_scale_jpeg(self) -> None:
+        """Test that large JPEGs are decoded at a reduced DCT scale."""
+        data = _encode(Image.new("RGB", (4000, 1000), (255, 255, 255)), "JPEG")
+
+        decoded = decode_grayscale(data, max_side=1000)
+
+        assert decoded.shape == (250, 1000)
+
+    def test_max_side_does_not_resize_png(self) -> None:
+        """Test that PNGs are decoded at full size regardless of max_side."""
+        data = _encode(Image.new("L", (400, 100), 255), "PNG")
+
+        assert decode_grayscale(data, max_side=100).shape == (100, 400)
+
+
+class TestReadImageInfo:
+    """Tests for read_image_info."""
+
+    @pytest.mark.parametrize(
+        ("mode", "color", "channels", "bit_depth"),
+        [
+            ("L", "gray", 1, 8),
+            ("I;16", "gray", 1, 16),
+            ("RGBA", "rgba", 4, 8),
+            ("1", "gray", 1, 1),
+        ],
+    )
+    def test_png(self, mode: str, color: str, channels: int, bit_depth: int) -> None:
+        """Test that PNG dimensions, color type and bit depth are read."""
+        info = read_image_info(_encode(Image.new(mode, (30, 20)), "PNG"))
+
+        assert (info.format, info.width, info.height) == ("png", 30, 20)
+        assert (info.color, info.channels, info.bit_depth) == (color, channels, bit_depth)
+
+    @pytest.mark.parametrize("progressive", [False, True])
+    def test_jpeg(self, progressive: bool) -> None:
+        """Test that baseline and progressive JPEG headers are read."""
+        buffer = io.BytesIO()
+        Image.new("RGB", (64, 48)).save(buffer, format="JPEG", progressive=progressive)
+
+        info = read_image_info(buffer.getvalue())
+
+        assert (info.format, info.width, info.height) == ("jpeg", 64, 48)
+        assert (info.color, info.channels, info.bit_depth) == ("ycbcr", 3, 8)
+
+    def test_reads_only_header(self) -> None:
+        """Test that the header alone is enough (pixel data is not touched)."""
+        data = _encode(Image.new("L", (500, 300)), "PNG")
+
+        assert read_image_info(data[:33]).width == 500
+
+    @pytest.mark.parametrize(
+        "data",
+        [b"", b"not an image", b"\x89PNG\r\n\x1a\n\x00\x00", b"\xff\xd8\xff\xda\x00\x02"],
+    )
+    def test_rejects_invalid_headers(self, data: bytes) -> None:
+        """Test that garbage and truncated headers raise ImageDecodeError."""
+        with pytest.raises(ImageDecodeError):
+            read_image_info(data)
+
+
+class TestValidateImage:
+    """Tests for validate_image."""
+
+    def test_accepts_within_limits(self) -> None:
+        """Test that images within both limits pass."""
+        data = _encode(Image.new("L", (100, 50)), "PNG")
+
+        assert validate_image(data, max_pixels=5000, max_dimension=100).pixels == 5000
+
+    @pytest.mark.parametrize(("max_pixels", "max_dimension"), [(4999, 100), (5000, 99)])
+    def test_rejects_over_limits(self, max_pixels: int, max_dimension: int) -> None:
+        """Test that exceeding either limit raises ImageTooLargeError."""
+        data = _encode(Image.new("L", (100, 50)), "PNG")
+
+        with pytest.raises(ImageTooLargeError):
+            validate_image(data, max_pixels=max_pixels, max_dimension=max_dimension)
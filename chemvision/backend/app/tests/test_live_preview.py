@@ -0,0 +1,161 @@
+"""Tests for the live name preview WebSocket."""
+
+import threading
+import time
+from collections.abc import Iterator
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.deadline import DeadlineExceededError, check_deadline, current_deadline
+from app.services.engines import Conversion
+
+ENDPOINT = "/api/ws/name-to-structure"
+
+
+@pytest.fixture(autouse=True)
+def short_debounce() -> Iterator[None]:
+    """Keep the debounce short but long enough for back-to-back sends to coalesce."""
+    with patch.object(settings, "live_debounce_ms", 100):
+        yield
+
+
+class TestLivePreview:
+    """Tests for the live name-to-structure WebSocket."""
+
+    def test_converts_update(self, client: TestClient) -> None:
+        """Test that an update is answered with its sequence number and SMILES."""
+        with client.websocket_connect(ENDPOINT) as websocket:
+            websocket.send_json({"seq": 1, "name": "isopentane"})
+
+            assert websocket.receive_json() == {
+                "seq": 1,
+                "smiles": "CC(C)CC",
+                "source": "demo",
+                "error": None,
+            }
+
+    def test_unknown_name(self, client: TestClient) -> None:
+        """Test that unconvertible names are answered with the standard error."""
+        with client.websocket_connect(ENDPOINT) as websocket:
+            websocket.send_json({"seq": 1, "name": "unknown-molecule"})
+
+            result = websocket.receive_json()
+
+        assert result["seq"] == 1
+        assert result["smiles"] is None
+        assert result["error"]["error_code"] == "NOT_IMPLEMENTED"
+
+    def test_newer_update_supersedes_pending(self, client: TestClient) -> None:
+        """Test that only the latest of rapid updates is converted and answered."""
+        with (
+            patch(
+                "app.services.naming.convert_name",
+                return_value=Conversion("CC", "demo", "dictionary"),
+            ) as convert,
+            client.websocket_connect(ENDPOINT) as websocket,
+        ):
+            websocket.send_json({"seq": 1, "name": "iso"})
+            websocket.send_json({"seq": 2, "name": "isopent"})
+            websocket.send_json({"seq": 3, "name": "isopentane"})
+
+            assert websocket.receive_json()["seq"] == 3
+            websocket.send_json({"seq": 4, "name": "isopentane"})
+            assert websocket.receive_json()["seq"] == 4
+
+        assert [call.args for call in convert.call_args_list] == [("isopentane",)] * 2
+
+    def test_superseded_conversion_stops(self, client: TestClient) -> None:
+        """Test that a superseded conversion already running in a thread is stopped."""
+        started, stopped = threading.Event(), threading.Event()
+        reasons: list[str | None] = []
+
+        def convert(name: str, persist: bool = True) -> Conversion | None:
+            if name == "slow":
+                started.set()
+                try:
+                    for _ in range(500):
+                        check_deadline()
+                        time.sleep(0.01)
+                except DeadlineExceededError:
+                    deadline = current_deadline()
+                    reasons.append(None if deadline is None else deadline.reason)
+                    stopped.set()
+                    raise
+            return Conversion("CC", "demo", "dictionary")
+
+        with (
+            patch("app.services.naming.convert_name", side_effect=convert),
+            client.websocket_connect(ENDPOINT) as websocket,
+        ):
+            websocket.send_json({"seq": 1, "name": "slow"})
+            assert started.wait(timeout=5)
+            websocket.send_json({"seq": 2, "name": "ethane"})
+
+            assert websocket.receive_json()["seq"] == 2
+            assert stopped.wait(timeout=1)
+
+        assert reasons == ["superseded"]
+
+    def test_previews_are_not_persisted(self, client: TestClient) -> None:
+        """Test that previews are kept out of the similarity index and the result store."""
+        with (
+            patch(
+                "app.services.naming.convert_name",
+                return_value=Conversion("CC", "demo", "dictionary"),
+            ) as convert,
+            patch("app.services.fingerprint.index_conversion") as index,
+            client.websocket_connect(ENDPOINT) as websocket,
+        ):
+            websocket.send_json({"seq": 1, "name": "ethane"})
+            assert websocket.receive_json()["smiles"] == "CC"
+
+        assert convert.call_args.kwargs == {"persist": False}
+        index.assert_not_called()
+
+    def test_ignores_stale_sequence_numbers(self, client: TestClient) -> None:
+        """Test that updates older than the latest one are dropped."""
+        with client.websocket_connect(ENDPOINT) as websocket:
+            websocket.send_json({"seq": 5, "name": "isopentane"})
+            assert websocket.receive_json()["seq"] == 5
+
+            websocket.send_json({"seq": 4, "name": "isopentane"})
+            websocket.send_json({"seq": 6, "name": "isopentane"})
+
+            assert websocket.receive_json()["seq"] == 6
+
+    @pytest.mark.parametrize(
+        "message",
+        ["not json", '{"seq": 1}', '{"seq": -1, "name": "x"}', '{"seq": 1, "name": ""}'],
+    )
+    def test_invalid_message(self, client: TestClient, message: str) -> None:
+        """Test that malformed updates get an error and the connection stays open."""
+        with client.websocket_connect(ENDPOINT) as websocket:
+            websocket.send_text(message)
+            error = websocket.receive_json()
+            websocket.send_json({"seq": 1, "name": "isopentane"})
+            result = websocket.receive_json()
+
+        assert error["seq"] is None
+        assert error["error"]["error_code"] == "INVALID_MESSAGE"
+        assert result["smiles"] == "CC(C)CC"
+
+    def test_binary_frame_closes_with_1003(self, client: TestClient) -> None:
+        """Test that binary frames are rejected with the unsupported-data close code."""
+        with client.websocket_connect(ENDPOINT) as websocket:
+            websocket.send_bytes(b'{"seq": 1, "name": "isopentane"}')
+
+            message = websocket.receive()
+
+        assert message["type"] == "websocket.close"
+        assert message["code"] == 1003
+
+    def test_correlation_id(self, client: TestClient) -> None:
+        """Test that errors carry the correlation ID of the connection."""
+        headers = {"X-Correlation-ID": "live-123"}
+        with client.websocket_connect(ENDPOINT, headers=headers) as websocket:
+            websocket.send_text("not json")
+
+            assert websocket.receive_json()["error"]["correlation_id"] == "live-123"
@@ -0,0 +1,191 @@
+"""Unit tests for the SMILES parser and molecular graph."""
+
+import random
+
+import pytest
+
+from app.services.molgraph import (
+    MolGraph,
+    SmilesError,
+    canonical_key,
+    parse_smiles,
+    structure_key,
+)
+
+
+def _shuffled(graph: MolGraph, rng: random.Random) -> MolGraph:
+    """Return the same molecule with atoms and bonds in random order."""
+    order = list(range(len(graph.atoms)))
+    rng.shuffle(order)
+    position = {atom: index for index, atom in enumerate(order)}
+    shuffled = MolGraph()
+    for atom in order:
+        shuffled.add_atom(graph.atoms[atom])
+    for bond in rng.sample(graph.bonds, len(graph.bonds)):
+        shuffled.add_bond(position[bond.end], position[bond.begin], bond.order)
+    return shuffled
+
+
+class TestParseSmiles:
+    """Tests for parse_smiles."""
+
+    def test_branched_alkane(self) -> None:
+        """Test isopentane atoms, bonds and hydrogens."""
+        graph = parse_smiles("CC(C)CC")
+        assert len(graph.atoms) == 5
+        assert len(graph.bonds) == 4
+        assert sorted(graph.neighbors(1)) == [0, 2, 3]
+        assert [graph.hydrogen_count(i) for i in range(5)] == [3, 1, 3, 2, 3]
+
+    def test_bond_orders(self) -> None:
+        """Test double and triple bonds."""
+        graph = parse_smiles("C=CC#N")
+        assert [b.order for b in graph.bonds] == [2.0, 1.0, 3.0]
+        assert graph.hydrogen_count(3) == 0
+
+    def test_aromatic_ring(self) -> None:
+        """Test ring closure and aromatic bonds in benzene."""
+        graph = parse_smiles("c1ccccc1")
+        assert len(graph.bonds) == 6
+        assert all(b.order == 1.5 for b in graph.bonds)
+        assert all(graph.hydrogen_count(i) == 1 for i in range(6))
+        assert len(graph.ring_bonds()) == 6
+
+    def test_bond_between_aromatic_rings_is_single(self) -> None:
+        """Test that the biphenyl linker bond is not aromatic."""
+        graph = parse_smiles("c1ccccc1c1ccccc1")
+        assert sorted(b.order for b in graph.bonds).count(1.0) == 1
+        assert len(graph.ring_bonds()) == 12
+
+    def test_aromatic_heteroatom_hydrogens(self) -> None:
+        """Test that substituted pyrrole-type nitrogens and thiophene sulfur have no H."""
+        graph = parse_smiles("Cn1cccc1.c1ccsc1.c1ccncc1")
+        assert graph.hydrogen_count(1) == 0
+        assert graph.hydrogen_count(9) == 0
+        assert graph.hydrogen_count(14) == 0
+        assert graph.hydrogen_count(13) == 1
+
+    def test_bracket_atoms(self) -> None:
+        """Test charges, explicit hydrogens and isotopes."""
+        graph = parse_smiles("[NH4+].[13CH3-].[nH]1cccc1")
+        ammonium, methyl, pyrrole_n = graph.atoms[0], graph.atoms[1], graph.atoms[2]
+        assert (ammonium.symbol, ammonium.charge, ammonium.explicit_hydrogens) == ("N", 1, 4)
+        assert (methyl.isotope, methyl.charge) == (13, -1)
+        assert pyrrole_n.aromatic and graph.hydrogen_count(2) == 1
+
+    def test_disconnected_components(self) -> None:
+        """Test that '.' separates components."""
+        graph = parse_smiles("CCO.O")
+        assert len(graph.atoms) == 4
+        assert graph.neighbors(3) == []
+
+    def test_percent_ring_labels(self) -> None:
+        """Test two-digit ring closure labels."""
+        graph = parse_smiles("C%10CCCCC%10")
+        assert len(graph.ring_bonds()) == 6
+
+    @pytest.mark.parametrize(
+        "smiles",
+        [
+            "",
+            "C(C",
+            "CC)",
+            "C1CC",
+            "C=",
+            "C&C",
+            "[Xx+",
+            "C11",
+            "(C)",
+            ".",
+            "..",
+            ".C",
+            "C.",
+            "C..C",
+            "C(.)C",
+        ],
+    )
+    def test_invalid_smiles(self, smiles: str) -> None:
+        """Test that malformed SMILES raise SmilesError."""
+        with pytest.raises(SmilesError):
+            parse_smiles(smiles)
+
+
+class TestStructureKey:
+    """Tests for canonical structure keys."""
+
+    def test_independent_of_spelling(self) -> None:
+        """Test that different SMILES of the same molecule share a key."""
+        assert structure_key("CC(C)CC") == structure_key("CCC(C)C") == structure_key(" C(C)(C)CC")
+        assert structure_key("Oc1ccccc1") == structure_key("c1ccc(O)cc1")
+
+    def test_distinguishes_structures(self) -> None:
+        """Test that different molecules get different keys."""
+        keys = {
+            structure_key(s)
+            for s in [
+                "CCCCC",
+                "CC(C)CC",
+                "C1CCCCC1",
+                "C1CC1.C1CC1",
+                "C1CCC2CCCCC2C1",
+                "C1CCCC1C1CCCC1",
+            ]
+        }
+        assert len(keys) == 6
+
+    def test_distinguishes_refinement_equivalent_structures(self) -> None:
+        """Test that cubane and the C8H8 Moebius ladder, alike under refinement, differ."""
+        assert structure_key("C12C3C4C1C5C2C3C45") != structure_key(
+            "C1%10C%11C%12C%13C%10C%11C%12C1%13"
+        )
+
+    def test_invalid_smiles(self) -> None:
+        """Test that unparseable SMILES raise SmilesError."""
+        with pytest.raises(SmilesError):
+            structure_key("C(C")
+
+
+class TestCanonicalKey:
+    """Tests for canonical_key."""
+
+    @pytest.mark.parametrize(
+        "smiles",
+        [
+            "CC(=O)Oc1ccccc1C(=O)O",
+            "C12C3C4C1C5C2C3C45",
+            "CC(C)(C)C(C(C)(C)C)(C(C)(C)C)C(C)(C)C",
+            "C(c1ccccc1)(c1ccccc1)(c1ccccc1)c1ccccc1",
+            "C1CC2CCC1CC2",
+            "C1CCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCC1",
+            "CCCCC.CCCCC.CCC",
+        ],
+    )
+    def test_independent_of_atom_order(self, smiles: str) -> None:
+        """Test that symmetric molecules get one key whatever their atom order."""
+        graph = parse_smiles(smiles)
+        rng = random.Random(smiles)
+
+        assert {canonical_key(_shuffled(graph, rng)) for _ in range(20)} == {canonical_key(graph)}
+
+    def test_distinguishes_non_isomorphic_graphs(self) -> None:
+        """Test graphs that neighbour-class refinement alone cannot tell apart."""
+        keys = {
+            canonical_key(parse_smiles(smiles))
+            for smiles in [
+                "C12C3C4C1C5C2C3C45",
+                "C1%10C%11C%12C%13C%10C%11C%12C1%13",
+                "C1CCC2CCCCC2C1",
+                "C1CCCC1C1CCCC1",
+                "C1CC1.C1CC1",
+            ]
+        }
+        assert len(keys) == 5
+
+    def test_large_search_falls_back_to_input_order(self) -> None:
+        """Test that a molecule too symmetric to search still gets a stable key."""
+        smiles = "c1ccc(cc1)" * 60 + "C"
+
+        key = canonical_key(parse_smiles(smiles))
+
+        assert canonical_key(parse_smiles(smiles)) == key
+        assert canonical_key(parse_smiles(smiles + "C")) != key
@@ -1,6 +1,18 @@
 """Unit tests for the naming service."""
 
-from app.services.naming import DEMO_MAPPINGS, name_to_smiles, smiles_to_name
+from unittest.mock import patch
+
+from app.core.config import settings
+from app.services import naming
+from app.services.cache import MemoryCache, TieredCache, get_cache
+from app.services.naming import (
+    DEMO_MAPPINGS,
+    convert_name,
+    fuzzy_match,
+    name_router,
+    name_to_smiles,
+    smiles_to_name,
+)
 
 
 class TestNameToSmiles:
@@ -48,6 +60,99 @@ class TestNameToSmiles:
             assert result == expected_smiles, f"Failed for {name}"
 
 
+class TestFuzzyNameLookup:
+    """Tests for the fuzzy fallback of name_to_smiles."""
+
+    def test_punctuation_variant(self) -> None:
+        """Test that hyphens and spaces inside a known name are ignored."""
+        assert name_to_smiles("iso-pentane") == "CC(C)CC"
+        assert name_to_smiles("iso pentane") == "CC(C)CC"
+
+    def test_misspelling(self) -> None:
+        """Test that a name one edit away from a known name resolves."""
+        assert name_to_smiles("isopentan") == "CC(C)CC"
+        assert name_to_smiles("isoptenane") == "CC(C)CC"
+
+    def test_fuzzy_match_reports_distance(self) -> None:
+        """Test that fuzzy_match returns the known name and edit distance."""
+        assert fuzzy_match("Iso-Pentan") == ("isopentane", 1)
+        assert fuzzy_match("unknown-molecule-xyz") is None
+
+    def test_short_names_require_exact_match(self) -> None:
+        """Test that no edits are allowed for very short names."""
+        assert fuzzy_match("test") is None
+
+    def test_long_names_use_configured_distance(self) -> None:
+        """Test that names of 10+ characters allow up to fuzzy_max_distance edits."""
+        naming._fuzzy_index.cache_clear()
+        try:
+            assert fuzzy_match("isoppentannee") is None
+            with patch.object(settings, "fuzzy_max_distance", 3):
+                naming._fuzzy_index.cache_clear()
+                assert fuzzy_match("isoppentannee") == ("isopentane", 3)
+                assert fuzzy_match("isopentn") is None  # shorter names: one edit at most
+        finally:
+            naming._fuzzy_index.cache_clear()
+
+
+class TestConvertName:
+    """Tests for the engine tiers of convert_name."""
+
+    def test_tiers_in_cost_order(self) -> None:
+        """Test that exact tiers come before the fuzzy fallback."""
+        assert [engine.name for engine in name_router().order()] == [
+            "dictionary",
+            "rules",
+            "fuzzy",
+        ]
+
+    def test_dictionary(self) -> None:
+        """Test that known names are answered by the dictionary tier."""
+        get_cache().clear()
+        result = convert_name("isopentane")
+
+        assert result is not None
+        assert (result.value, result.source, result.engine) == ("CC(C)CC", "demo", "dictionary")
+
+    def test_rules(self) -> None:
+        """Test that systematic alkane names are answered by the rule parser."""
+        get_cache().clear()
+        result = convert_name("3,4-Dimethylhexane")
+
+        assert result is not None
+        assert (result.value, result.source, result.engine) == ("CCC(C)C(C)CC", "tool", "rules")
+
+    def test_fuzzy_fallback(self) -> None:
+        """Test that misspelled names fall back to fuzzy matching."""
+        get_cache().clear()
+        result = convert_name("isopentan")
+
+        assert result is not None
+        assert (result.source, result.engine) == ("demo", "fuzzy")
+
+    def test_cache_hit_keeps_source(self) -> None:
+        """Test that cached conversions report the source of the original engine."""
+        get_cache().clear()
+        convert_name("hexane")
+        result = convert_name("hexane")
+
+        assert result is not None
+        assert (result.value, result.source, result.engine) == ("CCCCCC", "tool", "cache")
+
+    def test_without_persist_skips_second_tier(self) -> None:
+        """Test that unpersisted conversions are only cached in the first tier."""
+        first, second = MemoryCache(max_entries=10), MemoryCache(max_entries=10)
+        tiered = TieredCache(first, second)
+        with (
+            patch("app.services.naming.get_cache", return_value=tiered),
+            patch("app.services.cache.get_cache", return_value=tiered),
+        ):
+            convert_name("heptane", persist=False)
+
+        assert first.get("name", "heptane") is not None
+        assert second.get("name", "heptane") is None
+
+
 class TestSmilesToName:
     """Tests for smiles_to_name function."""
 
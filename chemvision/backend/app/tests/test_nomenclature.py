@@ -0,0 +1,55 @@
+"""Unit tests for the rule-based hydrocarbon name parser."""
+
+import pytest
+
+from app.services.molgraph import parse_smiles
+from app.services.nomenclature import alkane_to_smiles
+
+
+class TestAlkaneToSmiles:
+    """Tests for alkane_to_smiles."""
+
+    @pytest.mark.parametrize(
+        ("name", "smiles"),
+        [
+            ("methane", "C"),
+            ("hexane", "CCCCCC"),
+            ("undecane", "CCCCCCCCCCC"),
+            ("2-methylbutane", "CC(C)CC"),
+            ("3,4-dimethylhexane", "CCC(C)C(C)CC"),
+            ("2,2,4-trimethylpentane", "CC(C)(C)CC(C)C"),
+            ("3-ethyl-2,4-dimethylhexane", "CC(C)C(CC)C(C)CC"),
+            ("2-methylundecane", "CC(C)CCCCCCCCC"),
+            ("cyclohexane", "C1CCCCC1"),
+            ("methylcyclopentane", "C1(C)CCCC1"),
+            ("1,1-dimethylcyclohexane", "C1(C)(C)CCCCC1"),
+        ],
+    )
+    def test_names(self, name: str, smiles: str) -> None:
+        """Test that systematic names give the expected structure."""
+        assert alkane_to_smiles(name) == smiles
+
+    @pytest.mark.parametrize(
+        "name",
+        [
+            "isopentane",
+            "unknown-molecule",
+            "test",
+            "ethanol",
+            "1-methylbutane",
+            "2,3-methylbutane",
+            "2,2,2-trimethylbutane",
+            "7-methylhexane",
+            "cycloethane",
+            "dimethylcyclohexane",
+        ],
+    )
+    def test_rejects(self, name: str) -> None:
+        """Test that trivial, non-alkane and inconsistent names are not parsed."""
+        assert alkane_to_smiles(name) is None
+
+    def test_output_parses(self) -> None:
+        """Test that generated SMILES have the expected number of carbons."""
+        graph = parse_smiles(alkane_to_smiles("3-ethyl-2,4-dimethylhexane") or "")
+
+        assert len(graph.atoms) == 10
@@ -1,6 +1,13 @@
 """Unit tests for the OCSR service."""
 
-from app.services.ocsr import image_to_smiles
+import time
+from unittest.mock import patch
+
+import numpy as np
+
+from app.services.cache import get_cache
+from app.services.engines import Conversion
+from app.services.ocsr import image_to_smiles, pixels_key, recognize, recognize_batch
 
 
 class TestImageToSmiles:
@@ -57,3 +64,37 @@ class TestImageToSmiles:
         for _ in range(5):
             result = image_to_smiles(png_bytes)
             assert result is None
+
+
+class TestRecognizeBatch:
+    """Tests for batched region recognition."""
+
+    def test_returns_one_result_per_region(self) -> None:
+        """Test that every region gets a result, in order."""
+        regions = [np.full((10, 10), i, dtype=np.uint8) for i in range(5)]
+        assert recognize_batch(regions) == [None] * 5
+
+    def test_empty_batch(self) -> None:
+        """Test that an empty batch returns an empty list."""
+        assert recognize_batch([]) == []
+
+    def test_runs_regions_concurrently(self) -> None:
+        """Test that batch latency tracks the slowest region, not the sum."""
+
+        def slow_recognize(image: np.ndarray) -> Conversion:
+            time.sleep(0.2)
+            return Conversion("C", "ml", "model")
+
+        with patch("app.services.ocsr.recognize", side_effect=slow_recognize):
+            start = time.perf_counter()
+            results = recognize_batch([np.zeros((4, 4), dtype=np.uint8)] * 4)
+            elapsed = time.perf_counter() - start
+
+        assert [result.value for result in results if result] == ["C"] * 4
+        assert elapsed < 0.6
+
+    def test_uses_cache(self) -> None:
+        """Test that cached regions are returned from the conversion cache."""
+        region = np.arange(16, dtype=np.uint8).reshape(4, 4)
+        get_cache().set("image", pixels_key(region), "CCO", "ml")
+        assert recognize(region) == Conversion("CCO", "ml", "cache")
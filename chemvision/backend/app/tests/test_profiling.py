@@ -0,0 +1,186 @@
+"""Tests for the sampling profiler and debug endpoints."""
+
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.profiling import ProfileStore, SamplingProfiler, profile_for
+
+
+def _busy_loop(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+@pytest.fixture
+def profiling_enabled(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Enable the debug surface for a test."""
+    monkeypatch.setattr(settings, "profiling_enabled", True)
+
+
+class TestSamplingProfiler:
+    """Tests for SamplingProfiler."""
+
+    def test_captures_busy_thread(self) -> None:
+        """Test that a busy thread's stack appears in collapsed output."""
+        stop = threading.Event()
+        worker = threading.Thread(target=_busy_loop, args=(stop,), name="busy")
+        worker.start()
+        try:
+            profiler = SamplingProfiler(interval=0.001).start()
+            time.sleep(0.1)
+            collapsed = profiler.stop()
+        finally:
+            stop.set()
+            worker.join()
+
+        assert profiler.samples > 0
+        lines = [line for line in collapsed.splitlines() if line.startswith("busy;")]
+        assert lines
+        stack, count = lines[0].rsplit(" ", 1)
+        assert "_busy_loop (test_profiling.py:" in stack
+        assert int(count) > 0
+
+    def test_excludes_own_thread(self) -> None:
+        """Test that the sampler does not profile itself."""
+        collapsed = profile_for(0.05, interval=0.001)
+
+        assert "sampling-profiler" not in collapsed
+
+    def test_samples_only_given_threads(self) -> None:
+        """Test that a thread filter keeps other busy threads out of the profile."""
+        stop = threading.Event()
+        workers = [
+            threading.Thread(target=_busy_loop, args=(stop,), name=name)
+            for name in ("mine", "other")
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            profiler = SamplingProfiler(interval=0.001, threads=[]).start()
+            profiler.add_thread(workers[0].ident or 0)
+            time.sleep(0.1)
+            collapsed = profiler.stop()
+        finally:
+            stop.set()
+            for worker in workers:
+                worker.join()
+
+        assert "mine;" in collapsed
+        assert "other;" not in collapsed
+
+    def test_skips_idle_threads(self) -> None:
+        """Test that threads blocked on a wait are not sampled by default."""
+        stop = threading.Event()
+        waiter = threading.Thread(target=stop.wait, name="waiter")
+        waiter.start()
+        try:
+            collapsed = profile_for(0.05, interval=0.001)
+        finally:
+            stop.set()
+            waiter.join()
+
+        assert "waiter;" not in collapsed
+
+
+class TestProfileStore:
+    """Tests for ProfileStore."""
+
+    def test_evicts_oldest(self) -> None:
+        """Test that the store keeps only the most recent profiles."""
+        store = ProfileStore(max_profiles=2)
+        store.put("a", "x 1\n")
+        store.put("b", "y 1\n")
+        store.put("c", "z 1\n")
+
+        assert store.get("a") is None
+        assert store.get("b") == "y 1\n"
+        assert store.get("c") == "z 1\n"
+
+
+class TestDebugEndpoints:
+    """Tests for the /debug endpoints."""
+
+    def test_disabled_by_default(self, client: TestClient) -> None:
+        """Test that debug routes are hidden unless profiling is enabled."""
+        response = client.get("/debug/profile", params={"seconds": 0.01})
+
+        assert response.status_code == 404
+
+    def test_profile(self, client: TestClient, profiling_enabled: None) -> None:
+        """Test that an on-demand profile returns collapsed stacks as text."""
+        response = client.get("/debug/profile", params={"seconds": 0.05, "interval_ms": 1})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        for line in response.text.splitlines():
+            assert line.rsplit(" ", 1)[1].isdigit()
+
+    def test_token_required(self, client: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that a configured token must be presented."""
+        monkeypatch.setattr(settings, "profiling_enabled", True)
+        monkeypatch.setattr(settings, "profiling_token", "secret")
+
+        assert client.get("/debug/profile", params={"seconds": 0.01}).status_code == 404
+        response = client.get(
+            "/debug/profile", params={"seconds": 0.01}, headers={"X-Debug-Token": "secret"}
+        )
+        assert response.status_code == 200
+
+    def test_request_profile(self, client: TestClient, profiling_enabled: None) -> None:
+        """Test that X-Profile captures a profile under a server-generated ID."""
+        headers = {"X-Profile": "1", "X-Correlation-ID": "profiled-request"}
+        first = client.post("/api/name-to-structure", json={"name": "isopentane"}, headers=headers)
+        second = client.post("/api/name-to-structure", json={"name": "isopentane"}, headers=headers)
+
+        assert first.status_code == 200
+        profile_id = first.headers["X-Profile-ID"]
+        assert profile_id not in ("profiled-request", second.headers["X-Profile-ID"])
+        assert client.get(f"/debug/profiles/{profile_id}").status_code == 200
+        assert client.get("/debug/profiles/profiled-request").status_code == 404
+
+    def test_request_profile_samples_worker_thread(
+        self, client: TestClient, profiling_enabled: None
+    ) -> None:
+        """Test that the request's threadpool work is profiled, other threads are not."""
+        stop = threading.Event()
+        other = threading.Thread(target=_busy_loop, args=(stop,), name="unrelated")
+        other.start()
+
+        def slow_convert(name: str, persist: bool = True) -> None:
+            deadline = time.monotonic() + 0.1
+            while time.monotonic() < deadline:
+                sum(range(1000))
+
+        try:
+            with patch("app.services.naming.convert_name", side_effect=slow_convert):
+                response = client.post(
+                    "/api/name-to-structure", json={"name": "x"}, headers={"X-Profile": "1"}
+                )
+        finally:
+            stop.set()
+            other.join()
+
+        collapsed = client.get(f"/debug/profiles/{response.headers['X-Profile-ID']}").text
+        assert "slow_convert (test_profiling.py:" in collapsed
+        assert "unrelated;" not in collapsed
+
+    def test_request_profile_ignored_when_disabled(self, client: TestClient) -> None:
+        """Test that X-Profile has no effect unless profiling is enabled."""
+        response = client.post(
+            "/api/name-to-structure", json={"name": "isopentane"}, headers={"X-Profile": "1"}
+        )
+
+        assert response.status_code == 200
+        assert "X-Profile-ID" not in response.headers
+
+    def test_unknown_profile(self, client: TestClient, profiling_enabled: None) -> None:
+        """Test that an unknown profile ID returns 404."""
+        response = client.get("/debug/profiles/does-not-exist")
+
+        assert response.status_code == 404
+        assert response.json()["detail"]["error_code"] == "PROFILE_NOT_FOUND"
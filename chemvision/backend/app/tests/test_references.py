@@ -0,0 +1,157 @@
+"""Unit tests for images submitted by reference."""
+
+import io
+import mmap
+import os
+from collections.abc import Iterator
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.core.config import settings
+from app.services.imaging import ImageTooLargeError, decode_grayscale, read_image_info
+from app.services.references import (
+    ImageReferenceError,
+    ReferenceNotFoundError,
+    TooManyImagesError,
+    list_images,
+    map_image,
+)
+
+
+def _png(width: int = 8, height: int = 4) -> bytes:
+    buffer = io.BytesIO()
+    Image.fromarray(np.full((height, width), 200, dtype=np.uint8)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def root(tmp_path: Path) -> Iterator[Path]:
+    """Configure a temporary image reference root."""
+    volume = tmp_path / "volume"
+    (volume / "batch").mkdir(parents=True)
+    with patch.object(settings, "image_reference_root", str(volume)):
+        yield volume
+
+
+class TestMapImage:
+    """Tests for map_image."""
+
+    def test_maps_file_read_only(self, root: Path) -> None:
+        """Test that a referenced file is mapped and decodes without copying to bytes."""
+        (root / "batch" / "a.png").write_bytes(_png())
+
+        with map_image("batch/a.png") as data:
+            assert isinstance(data, mmap.mmap)
+            assert read_image_info(data).width == 8
+            assert decode_grayscale(data).shape == (4, 8)
+            with pytest.raises(TypeError):
+                data[0] = 0  # type: ignore[index]
+
+        assert data.closed
+
+    @pytest.mark.parametrize("path", ["../outside.png", "batch/../../outside.png", "/etc/passwd"])
+    def test_rejects_escapes(self, root: Path, path: str) -> None:
+        """Test that parent references and absolute paths are rejected."""
+        (root.parent / "outside.png").write_bytes(_png())
+
+        with pytest.raises(ImageReferenceError), map_image(path):
+            pass
+
+    def test_rejects_symlinked_file(self, root: Path) -> None:
+        """Test that a link to a file outside the root is not followed."""
+        outside = root.parent / "outside.png"
+        outside.write_bytes(_png())
+        (root / "link.png").symlink_to(outside)
+
+        with pytest.raises(ImageReferenceError), map_image("link.png"):
+            pass
+
+    def test_rejects_symlinked_directory(self, root: Path) -> None:
+        """Test that a link to a directory outside the root is not followed."""
+        outside = root.parent / "outside"
+        outside.mkdir()
+        (outside / "a.png").write_bytes(_png())
+        (root / "linked").symlink_to(outside)
+
+        with pytest.raises(ImageReferenceError), map_image("linked/a.png"):
+            pass
+
+    def test_missing_file(self, root: Path) -> None:
+        """Test that missing files raise ReferenceNotFoundError."""
+        with pytest.raises(ReferenceNotFoundError), map_image("batch/missing.png"):
+            pass
+
+    def test_rejects_non_regular_files(self, root: Path) -> None:
+        """Test that directories, FIFOs and empty files are rejected."""
+        os.mkfifo(root / "pipe.png")
+        (root / "empty.png").write_bytes(b"")
+
+        for path in ("batch", "pipe.png", "empty.png", ""):
+            with pytest.raises(ImageReferenceError), map_image(path):
+                pass
+
+    def test_rejects_large_file(self, root: Path) -> None:
+        """Test that files over the upload size limit are not mapped."""
+        (root / "a.png").write_bytes(_png())
+
+        with (
+            patch.object(settings, "max_upload_size", 16),
+            pytest.raises(ImageTooLargeError),
+            map_image("a.png"),
+        ):
+            pass
+
+    def test_disabled(self) -> None:
+        """Test that nothing can be referenced without a configured root."""
+        with (
+            patch.object(settings, "image_reference_root", None),
+            pytest.raises(ImageReferenceError),
+            map_image("a.png"),
+        ):
+            pass
+
+
+class TestListImages:
+    """Tests for list_images."""
+
+    def test_lists_images_sorted(self, root: Path) -> None:
+        """Test that only regular PNG/JPEG files directly inside are listed."""
+        for name in ("b.PNG", "a.jpg", "c.jpeg", "notes.txt"):
+            (root / "batch" / name).write_bytes(_png())
+        (root / "batch" / "nested.png").mkdir()
+        (root / "batch" / "link.png").symlink_to(root / "batch" / "a.jpg")
+
+        assert list_images("batch") == ["batch/a.jpg", "batch/b.PNG", "batch/c.jpeg"]
+        assert list_images("./batch/") == ["batch/a.jpg", "batch/b.PNG", "batch/c.jpeg"]
+
+    def test_root_directory(self, root: Path) -> None:
+        """Test that the root itself can be listed."""
+        (root / "a.png").write_bytes(_png())
+
+        assert list_images("") == ["a.png"]
+
+    def test_limit(self, root: Path) -> None:
+        """Test that directories over the batch limit are rejected."""
+        for index in range(3):
+            (root / "batch" / f"{index}.png").write_bytes(_png())
+
+        with (
+            patch.object(settings, "image_reference_max_files", 2),
+            pytest.raises(TooManyImagesError),
+        ):
+            list_images("batch")
+
+    def test_confinement(self, root: Path) -> None:
+        """Test that directories outside the root and missing ones are rejected."""
+        (root / "outside").symlink_to(root.parent)
+
+        with pytest.raises(ImageReferenceError):
+            list_images("..")
+        with pytest.raises(ImageReferenceError):
+            list_images("outside")
+        with pytest.raises(ReferenceNotFoundError):
+            list_images("missing")
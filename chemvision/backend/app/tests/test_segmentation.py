@@ -0,0 +1,127 @@
+"""Unit tests for page segmentation."""
+
+import math
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from app.services.segmentation import (
+    Region,
+    binarize,
+    connected_components,
+    crop,
+    dilate,
+    otsu_threshold,
+    segment_page,
+)
+
+
+def _draw_ring(draw: ImageDraw.ImageDraw, cx: int, cy: int, radius: int) -> None:
+    """Draw a hexagon with a substituent, like a simple skeletal formula."""
+    points = [
+        (cx + radius * math.cos(math.pi / 3 * i), cy + radius * math.sin(math.pi / 3 * i))
+        for i in range(7)
+    ]
+    draw.line(points, fill=0, width=3)
+    draw.line([points[0], (cx + 2 * radius, cy)], fill=0, width=3)
+
+
+def _page() -> np.ndarray:
+    """Render a page with two structures, a text line and a reaction arrow."""
+    page = Image.new("L", (800, 600), 255)
+    draw = ImageDraw.Draw(page)
+    _draw_ring(draw, 150, 150, 60)
+    _draw_ring(draw, 550, 150, 60)
+    draw.line([(300, 160), (420, 160)], fill=0, width=3)  # arrow shaft
+    draw.polygon([(420, 150), (440, 160), (420, 170)], fill=0)  # arrow head
+    draw.rectangle([(50, 450), (750, 462)], fill=0)  # text line
+    draw.rectangle([(100, 520), (104, 524)], fill=0)  # speck
+    return np.asarray(page, dtype=np.uint8)
+
+
+class TestBinarize:
+    """Tests for thresholding."""
+
+    def test_otsu_separates_modes(self) -> None:
+        """Test that the threshold falls between dark and light pixels."""
+        gray = np.array([[10, 10, 240, 240]], dtype=np.uint8)
+        assert 10 <= otsu_threshold(gray) < 240
+
+    def test_blank_page_has_no_ink(self) -> None:
+        """Test that a white page yields an empty mask."""
+        assert not binarize(np.full((20, 20), 255, dtype=np.uint8)).any()
+
+
+class TestConnectedComponents:
+    """Tests for run-length connected component labelling."""
+
+    def test_empty_mask(self) -> None:
+        """Test that an empty mask has no components."""
+        assert connected_components(np.zeros((5, 5), dtype=bool)) == []
+
+    def test_separate_blobs(self) -> None:
+        """Test that disjoint blobs get separate bounding boxes."""
+        mask = np.zeros((10, 10), dtype=bool)
+        mask[1:3, 1:4] = True
+        mask[6:9, 5:10] = True
+        boxes = sorted(connected_components(mask), key=lambda r: r.y)
+        assert boxes == [Region(1, 1, 3, 2), Region(5, 6, 5, 3)]
+
+    def test_diagonal_pixels_are_connected(self) -> None:
+        """Test 8-connectivity."""
+        mask = np.eye(5, dtype=bool)
+        assert connected_components(mask) == [Region(0, 0, 5, 5)]
+
+    def test_u_shape_merges(self) -> None:
+        """Test that branches joined lower down are merged into one component."""
+        mask = np.zeros((5, 5), dtype=bool)
+        mask[0:4, 0] = True
+        mask[0:4, 4] = True
+        mask[4, :] = True
+        assert connected_components(mask) == [Region(0, 0, 5, 5)]
+
+
+class TestDilate:
+    """Tests for binary dilation."""
+
+    def test_grows_single_pixel(self) -> None:
+        """Test that a pixel grows into a square."""
+        mask = np.zeros((7, 7), dtype=bool)
+        mask[3, 3] = True
+        assert dilate(mask, 1).sum() == 9
+
+    def test_zero_radius_is_identity(self) -> None:
+        """Test that radius 0 returns the mask unchanged."""
+        mask = np.eye(3, dtype=bool)
+        assert (dilate(mask, 0) == mask).all()
+
+
+class TestSegmentPage:
+    """Tests for structure region detection."""
+
+    def test_finds_structures_and_skips_text_and_arrows(self) -> None:
+        """Test that only the two ring depictions are returned."""
+        regions = segment_page(_page())
+        assert len(regions) == 2
+        left, right = regions
+        assert left.x < 150 < left.x + left.width
+        assert right.x < 550 < right.x + right.width
+        for region in regions:
+            assert region.y < 150 < region.y + region.height
+
+    def test_blank_page(self) -> None:
+        """Test that a blank page has no regions."""
+        assert segment_page(np.full((100, 100), 255, dtype=np.uint8)) == []
+
+    def test_filled_area_is_rejected(self) -> None:
+        """Test that dense blobs such as photos are not treated as structures."""
+        gray = np.full((200, 200), 255, dtype=np.uint8)
+        gray[50:150, 50:150] = 0
+        assert segment_page(gray) == []
+
+    def test_crop_is_a_view(self) -> None:
+        """Test that cropping does not copy pixels."""
+        page = _page()
+        region = segment_page(page)[0]
+        assert np.shares_memory(crop(page, region), page)
+        assert crop(page, region).shape == (region.height, region.width)
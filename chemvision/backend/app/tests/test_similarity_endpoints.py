@@ -0,0 +1,54 @@
+"""Tests for the similarity search endpoint."""
+
+import asyncio
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.services import fingerprint
+from app.services.fingerprint import get_index
+
+
+class TestSimilaritySearch:
+    """Tests for similarity-search endpoint."""
+
+    def test_finds_converted_molecule(self, client: TestClient) -> None:
+        """Test that conversion results are searchable."""
+        client.post("/api/name-to-structure", json={"name": "isopentane"})
+
+        response = client.post("/api/similarity-search", json={"smiles": "CC(C)CC", "k": 5})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["hits"][0] == {"smiles": "CC(C)CC", "similarity": 1.0}
+        assert data["indexed"] == len(get_index())
+
+    def test_indexing_runs_off_event_loop(self, client: TestClient) -> None:
+        """Test that conversions fingerprint and index molecules in worker threads."""
+        on_loop = []
+
+        def record(smiles: str) -> None:
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(True)
+            except RuntimeError:
+                on_loop.append(False)
+
+        with patch.object(fingerprint, "index_conversion", side_effect=record):
+            client.post("/api/name-to-structure", json={"name": "isopentane"})
+            client.get("/api/name-to-structure", params={"name": "isopentane"})
+
+        assert on_loop == [False, False]
+
+    def test_invalid_smiles(self, client: TestClient) -> None:
+        """Test that unparseable query SMILES return 400."""
+        response = client.post("/api/similarity-search", json={"smiles": "C(C"})
+
+        assert response.status_code == 400
+        assert response.json()["detail"]["error_code"] == "INVALID_SMILES"
+
+    def test_validation_k_range(self, client: TestClient) -> None:
+        """Test that k must be positive."""
+        response = client.post("/api/similarity-search", json={"smiles": "CC", "k": 0})
+
+        assert response.status_code == 422
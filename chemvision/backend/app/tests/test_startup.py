@@ -0,0 +1,86 @@
+"""Tests for worker startup cost and engine warmup."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from app.core.lazy import lazy_import
+from app.services import naming, warmup
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+# Cumulative import time of app.main; override with IMPORT_BUDGET_MS on slow runners.
+IMPORT_BUDGET_MS = int(os.environ.get("IMPORT_BUDGET_MS", "2000"))
+
+# Engine dependencies that must only load on first use or during warmup.
+HEAVY_MODULES = ("numpy", "PIL")
+
+
+def _import_times(module: str) -> dict[str, int]:
+    """Import a module in a fresh interpreter and return cumulative import times (us)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+class TestImportCost:
+    """Tests for the import cost of the application."""
+
+    def test_app_import_within_budget(self) -> None:
+        """Test that importing app.main stays within the cold-start budget."""
+        times = _import_times("app.main")
+
+        assert times["app.main"] / 1000 < IMPORT_BUDGET_MS
+
+    def test_heavy_dependencies_not_imported(self) -> None:
+        """Test that engine dependencies are not imported with the application."""
+        times = _import_times("app.main")
+
+        loaded = {name.split(".")[0] for name in times}
+        assert loaded.isdisjoint(HEAVY_MODULES)
+
+
+class TestLazyImport:
+    """Tests for lazy_import."""
+
+    def test_loads_on_attribute_access(self) -> None:
+        """Test that the placeholder resolves attributes of the real module."""
+        json = lazy_import("json")
+
+        assert json.dumps([1]) == "[1]"
+        assert json.__name__ == "json"
+
+
+class TestWarmup:
+    """Tests for engine warmup."""
+
+    def test_warms_up_engines(self) -> None:
+        """Test that warming up an engine builds its resources."""
+        naming._fuzzy_index.cache_clear()
+
+        warmup.warm_up(["naming"])
+
+        assert naming._fuzzy_index.cache_info().currsize == 1
+
+    def test_unknown_engine(self) -> None:
+        """Test that unknown engine names are rejected."""
+        with pytest.raises(KeyError):
+            warmup.warm_up(["unknown"])
+
+    def test_all_engines(self) -> None:
+        """Test that every registered engine warms up without error."""
+        warmup.warm_up(warmup.ENGINES)
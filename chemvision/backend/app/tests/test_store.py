@@ -0,0 +1,251 @@
+"""Unit tests for the durable result store."""
+
+import json
+import sqlite3
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from app.services import cache as cache_module
+from app.services.cache import CacheEntry, MemoryCache, TieredCache, close_cache, get_cache
+from app.services.store import ResultStore, ResultStoreError, main
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> Iterator[ResultStore]:
+    """Create a result store in a temporary directory."""
+    result_store = ResultStore(str(tmp_path / "results.db"))
+    yield result_store
+    result_store.close()
+
+
+class TestResultStore:
+    """Tests for ResultStore."""
+
+    def test_round_trip(self, store: ResultStore) -> None:
+        """Test that written results are read back with their source."""
+        store.set("name", "isopentane", "CC(C)CC", "demo")
+        store.flush()
+        assert store.get("name", "isopentane") == CacheEntry("CC(C)CC", "demo")
+
+    def test_missing_key(self, store: ResultStore) -> None:
+        """Test that unknown keys return None."""
+        assert store.get("smiles", "CCO") is None
+
+    def test_uses_wal(self, store: ResultStore) -> None:
+        """Test that the database runs in WAL mode."""
+        mode = store._reader().execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode == "wal"
+
+    def test_batches_many_writes(self, store: ResultStore) -> None:
+        """Test that bursts of writes are all committed."""
+        for i in range(1000):
+            store.set("image", f"hash-{i}", "C" * (i % 5 + 1), "ml")
+        store.flush()
+        assert len(store) == 1000
+        assert store.get("image", "hash-7") == CacheEntry("CCC", "ml")
+
+    def test_overwrite(self, store: ResultStore) -> None:
+        """Test that a later result replaces an earlier one."""
+        store.set("name", "x", "C", "demo")
+        store.set("name", "x", "CC", "tool")
+        store.flush()
+        assert store.get("name", "x") == CacheEntry("CC", "tool")
+
+    def test_survives_restart(self, tmp_path: Path) -> None:
+        """Test that results persist across store instances."""
+        path = str(tmp_path / "results.db")
+        first = ResultStore(path)
+        first.set("smiles", "CC(C)CC", "isopentane", "ml")
+        first.close()
+
+        second = ResultStore(path)
+        assert second.get("smiles", "CC(C)CC") == CacheEntry("isopentane", "ml")
+        second.close()
+
+    def test_clear(self, store: ResultStore) -> None:
+        """Test that clear removes all results."""
+        store.set("name", "x", "C", "demo")
+        store.clear()
+        assert len(store) == 0
+
+    def test_writer_failure_is_propagated(self, tmp_path: Path) -> None:
+        """Test that flush raises instead of hanging when the writer cannot connect."""
+        connect = ResultStore._connect
+        calls = []
+
+        def failing_connect(self: ResultStore) -> sqlite3.Connection:
+            calls.append(threading.current_thread().name)
+            if threading.current_thread().name == "result-store":
+                raise sqlite3.OperationalError("unable to open database file")
+            return connect(self)
+
+        with patch.object(ResultStore, "_connect", failing_connect):
+            broken = ResultStore(str(tmp_path / "results.db"))
+            broken.set("name", "x", "C", "demo")
+            with pytest.raises(ResultStoreError):
+                broken.flush(timeout=5)
+            broken.set("name", "y", "C", "demo")  # dropped with a warning
+            broken.close()
+
+        assert "result-store" in calls
+
+    def test_flush_times_out(self, tmp_path: Path) -> None:
+        """Test that flush gives up when the writer does not make progress."""
+        connect = ResultStore._connect
+        release = threading.Event()
+
+        def slow_connect(self: ResultStore) -> sqlite3.Connection:
+            if threading.current_thread().name == "result-store":
+                release.wait()
+            return connect(self)
+
+        with patch.object(ResultStore, "_connect", slow_connect):
+            slow = ResultStore(str(tmp_path / "results.db"))
+            slow.set("name", "x", "C", "demo")
+            with pytest.raises(TimeoutError):
+                slow.flush(timeout=0.1)
+            release.set()
+            slow.flush()
+            slow.close()
+
+    def test_queue_is_bounded(self, tmp_path: Path) -> None:
+        """Test that writes beyond the queue limit are dropped while the writer is stuck."""
+        connect = ResultStore._connect
+        release = threading.Event()
+
+        def slow_connect(self: ResultStore) -> sqlite3.Connection:
+            if threading.current_thread().name == "result-store":
+                release.wait()
+            return connect(self)
+
+        with patch.object(ResultStore, "_connect", slow_connect):
+            stuck = ResultStore(str(tmp_path / "results.db"), max_queued=2)
+            for key in ("a", "b", "c"):
+                stuck.set("name", key, "C", "demo")  # "c" is dropped with a warning
+            with pytest.raises(TimeoutError):
+                stuck.flush(timeout=0.1)
+            release.set()
+            stuck.flush()
+
+        assert len(stuck) == 2
+        assert stuck.get("name", "c") is None
+        stuck.close()
+
+    def test_import_skips_invalid_rows(self, store: ResultStore) -> None:
+        """Test that rows with unknown kinds or sources, or missing fields, are skipped."""
+        rows: list[object] = [
+            {"kind": "name", "key": "ethanol", "value": "CCO", "source": "tool"},
+            {"kind": "name", "key": "isopentane", "value": "CC(C)CC", "source": "opsin"},
+            {"kind": "formula", "key": "C2H6O", "value": "CCO", "source": "ml"},
+            {"kind": "name", "key": "methane", "source": "demo"},
+            {"kind": "name", "key": "propane", "value": 3, "source": "demo"},
+            ["name", "x", "C", "demo"],
+            None,
+        ]
+
+        assert tuple(store.import_rows(rows)) == (1, 6)
+        assert store.get("name", "ethanol") == CacheEntry("CCO", "tool")
+        assert store.get("name", "isopentane") is None
+
+    def test_close_releases_connections(self, tmp_path: Path) -> None:
+        """Test that close() closes every thread's reader and rejects later use."""
+        closing_store = ResultStore(str(tmp_path / "results.db"))
+        readers: list[sqlite3.Connection] = []
+        thread = threading.Thread(target=lambda: readers.append(closing_store._reader()))
+        thread.start()
+        thread.join()
+        closing_store.get("name", "x")
+
+        closing_store.close()
+        closing_store.close()  # idempotent
+        closing_store.set("name", "x", "C", "demo")  # dropped with a warning
+
+        with pytest.raises(sqlite3.ProgrammingError):
+            readers[0].execute("SELECT 1")
+        with pytest.raises(ResultStoreError):
+            closing_store.get("name", "x")
+        with pytest.raises(ResultStoreError):
+            closing_store.flush()
+
+
+class TestTieredCache:
+    """Tests for the memory + store cache hierarchy."""
+
+    def test_second_tier_hit_is_promoted(self, store: ResultStore) -> None:
+        """Test that results found in the store are copied into memory."""
+        store.set("name", "isopentane", "CC(C)CC", "demo")
+        store.flush()
+        memory = MemoryCache(max_entries=10)
+        tiered = TieredCache(memory, store)
+
+        assert tiered.get("name", "isopentane") == CacheEntry("CC(C)CC", "demo")
+        assert memory.get("name", "isopentane") == CacheEntry("CC(C)CC", "demo")
+
+    def test_set_writes_both_tiers(self, store: ResultStore) -> None:
+        """Test that results are written through to the store."""
+        memory = MemoryCache(max_entries=10)
+        TieredCache(memory, store).set("image", "abc", "CCO", "ml")
+        store.flush()
+        assert memory.get("image", "abc") is not None
+        assert store.get("image", "abc") == CacheEntry("CCO", "ml")
+
+    def test_get_cache_adds_store_tier(self, tmp_path: Path) -> None:
+        """Test that configuring a store path enables the second tier."""
+        close_cache()
+        try:
+            with patch.object(
+                cache_module.settings, "result_store_path", str(tmp_path / "results.db")
+            ):
+                configured = get_cache()
+                assert isinstance(configured, TieredCache)
+                assert isinstance(configured.second, ResultStore)
+        finally:
+            close_cache()
+
+
+class TestCommandLine:
+    """Tests for the export/import command."""
+
+    def test_export_then_import(self, tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+        """Test pre-seeding a fresh database from an export."""
+        source = ResultStore(str(tmp_path / "source.db"))
+        source.set("name", "isopentane", "CC(C)CC", "demo")
+        source.set("image", "abc", "CCO", "ml")
+        source.close()
+
+        export_file = tmp_path / "results.jsonl"
+        assert main(["--db", str(tmp_path / "source.db"), "export", str(export_file)]) == 0
+        rows = [json.loads(line) for line in export_file.read_text().splitlines()]
+        assert {"kind": "name", "key": "isopentane", "value": "CC(C)CC", "source": "demo"} in rows
+
+        assert main(["--db", str(tmp_path / "fresh.db"), "import", str(export_file)]) == 0
+        assert "imported 2 results" in capsys.readouterr().err
+
+        fresh = ResultStore(str(tmp_path / "fresh.db"))
+        assert fresh.get("image", "abc") == CacheEntry("CCO", "ml")
+        fresh.close()
+
+    def test_import_reports_malformed_lines(
+        self, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        """Test that bad lines are counted instead of aborting the import."""
+        lines = tmp_path / "results.jsonl"
+        lines.write_text(
+            '{"kind": "name", "key": "ethanol", "value": "CCO", "source": "tool"}\n'
+            "{not json\n"
+            "\n"
+            '{"kind": "name", "key": "isopentane", "value": "CC(C)CC", "source": "opsin"}\n'
+        )
+
+        assert main(["--db", str(tmp_path / "fresh.db"), "import", str(lines)]) == 0
+        assert "imported 1 results, skipped 2 malformed lines" in capsys.readouterr().err
+
+    def test_requires_database(self) -> None:
+        """Test that a database path is required."""
+        with patch.object(cache_module.settings, "result_store_path", None):
+            with pytest.raises(SystemExit):
+                main(["--db", "", "export", "-"])
@@ -0,0 +1,377 @@
+"""Round-trip evaluation of naming and OCSR engines over large pair files.
+
+Input is a tab-separated file of ``<input>\\t<expected SMILES>`` lines, where the
+input is a chemical name (``--mode names``) or an image path relative to the
+pair file (``--mode images``). For names, each pair runs
+
+    name --name_to_smiles--> SMILES --smiles_to_name--> name --name_to_smiles--> SMILES
+
+and checks the first SMILES against the expected one (accuracy) and against the
+last one (round-trip consistency). For images, ``image_to_smiles`` is checked
+against the expected SMILES.
+
+Pairs are evaluated in chunks across a process pool and one JSON record per pair
+is appended to the output file in input order, so an interrupted run resumes by
+skipping as many pairs as there are complete records. The summary (accuracy,
+per-engine latency percentiles, throughput) is recomputed from the whole output
+file with bounded memory and written next to it as ``<output>.summary.json``.
+
+Engines are modules exposing the ``app.services.naming`` / ``app.services.ocsr``
+functions, so candidate engines can be assessed with ``--naming-engine`` and
+``--ocsr-engine``. Latencies are grouped by function and by the engine that
+answered: naming modules with ``convert_name`` report the tier (``dictionary``,
+``rules``, ...), other engines are labelled with their module name.
+
+So that latencies measure the engines themselves, workers disable the conversion
+cache and the result store (overriding the inherited environment and ``.env``),
+and run each engine's ``warmup()`` plus one untimed conversion before the first
+timed pair.
+
+Usage::
+
+    python round_trip_tests.py pairs.tsv results.jsonl --workers 32
+    python round_trip_tests.py images.tsv results.jsonl --mode images
+"""
+
+import argparse
+import contextlib
+import importlib
+import json
+import math
+import os
+import sys
+import time
+from collections import Counter, deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Literal
+
+BACKEND_DIR = Path(__file__).resolve().parents[3] / "backend"
+
+# Converted once per worker, untimed, so cold-start costs stay out of the percentiles.
+WARMUP_NAME = "isopentane"
+
+Mode = Literal["names", "images"]
+Pair = tuple[int, str, str]
+
+try:
+    from rdkit import Chem, RDLogger
+except ImportError:  # compare SMILES as strings
+    Chem = None
+
+
+def canonical(smiles: str | None) -> str | None:
+    """Return the canonical form of a SMILES (RDKit if installed, else trimmed)."""
+    if smiles is None:
+        return None
+    if Chem is None:
+        return smiles.strip()
+    mol = Chem.MolFromSmiles(smiles)
+    return smiles.strip() if mol is None else Chem.MolToSmiles(mol)
+
+
+def read_pairs(path: Path) -> Iterator[Pair]:
+    """Yield ``(line number, input, expected SMILES)``, lazily; ``#`` lines are skipped."""
+    with open(path, encoding="utf-8") as file:
+        for number, line in enumerate(file):
+            if not line.strip() or line.startswith("#"):
+                continue
+            source, _, expected = line.rstrip("\n").rpartition("\t")
+            yield number, source, expected.strip()
+
+
+# Worker state, set by _init_worker.
+_engines: dict[str, ModuleType] = {}
+_image_root = Path()
+
+
+def _init_worker(mode: Mode, naming_engine: str, ocsr_engine: str, image_root: str) -> None:
+    global _image_root
+    # Set before the backend settings are first imported; environment variables
+    # also take precedence over a .env file. An empty store path disables the store.
+    os.environ["CACHE_BACKEND"] = "none"
+    os.environ["RESULT_STORE_PATH"] = ""
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+    if Chem is not None:
+        RDLogger.DisableLog("rdApp.*")
+    _engines["naming"] = importlib.import_module(naming_engine)
+    _engines["ocsr"] = importlib.import_module(ocsr_engine)
+    _image_root = Path(image_root)
+    _warm_up(mode)
+
+
+def _warm_up(mode: Mode) -> None:
+    """Load the engines of a mode before timing starts (errors are left to the pairs)."""
+    module = _engines["naming" if mode == "names" else "ocsr"]
+    warmup = getattr(module, "warmup", None)
+    with contextlib.suppress(Exception):
+        if warmup is not None:
+            warmup()
+        if mode == "names":
+            smiles = _call([], "naming", "name_to_smiles", WARMUP_NAME)
+            if smiles is not None:
+                _call([], "naming", "smiles_to_name", smiles)
+
+
+def _call(latencies: list[tuple[str, str, float]], engine: str, function: str, *args: Any) -> Any:
+    """
+    Call an engine function and record ``(function, engine label, milliseconds)``.
+
+    Naming modules with ``convert_name`` report which tier produced a SMILES;
+    names no tier resolves are labelled ``unresolved``. Other calls are labelled
+    with the module name.
+    """
+    module = _engines[engine]
+    label = module.__name__
+    started = time.perf_counter_ns()
+    try:
+        if function == "name_to_smiles" and hasattr(module, "convert_name"):
+            result = module.convert_name(*args)
+            label = "unresolved" if result is None else result.engine
+            return None if result is None else result.value
+        return getattr(module, function)(*args)
+    finally:
+        latencies.append((function, label, (time.perf_counter_ns() - started) / 1e6))
+
+
+def evaluate_name(number: int, name: str, expected: str) -> dict[str, Any]:
+    """Run the name -> SMILES -> name -> SMILES round trip for one pair."""
+    latencies: list[tuple[str, str, float]] = []
+    record: dict[str, Any] = {"line": number, "input": name, "expected": expected}
+    try:
+        smiles = _call(latencies, "naming", "name_to_smiles", name)
+        record["smiles"] = smiles
+        record["correct"] = smiles is not None and canonical(smiles) == canonical(expected)
+        back_name = None if smiles is None else _call(latencies, "naming", "smiles_to_name", smiles)
+        record["name"] = back_name
+        if back_name is not None:
+            back_smiles = _call(latencies, "naming", "name_to_smiles", back_name)
+            record["round_trip"] = canonical(back_smiles) == canonical(smiles)
+    except Exception as e:
+        record["error"] = repr(e)
+    record["latency_ms"] = latencies
+    return record
+
+
+def evaluate_image(number: int, path: str, expected: str) -> dict[str, Any]:
+    """Recognize one image and compare against the expected SMILES."""
+    latencies: list[tuple[str, str, float]] = []
+    record: dict[str, Any] = {"line": number, "input": path, "expected": expected}
+    try:
+        image_bytes = (_image_root / path).read_bytes()
+        smiles = _call(latencies, "ocsr", "image_to_smiles", image_bytes)
+        record["smiles"] = smiles
+        record["correct"] = smiles is not None and canonical(smiles) == canonical(expected)
+    except Exception as e:
+        record["error"] = repr(e)
+    record["latency_ms"] = latencies
+    return record
+
+
+def evaluate_chunk(mode: Mode, chunk: list[Pair]) -> list[str]:
+    """Evaluate a chunk of pairs (worker entry point); returns serialized records."""
+    evaluate = evaluate_name if mode == "names" else evaluate_image
+    return [json.dumps(evaluate(*pair)) for pair in chunk]
+
+
+def completed_records(path: Path) -> int:
+    """
+    Count the complete records of an output file and drop a torn last line.
+
+    A run killed mid-write can leave a partial final record; the file is
+    truncated after the last newline so that resumed output stays valid JSONL.
+    """
+    if not path.exists():
+        return 0
+    count = 0
+    valid_end = 0
+    with open(path, "rb") as file:
+        for line in file:
+            if not line.endswith(b"\n"):
+                break
+            count += 1
+            valid_end += len(line)
+    if valid_end != path.stat().st_size:
+        os.truncate(path, valid_end)
+    return count
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram; percentiles are accurate to about 1%."""
+
+    _BASE = math.log(1.02)
+
+    def __init__(self) -> None:
+        self.buckets: Counter[int] = Counter()
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, milliseconds: float) -> None:
+        self.buckets[math.floor(math.log(max(milliseconds, 1e-6)) / self._BASE)] += 1
+        self.count += 1
+        self.total += milliseconds
+
+    def percentile(self, q: float) -> float:
+        rank = q / 100 * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return math.exp((bucket + 0.5) * self._BASE)
+        return 0.0
+
+    def summary(self) -> dict[str, float]:
+        return {
+            "calls": self.count,
+            "mean_ms": self.total / self.count,
+            **{f"p{q}_ms": self.percentile(q) for q in (50, 90, 99, 99.9)},
+        }
+
+
+def summarize(path: Path) -> dict[str, Any]:
+    """
+    Compute accuracy and latency percentiles from an output file.
+
+    Latencies are keyed ``<function>/<engine>``, e.g. ``name_to_smiles/dictionary``.
+    """
+    totals: Counter[str] = Counter()
+    histograms: dict[str, LatencyHistogram] = {}
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            record = json.loads(line)
+            totals["pairs"] += 1
+            totals["converted"] += record.get("smiles") is not None
+            totals["correct"] += bool(record.get("correct"))
+            totals["errors"] += "error" in record
+            if "round_trip" in record:
+                totals["round_trips"] += 1
+                totals["round_trip_consistent"] += record["round_trip"]
+            # Records written before engine labels were added have no label.
+            for *group, milliseconds in record["latency_ms"]:
+                key = "/".join(group)
+                histograms.setdefault(key, LatencyHistogram()).add(milliseconds)
+
+    pairs = max(totals["pairs"], 1)
+    summary: dict[str, Any] = {
+        **totals,
+        "accuracy": totals["correct"] / pairs,
+        "coverage": totals["converted"] / pairs,
+        "latency": {function: h.summary() for function, h in sorted(histograms.items())},
+    }
+    if totals["round_trips"]:
+        summary["round_trip_consistency"] = totals["round_trip_consistent"] / totals["round_trips"]
+    return summary
+
+
+def _chunks(pairs: Iterable[Pair], size: int) -> Iterator[list[Pair]]:
+    iterator = iter(pairs)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def run(
+    pairs_path: Path,
+    output_path: Path,
+    mode: Mode = "names",
+    workers: int | None = None,
+    chunk_size: int = 256,
+    naming_engine: str = "app.services.naming",
+    ocsr_engine: str = "app.services.ocsr",
+    limit: int | None = None,
+) -> dict[str, Any]:
+    """
+    Evaluate a pair file, appending to (and resuming) an output file.
+
+    Args:
+        pairs_path: Tab-separated ``input`` / ``expected SMILES`` file
+        output_path: JSONL output, one record per pair in input order
+        mode: ``names`` for round-trip naming, ``images`` for OCSR
+        workers: Evaluation processes (default: all CPUs)
+        chunk_size: Pairs per task; larger chunks amortize IPC overhead
+        naming_engine: Module providing ``name_to_smiles`` and ``smiles_to_name``
+        ocsr_engine: Module providing ``image_to_smiles``
+        limit: Evaluate at most this many pairs in total (including resumed ones)
+
+    Returns:
+        Summary of the whole output file plus this run's throughput
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * 4
+    done = completed_records(output_path)
+    pairs = islice(read_pairs(pairs_path), done, limit)
+    evaluated = 0
+    started = time.perf_counter()
+
+    initargs = (mode, naming_engine, ocsr_engine, str(pairs_path.resolve().parent))
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with (
+        ProcessPoolExecutor(workers, initializer=_init_worker, initargs=initargs) as pool,
+        open(output_path, "a", encoding="utf-8") as output,
+    ):
+        # Futures are written strictly in submission order, so the output is a
+        # prefix of the input and resuming only needs a record count.
+        in_flight: deque[Future[list[str]]] = deque()
+
+        def write_head() -> None:
+            nonlocal evaluated
+            records = in_flight.popleft().result()
+            output.write("".join(f"{record}\n" for record in records))
+            output.flush()
+            evaluated += len(records)
+
+        for chunk in _chunks(pairs, chunk_size):
+            in_flight.append(pool.submit(evaluate_chunk, mode, chunk))
+            while in_flight and (len(in_flight) >= max_in_flight or in_flight[0].done()):
+                write_head()
+        while in_flight:
+            write_head()
+
+    elapsed = time.perf_counter() - started
+    summary = summarize(output_path)
+    summary["run"] = {
+        "resumed_from": done,
+        "evaluated": evaluated,
+        "seconds": elapsed,
+        "pairs_per_second": evaluated / elapsed if elapsed else 0.0,
+        "workers": workers,
+    }
+    summary_path = output_path.with_name(output_path.name + ".summary.json")
+    summary_path.write_text(json.dumps(summary, indent=2))
+    return summary
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("pairs", type=Path, help="tab-separated input / expected SMILES file")
+    parser.add_argument("output", type=Path, help="JSONL results file (resumed if present)")
+    parser.add_argument("--mode", choices=["names", "images"], default="names")
+    parser.add_argument("--workers", type=int, default=None, help="evaluation processes")
+    parser.add_argument("--chunk-size", type=int, default=256, help="pairs per task")
+    parser.add_argument("--naming-engine", default="app.services.naming")
+    parser.add_argument("--ocsr-engine", default="app.services.ocsr")
+    parser.add_argument("--limit", type=int, default=None, help="maximum pairs in total")
+    parser.add_argument("--restart", action="store_true", help="discard existing results")
+    args = parser.parse_args(argv)
+
+    if args.restart:
+        args.output.unlink(missing_ok=True)
+    summary = run(
+        args.pairs,
+        args.output,
+        mode=args.mode,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        naming_engine=args.naming_engine,
+        ocsr_engine=args.ocsr_engine,
+        limit=args.limit,
+    )
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,27 @@
+"""Minimal naming/OCSR engine used by the round-trip tests."""
+
+import os
+
+NAMES = {"ethanol": "CCO", "methane": "C", "isopentane": "CC(C)CC"}
+warmups = 0
+
+
+def warmup() -> None:
+    global warmups
+    warmups += 1
+
+
+def name_to_smiles(name: str) -> str | None:
+    return NAMES.get(name)
+
+
+def smiles_to_name(smiles: str) -> str | None:
+    return {smiles: name for name, smiles in NAMES.items()}.get(smiles)
+
+
+def image_to_smiles(image_bytes: bytes) -> str | None:
+    return image_bytes.decode().strip() or None
+
+
+def environment() -> tuple[str | None, str | None]:
+    return os.environ.get("CACHE_BACKEND"), os.environ.get("RESULT_STORE_PATH")
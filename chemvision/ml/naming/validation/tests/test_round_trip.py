@@ -0,0 +1,152 @@
+"""Tests for the round-trip evaluation harness."""
+
+import json
+from pathlib import Path
+
+import fake_engine
+import pytest
+import round_trip_tests
+from round_trip_tests import (
+    LatencyHistogram,
+    completed_records,
+    evaluate_image,
+    evaluate_name,
+    read_pairs,
+    run,
+    summarize,
+)
+
+PAIRS = "# name\texpected\nethanol\tCCO\nmethane\tC\nunknown\tCC\n\nisopentane\tCC(C)CC\n"
+
+
+@pytest.fixture
+def pairs(tmp_path: Path) -> Path:
+    path = tmp_path / "pairs.tsv"
+    path.write_text(PAIRS)
+    return path
+
+
+@pytest.fixture
+def engines(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    """Initialize the harness in-process with the fake engine."""
+    monkeypatch.setenv("CACHE_BACKEND", "shared")
+    monkeypatch.setenv("RESULT_STORE_PATH", str(tmp_path / "results.db"))
+    monkeypatch.setattr(round_trip_tests, "_engines", {})
+    round_trip_tests._init_worker("names", "fake_engine", "fake_engine", str(tmp_path))
+
+
+class TestInputs:
+    """Tests for reading pairs and existing output."""
+
+    def test_read_pairs(self, pairs: Path) -> None:
+        """Test that comments and blank lines are skipped and line numbers kept."""
+        assert list(read_pairs(pairs)) == [
+            (1, "ethanol", "CCO"),
+            (2, "methane", "C"),
+            (3, "unknown", "CC"),
+            (5, "isopentane", "CC(C)CC"),
+        ]
+
+    def test_completed_records_drops_torn_line(self, tmp_path: Path) -> None:
+        """Test that a partial last record is truncated away."""
+        output = tmp_path / "out.jsonl"
+        output.write_text('{"a": 1}\n{"b": 2}\n{"c"')
+
+        assert completed_records(output) == 2
+        assert output.read_text() == '{"a": 1}\n{"b": 2}\n'
+        assert completed_records(tmp_path / "missing.jsonl") == 0
+
+
+class TestWorker:
+    """Tests for worker initialization and single evaluations."""
+
+    def test_disables_cache_and_store(self, engines: None) -> None:
+        """Test that inherited cache and store settings are overridden."""
+        assert fake_engine.environment() == ("none", "")
+
+    def test_warms_up_engines(self, engines: None) -> None:
+        """Test that worker initialization runs the engine's warmup hook."""
+        assert fake_engine.warmups >= 1
+
+    def test_evaluate_name(self, engines: None) -> None:
+        """Test the round trip record of a resolvable name."""
+        record = evaluate_name(1, "ethanol", "OCC")
+
+        assert record["smiles"] == "CCO"
+        assert record["name"] == "ethanol"
+        assert record["round_trip"] is True
+        functions = [function for function, _, _ in record["latency_ms"]]
+        assert functions == ["name_to_smiles", "smiles_to_name", "name_to_smiles"]
+        assert {engine for _, engine, _ in record["latency_ms"]} == {"fake_engine"}
+
+    def test_evaluate_image(self, engines: None, tmp_path: Path) -> None:
+        """Test that images are read relative to the pair file directory."""
+        (tmp_path / "a.txt").write_bytes(b"CCO")
+
+        record = evaluate_image(0, "a.txt", "CCO")
+        missing = evaluate_image(1, "missing.png", "CCO")
+
+        assert record["correct"] is True
+        assert "error" in missing
+
+
+class TestSummary:
+    """Tests for latency histograms and summaries."""
+
+    def test_histogram_percentiles(self) -> None:
+        """Test that percentiles are accurate to about 1%."""
+        histogram = LatencyHistogram()
+        for milliseconds in range(1, 1001):
+            histogram.add(float(milliseconds))
+
+        assert histogram.percentile(50) == pytest.approx(500, rel=0.02)
+        assert histogram.percentile(99) == pytest.approx(990, rel=0.02)
+        assert histogram.summary()["calls"] == 1000
+
+    def test_latency_grouped_by_engine(self, tmp_path: Path) -> None:
+        """Test that latencies are keyed by function and engine, old records by function."""
+        output = tmp_path / "out.jsonl"
+        records = [
+            {"smiles": "C", "correct": True, "latency_ms": [["name_to_smiles", "dictionary", 1]]},
+            {"smiles": "CC", "correct": False, "latency_ms": [["name_to_smiles", "rules", 5]]},
+            {"smiles": None, "latency_ms": [["name_to_smiles", 2]]},
+        ]
+        output.write_text("".join(json.dumps(record) + "\n" for record in records))
+
+        summary = summarize(output)
+
+        assert sorted(summary["latency"]) == [
+            "name_to_smiles",
+            "name_to_smiles/dictionary",
+            "name_to_smiles/rules",
+        ]
+        assert summary["accuracy"] == pytest.approx(1 / 3)
+        assert summary["coverage"] == pytest.approx(2 / 3)
+
+
+class TestRun:
+    """End-to-end tests over a process pool."""
+
+    def test_run_and_resume(self, pairs: Path, tmp_path: Path) -> None:
+        """Test that output is in input order and a second run resumes."""
+        output = tmp_path / "out.jsonl"
+
+        first = run(pairs, output, workers=2, chunk_size=1, naming_engine="fake_engine", limit=2)
+        second = run(pairs, output, workers=2, chunk_size=1, naming_engine="fake_engine")
+
+        lines = [json.loads(line)["line"] for line in output.read_text().splitlines()]
+        assert lines == [1, 2, 3, 5]
+        assert first["run"]["evaluated"] == 2
+        assert (second["run"]["resumed_from"], second["run"]["evaluated"]) == (2, 2)
+        assert second["correct"] == 3
+        assert json.loads(output.with_name("out.jsonl.summary.json").read_text())["pairs"] == 4
+
+    def test_backend_engine_tiers(self, pairs: Path, tmp_path: Path) -> None:
+        """Test that the backend naming service reports the tier that answered."""
+        pytest.importorskip("structlog")
+        output = tmp_path / "out.jsonl"
+
+        summary = run(pairs, output, workers=1)
+
+        assert "name_to_smiles/dictionary" in summary["latency"]
+        assert "name_to_smiles/unresolved" in summary["latency"]
@@ -0,0 +1,295 @@
+"""Build a synthetic OCSR training set by rendering SMILES lists.
+
+Each input SMILES is depicted with RDKit using randomized drawing styles (bond
+width, font size, rotation, colour palette, kekulization, stereo annotations),
+then degraded with scan-like augmentations (blur, noise, JPEG artefacts,
+resampling, small affine distortions). Images are streamed into fixed-size tar
+shards readable with ``shards.ShardLoader``.
+
+Rendering runs in a process pool. The parent only reads input lines and appends
+finished samples to the current shard, so throughput scales with the number of
+workers, and a bounded number of in-flight chunks keeps memory independent of
+the dataset size.
+
+Every sample is seeded from ``(seed, line number)`` and chunks are written in
+input order, so a dataset is byte-for-byte reproducible regardless of the worker
+count.
+
+Usage::
+
+    python build_dataset.py smiles.txt datasets/synthetic --workers 16 --shard-size 10000
+"""
+
+import argparse
+import io
+import itertools
+import logging
+import os
+import sys
+import time
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageFilter
+from rdkit import Chem, RDLogger
+from rdkit.Chem import rdDepictor
+from rdkit.Chem.Draw import rdMolDraw2D
+from shards import Sample, ShardWriter
+
+logger = logging.getLogger("build_dataset")
+
+
+@dataclass(frozen=True)
+class RenderConfig:
+    """Rendering and augmentation settings shared by all workers."""
+
+    image_size: int = 384
+    seed: int = 0
+    augment_probability: float = 0.8
+    min_canvas: int = 256
+    max_canvas: int = 768
+
+
+def read_smiles(path: Path) -> Iterator[tuple[int, str]]:
+    """
+    Yield ``(line number, SMILES)`` from a text file, lazily.
+
+    The first whitespace-separated field of each line is taken as the SMILES, so
+    ``.smi`` files with trailing identifiers work. Blank lines and ``#`` comments
+    are skipped.
+    """
+    with open(path, encoding="utf-8") as file:
+        for number, line in enumerate(file):
+            fields = line.split(maxsplit=1)
+            if fields and not fields[0].startswith("#"):
+                yield number, fields[0]
+
+
+def _chunks(items: Iterable[tuple[int, str]], size: int) -> Iterator[list[tuple[int, str]]]:
+    iterator = iter(items)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+def _draw(mol: Chem.Mol, rng: np.random.Generator, config: RenderConfig) -> Image.Image:
+    """Depict a molecule with a randomized drawing style."""
+    side = int(rng.integers(config.min_canvas, config.max_canvas + 1))
+    aspect = rng.uniform(0.75, 1.33)
+    drawer = rdMolDraw2D.MolDraw2DCairo(side, max(config.min_canvas // 2, int(side / aspect)))
+    options = drawer.drawOptions()
+    options.bondLineWidth = float(rng.uniform(1.0, 4.0))
+    options.baseFontSize = float(rng.uniform(0.5, 1.0))
+    options.multipleBondOffset = float(rng.uniform(0.1, 0.25))
+    options.padding = float(rng.uniform(0.03, 0.15))
+    options.rotate = float(rng.uniform(0.0, 360.0))
+    options.addStereoAnnotation = bool(rng.random() < 0.2)
+    options.explicitMethyl = bool(rng.random() < 0.1)
+    options.comicMode = bool(rng.random() < 0.05)
+    if rng.random() < 0.7:
+        options.useBWAtomPalette()
+
+    rdDepictor.SetPreferCoordGen(bool(rng.random() < 0.5))
+    rdDepictor.Compute2DCoords(mol)
+    rdMolDraw2D.PrepareAndDrawMolecule(drawer, mol, kekulize=bool(rng.random() < 0.8))
+    drawer.FinishDrawing()
+    return Image.open(io.BytesIO(drawer.GetDrawingText())).convert("L")
+
+
+def _augment(image: Image.Image, rng: np.random.Generator) -> Image.Image:
+    """Apply scan- and photo-like degradations."""
+    if rng.random() < 0.3:
+        image = image.rotate(
+            float(rng.uniform(-3.0, 3.0)),
+            resample=Image.Resampling.BILINEAR,
+            expand=True,
+            fillcolor=255,
+        )
+    if rng.random() < 0.3:
+        factor = rng.uniform(0.4, 0.8)
+        small = (max(1, int(image.width * factor)), max(1, int(image.height * factor)))
+        image = image.resize(small, Image.Resampling.BILINEAR).resize(
+            image.size, Image.Resampling.BILINEAR
+        )
+    if rng.random() < 0.3:
+        image = image.filter(ImageFilter.GaussianBlur(float(rng.uniform(0.3, 1.2))))
+
+    pixels = np.asarray(image, dtype=np.float32)
+    if rng.random() < 0.5:
+        contrast = rng.uniform(0.7, 1.0)
+        background = rng.uniform(200.0, 255.0)
+        pixels = background - (255.0 - pixels) * contrast * background / 255.0
+    if rng.random() < 0.4:
+        pixels += rng.normal(0.0, rng.uniform(2.0, 12.0), pixels.shape)
+    if rng.random() < 0.2:
+        mask = rng.random(pixels.shape)
+        amount = rng.uniform(0.001, 0.01)
+        pixels[mask < amount / 2] = 0.0
+        pixels[mask > 1.0 - amount / 2] = 255.0
+    image = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+
+    if rng.random() < 0.3:
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=int(rng.integers(30, 90)))
+        image = Image.open(buffer).convert("L")
+    return image
+
+
+def _fit(image: Image.Image, size: int) -> Image.Image:
+    """Scale to fit a ``size`` x ``size`` square and pad with white."""
+    scale = size / max(image.size)
+    resized = image.resize(
+        (max(1, round(image.width * scale)), max(1, round(image.height * scale))),
+        Image.Resampling.LANCZOS,
+    )
+    canvas = Image.new("L", (size, size), 255)
+    canvas.paste(resized, ((size - resized.width) // 2, (size - resized.height) // 2))
+    return canvas
+
+
+def render(number: int, smiles: str, config: RenderConfig) -> Sample | None:
+    """
+    Render one SMILES into a training sample.
+
+    Args:
+        number: Input line number, used as the sample key and seed
+        smiles: Input SMILES
+        config: Rendering settings
+
+    Returns:
+        Sample with a grayscale PNG and the canonical SMILES, or None if the
+        SMILES cannot be parsed or drawn
+    """
+    mol = Chem.MolFromSmiles(smiles)
+    if mol is None or mol.GetNumAtoms() == 0:
+        return None
+    rng = np.random.default_rng([config.seed, number])
+    try:
+        image = _draw(Chem.Mol(mol), rng, config)
+    except (RuntimeError, ValueError):
+        return None
+    if rng.random() < config.augment_probability:
+        image = _augment(image, rng)
+
+    buffer = io.BytesIO()
+    _fit(image, config.image_size).save(buffer, format="PNG", optimize=False)
+    return Sample(f"{number:09d}", buffer.getvalue(), Chem.MolToSmiles(mol))
+
+
+def render_chunk(chunk: list[tuple[int, str]], config: RenderConfig) -> list[Sample | None]:
+    """Render a chunk of input lines (worker entry point)."""
+    return [render(number, smiles, config) for number, smiles in chunk]
+
+
+def _init_worker() -> None:
+    RDLogger.DisableLog("rdApp.*")
+
+
+def build_dataset(
+    smiles_path: Path,
+    output_dir: Path,
+    config: RenderConfig,
+    shard_size: int = 10_000,
+    workers: int | None = None,
+    chunk_size: int = 64,
+    limit: int | None = None,
+) -> dict[str, int]:
+    """
+    Render a SMILES file into a sharded dataset.
+
+    Args:
+        smiles_path: Text file with one SMILES per line
+        output_dir: Directory receiving the shards and ``index.json``
+        config: Rendering settings
+        shard_size: Samples per shard
+        workers: Rendering processes (default: all CPUs)
+        chunk_size: Input lines per task; larger chunks amortize IPC overhead
+        limit: Stop after this many input lines
+
+    Returns:
+        Counts of written and failed samples
+    """
+    workers = workers or os.cpu_count() or 1
+    # Enough queued work to keep every worker busy while the parent writes.
+    max_in_flight = workers * 2
+    lines = itertools.islice(read_smiles(smiles_path), limit)
+    failed = 0
+    started = reported = time.perf_counter()
+
+    metadata = {"image_size": config.image_size, "render": asdict(config)}
+    with (
+        ProcessPoolExecutor(workers, initializer=_init_worker) as pool,
+        ShardWriter(output_dir, shard_size, metadata=metadata) as writer,
+    ):
+        # Futures in submission order; results are written oldest first so the
+        # shard contents do not depend on which worker finishes first.
+        pending: deque[Future[list[Sample | None]]] = deque()
+
+        def write_oldest() -> None:
+            nonlocal failed
+            for sample in pending.popleft().result():
+                if sample is None:
+                    failed += 1
+                else:
+                    writer.write(sample)
+
+        for chunk in _chunks(lines, chunk_size):
+            pending.append(pool.submit(render_chunk, chunk, config))
+            if len(pending) >= max_in_flight:
+                write_oldest()
+                now = time.perf_counter()
+                if now - reported < 10.0:
+                    continue
+                reported = now
+                logger.info(
+                    "%d samples, %d failed, %.0f samples/s",
+                    writer.samples,
+                    failed,
+                    writer.samples / (now - started),
+                )
+        while pending:
+            write_oldest()
+
+    return {"samples": writer.samples, "failed": failed, "shards": len(writer.shards)}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("smiles", type=Path, help="text file with one SMILES per line")
+    parser.add_argument("output", type=Path, help="output dataset directory")
+    parser.add_argument("--shard-size", type=int, default=10_000, help="samples per shard")
+    parser.add_argument("--workers", type=int, default=None, help="rendering processes")
+    parser.add_argument("--chunk-size", type=int, default=64, help="input lines per task")
+    parser.add_argument("--image-size", type=int, default=384, help="output side in pixels")
+    parser.add_argument("--seed", type=int, default=0, help="dataset seed")
+    parser.add_argument(
+        "--augment", type=float, default=0.8, help="probability of augmenting a sample"
+    )
+    parser.add_argument("--limit", type=int, default=None, help="maximum input lines")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    config = RenderConfig(
+        image_size=args.image_size, seed=args.seed, augment_probability=args.augment
+    )
+    started = time.perf_counter()
+    counts = build_dataset(
+        args.smiles,
+        args.output,
+        config,
+        shard_size=args.shard_size,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        limit=args.limit,
+    )
+    elapsed = time.perf_counter() - started
+    logger.info("wrote %(samples)d samples in %(shards)d shards (%(failed)d failed)", counts)
+    logger.info("%.1f s, %.0f samples/s", elapsed, counts["samples"] / max(elapsed, 1e-9))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+"""Sharded image/SMILES datasets stored as tar files.
+
+A dataset is a directory of fixed-size tar shards plus an ``index.json``::
+
+    dataset/
+    ├── index.json
+    ├── shard-000000.tar
+    ├── shard-000001.tar
+    └── ...
+
+Each sample is two consecutive tar members sharing a key: ``<key>.png`` (the
+image) and ``<key>.smi`` (the canonical SMILES, UTF-8). This is the WebDataset
+layout, so shards can also be read with ``webdataset`` or plain ``tar``.
+
+Shards are written and read strictly sequentially, which keeps memory bounded
+by one sample (writer) or by the prefetch buffer (loader), independent of the
+dataset size, and gives streaming disk access on both sides.
+"""
+
+import io
+import json
+import os
+import queue
+import random
+import tarfile
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+from types import TracebackType
+from typing import Any, NamedTuple
+
+INDEX_FILE = "index.json"
+INDEX_VERSION = 1
+
+
+class Sample(NamedTuple):
+    """One training example."""
+
+    key: str
+    image: bytes
+    smiles: str
+
+
+class ShardWriter:
+    """
+    Streams samples into fixed-size tar shards and writes the index on close.
+
+    Used as a context manager, the index is only written when the block
+    completes without an exception.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        shard_size: int = 10_000,
+        prefix: str = "shard",
+        metadata: dict[str, Any] | None = None,
+    ) -> None:
+        if shard_size <= 0:
+            raise ValueError("shard_size must be positive")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.shard_size = shard_size
+        self.prefix = prefix
+        self.metadata = metadata or {}
+        self.shards: list[dict[str, Any]] = []
+        self._tar: tarfile.TarFile | None = None
+        self._count = 0
+
+    def _open_shard(self) -> tarfile.TarFile:
+        name = f"{self.prefix}-{len(self.shards):06d}.tar"
+        self.shards.append({"path": name, "samples": 0})
+        self._count = 0
+        return tarfile.open(self.directory / name, mode="w", format=tarfile.USTAR_FORMAT)
+
+    def _close_shard(self) -> None:
+        if self._tar is not None:
+            self._tar.close()
+            shard = self.shards[-1]
+            shard["bytes"] = (self.directory / shard["path"]).stat().st_size
+            self._tar = None
+
+    @staticmethod
+    def _add(tar: tarfile.TarFile, name: str, data: bytes) -> None:
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mode = 0o644
+        tar.addfile(info, io.BytesIO(data))
+
+    def write(self, sample: Sample) -> None:
+        """Append a sample, starting a new shard when the current one is full."""
+        if self._tar is None:
+            self._tar = self._open_shard()
+        self._add(self._tar, f"{sample.key}.png", sample.image)
+        self._add(self._tar, f"{sample.key}.smi", sample.smiles.encode())
+        self._count += 1
+        self.shards[-1]["samples"] = self._count
+        if self._count >= self.shard_size:
+            self._close_shard()
+
+    @property
+    def samples(self) -> int:
+        return sum(shard["samples"] for shard in self.shards)
+
+    def close(self) -> None:
+        """Close the last shard and write ``index.json`` atomically."""
+        self._close_shard()
+        index = {
+            "version": INDEX_VERSION,
+            "samples": self.samples,
+            "shard_size": self.shard_size,
+            "shards": self.shards,
+            **self.metadata,
+        }
+        temporary = self.directory / f".{INDEX_FILE}.tmp"
+        temporary.write_text(json.dumps(index, indent=2))
+        os.replace(temporary, self.directory / INDEX_FILE)
+
+    def __enter__(self) -> "ShardWriter":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        if exc_type is None:
+            self.close()
+            return
+        # A failed build must not look complete: release the open shard but write
+        # no index, and drop the index of any earlier build the shards overwrote.
+        self._close_shard()
+        (self.directory / INDEX_FILE).unlink(missing_ok=True)
+
+
+def read_index(directory: str | Path) -> dict[str, Any]:
+    """Read the ``index.json`` of a dataset directory."""
+    index: dict[str, Any] = json.loads((Path(directory) / INDEX_FILE).read_text())
+    if index.get("version") != INDEX_VERSION:
+        raise ValueError(f"Unsupported dataset index version {index.get('version')}")
+    return index
+
+
+def iter_shard(path: str | Path) -> Iterator[Sample]:
+    """Yield the samples of one shard, reading it front to back."""
+    with open(path, "rb") as file:
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(file.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        pending: dict[str, bytes] = {}
+        with tarfile.open(fileobj=file, mode="r|") as tar:
+            for member in tar:
+                extracted = tar.extractfile(member)
+                if extracted is None:
+                    continue
+                key, _, extension = member.name.rpartition(".")
+                pending[extension] = extracted.read()
+                if "png" in pending and "smi" in pending:
+                    yield Sample(key, pending.pop("png"), pending.pop("smi").decode())
+
+
+_DONE = object()
+
+
+class ShardLoader:
+    """
+    Streams samples from a sharded dataset with background prefetching.
+
+    A reader thread walks the shards sequentially and fills a bounded buffer, so
+    disk reads overlap with training and memory stays bounded by ``prefetch``
+    samples. Shards can be split across data-parallel ranks, and shuffled per
+    epoch at shard level plus within a shuffle buffer.
+
+    Example::
+
+        for sample in ShardLoader("datasets/synthetic", shuffle=True, epoch=epoch):
+            image = decode(sample.image)
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        prefetch: int = 1024,
+        shuffle: bool = False,
+        shuffle_buffer: int = 4096,
+        seed: int = 0,
+        epoch: int = 0,
+        rank: int = 0,
+        world_size: int = 1,
+    ) -> None:
+        self.directory = Path(directory)
+        self.index = read_index(self.directory)
+        self.prefetch = prefetch
+        self.shuffle = shuffle
+        self.shuffle_buffer = shuffle_buffer
+        self.seed = seed
+        self.epoch = epoch
+        shards = [shard["path"] for shard in self.index["shards"]]
+        if shuffle:
+            random.Random(seed * 1_000_003 + epoch).shuffle(shards)
+        self.shards = shards[rank::world_size]
+
+    def __len__(self) -> int:
+        by_path = {shard["path"]: shard["samples"] for shard in self.index["shards"]}
+        return sum(by_path[path] for path in self.shards)
+
+    @staticmethod
+    def _put(buffer: "queue.Queue[object]", item: object, stop: threading.Event) -> bool:
+        """Put an item unless the consumer has stopped; return whether it was queued."""
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _read(self, buffer: "queue.Queue[object]", stop: threading.Event) -> None:
+        try:
+            for path in self.shards:
+                for sample in iter_shard(self.directory / path):
+                    if not self._put(buffer, sample, stop):
+                        return
+            self._put(buffer, _DONE, stop)
+        except BaseException as e:  # surfaced in the consuming thread
+            self._put(buffer, e, stop)
+
+    def _stream(self) -> Iterator[Sample]:
+        buffer: queue.Queue[object] = queue.Queue(maxsize=self.prefetch)
+        stop = threading.Event()
+        reader = threading.Thread(target=self._read, args=(buffer, stop), daemon=True)
+        reader.start()
+        try:
+            while True:
+                item = buffer.get()
+                if item is _DONE:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                assert isinstance(item, Sample)
+                yield item
+        finally:
+            stop.set()
+            reader.join()
+
+    def __iter__(self) -> Iterator[Sample]:
+        if not self.shuffle:
+            yield from self._stream()
+            return
+        rng = random.Random(self.seed * 1_000_003 + self.epoch + 1)
+        pool: list[Sample] = []
+        for sample in self._stream():
+            if len(pool) < self.shuffle_buffer:
+                pool.append(sample)
+                continue
+            position = rng.randrange(len(pool))
+            pool[position], sample = sample, pool[position]
+            yield sample
+        rng.shuffle(pool)
+        yield from pool
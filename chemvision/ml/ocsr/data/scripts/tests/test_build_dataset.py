@@ -0,0 +1,77 @@
+"""Tests for the synthetic dataset builder."""
+
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("rdkit")
+
+from build_dataset import RenderConfig, build_dataset, read_smiles, render  # noqa: E402
+from shards import ShardLoader, read_index  # noqa: E402
+
+SMILES = ["CCO", "c1ccccc1", "not-a-smiles", "CC(=O)O", "C1CCCCC1", "CCN(CC)CC", "O=C=O"] * 3
+
+
+@pytest.fixture
+def smiles_file(tmp_path: Path) -> Path:
+    path = tmp_path / "input.smi"
+    path.write_text("# comment\n\n" + "\n".join(f"{s} id{i}" for i, s in enumerate(SMILES)))
+    return path
+
+
+class TestReadSmiles:
+    """Tests for reading input files."""
+
+    def test_skips_comments_and_identifiers(self, smiles_file: Path) -> None:
+        """Test that comments and blank lines are skipped and identifiers dropped."""
+        lines = list(read_smiles(smiles_file))
+
+        assert [smiles for _, smiles in lines] == SMILES
+        assert lines[0][0] == 2
+
+
+class TestRender:
+    """Tests for rendering single samples."""
+
+    def test_invalid_smiles(self) -> None:
+        """Test that unparseable SMILES produce no sample."""
+        assert render(0, "not-a-smiles", RenderConfig(image_size=64)) is None
+
+    def test_seeded_by_line_number(self) -> None:
+        """Test that a line renders identically every time."""
+        config = RenderConfig(image_size=64, seed=3)
+
+        assert render(5, "c1ccccc1O", config) == render(5, "c1ccccc1O", config)
+
+
+class TestBuildDataset:
+    """Tests for the parallel dataset build."""
+
+    def test_writes_shards(self, smiles_file: Path, tmp_path: Path) -> None:
+        """Test that valid lines become samples in input order and failures are counted."""
+        counts = build_dataset(
+            smiles_file, tmp_path / "out", RenderConfig(image_size=64), shard_size=4, workers=2
+        )
+
+        assert counts == {"samples": 18, "failed": 3, "shards": 5}
+        keys = [sample.key for sample in ShardLoader(tmp_path / "out")]
+        assert keys == sorted(keys)
+        assert read_index(tmp_path / "out")["image_size"] == 64
+
+    def test_reproducible_for_any_worker_count(self, smiles_file: Path, tmp_path: Path) -> None:
+        """Test that shard contents do not depend on the number of workers."""
+        config = RenderConfig(image_size=64, seed=7)
+        for workers in (1, 3):
+            build_dataset(
+                smiles_file,
+                tmp_path / f"w{workers}",
+                config,
+                shard_size=5,
+                workers=workers,
+                chunk_size=2,
+            )
+
+        shards = sorted(p.name for p in (tmp_path / "w1").glob("*.tar"))
+        assert shards == sorted(p.name for p in (tmp_path / "w3").glob("*.tar"))
+        for name in shards:
+            assert (tmp_path / "w1" / name).read_bytes() == (tmp_path / "w3" / name).read_bytes()
@@ -0,0 +1,112 @@
+"""Tests for the sharded dataset writer and loader."""
+
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from shards import Sample, ShardLoader, ShardWriter, iter_shard, read_index
+
+
+def _write(directory: Path, samples: int, shard_size: int) -> list[Sample]:
+    written = [
+        Sample(f"{i:09d}", bytes([i % 256]) * (i + 1), "C" * (i + 1)) for i in range(samples)
+    ]
+    with ShardWriter(directory, shard_size=shard_size) as writer:
+        for sample in written:
+            writer.write(sample)
+    return written
+
+
+class TestShardWriter:
+    """Tests for writing shards and the index."""
+
+    def test_round_trip(self, tmp_path: Path) -> None:
+        """Test that samples read back in order, split into fixed-size shards."""
+        written = _write(tmp_path, 25, shard_size=10)
+
+        index = read_index(tmp_path)
+        assert index["samples"] == 25
+        assert [shard["samples"] for shard in index["shards"]] == [10, 10, 5]
+        assert list(ShardLoader(tmp_path, prefetch=4)) == written
+        assert list(iter_shard(tmp_path / index["shards"][2]["path"])) == written[20:]
+
+    def test_failed_build_writes_no_index(self, tmp_path: Path) -> None:
+        """Test that a build that raises leaves no index, not even an earlier one."""
+        _write(tmp_path, 5, shard_size=10)
+
+        with pytest.raises(RuntimeError), ShardWriter(tmp_path, shard_size=10) as writer:
+            writer.write(Sample("000000000", b"x", "C"))
+            raise RuntimeError("build failed")
+
+        with pytest.raises(FileNotFoundError):
+            read_index(tmp_path)
+
+    def test_rejects_non_positive_shard_size(self, tmp_path: Path) -> None:
+        """Test that a zero shard size is rejected."""
+        with pytest.raises(ValueError):
+            ShardWriter(tmp_path, shard_size=0)
+
+    def test_unsupported_index_version(self, tmp_path: Path) -> None:
+        """Test that an index from another format version is rejected."""
+        (tmp_path / "index.json").write_text('{"version": 99}')
+
+        with pytest.raises(ValueError, match="version"):
+            read_index(tmp_path)
+
+
+class TestShardLoader:
+    """Tests for streaming, splitting and shuffling."""
+
+    def test_rank_splitting(self, tmp_path: Path) -> None:
+        """Test that ranks read disjoint shards that together cover the dataset."""
+        written = _write(tmp_path, 40, shard_size=5)
+
+        ranks = [list(ShardLoader(tmp_path, rank=r, world_size=3)) for r in range(3)]
+
+        keys = [sample.key for samples in ranks for sample in samples]
+        assert sorted(keys) == [sample.key for sample in written]
+        assert [len(ShardLoader(tmp_path, rank=r, world_size=3)) for r in range(3)] == [
+            len(samples) for samples in ranks
+        ]
+
+    def test_shuffle_is_deterministic(self, tmp_path: Path) -> None:
+        """Test that a seed and epoch fix the order, and epochs differ."""
+        written = _write(tmp_path, 50, shard_size=5)
+
+        def keys(epoch: int) -> list[str]:
+            loader = ShardLoader(tmp_path, shuffle=True, shuffle_buffer=8, seed=1, epoch=epoch)
+            return [sample.key for sample in loader]
+
+        assert keys(0) == keys(0)
+        assert keys(0) != keys(1)
+        assert sorted(keys(1)) == [sample.key for sample in written]
+        assert keys(0) != [sample.key for sample in written]
+
+    def test_early_close_does_not_hang(self, tmp_path: Path) -> None:
+        """Test that closing a partly consumed loader stops the reader thread."""
+        _write(tmp_path, 20, shard_size=5)
+        finished = threading.Event()
+
+        def consume() -> None:
+            iterator = iter(ShardLoader(tmp_path, prefetch=16))
+            for _ in range(4):
+                next(iterator)
+            time.sleep(0.5)  # let the reader fill the buffer and block on the end marker
+            iterator.close()  # type: ignore[attr-defined]
+            finished.set()
+
+        thread = threading.Thread(target=consume, daemon=True)
+        thread.start()
+        thread.join(timeout=10)
+
+        assert finished.is_set()
+
+    def test_reader_errors_are_raised(self, tmp_path: Path) -> None:
+        """Test that a failure in the reader thread surfaces in the consumer."""
+        _write(tmp_path, 5, shard_size=5)
+        loader = ShardLoader(tmp_path)
+        (tmp_path / loader.shards[0]).unlink()
+
+        with pytest.raises(FileNotFoundError):
+            list(loader)